@@ -1,5 +1,10 @@
 # -*- coding: utf-8 -*-
 
+# Profile startup when QTILE_PROFILE_STARTUP is set to a report path.
+# This has to come before every other import to time them.
+from custom import profiler
+profiler.start()
+
 # IMPORTS
 from libqtile.command import lazy
 from libqtile.utils import guess_terminal
@@ -9,15 +14,52 @@ from libqtile.config import (
     Group,
     Key,
     Match,
-    Screen,
 )
 from libqtile import (
-    bar,
     layout,
-    widget,
     qtile,
 )
 
+from custom.factory import (
+    Icon,
+    LeftArrow,
+    RightArrow,
+    Separator,
+    Widget,
+)
+from custom.commands import prebind
+from custom.groups import switch_group
+from custom.keys import find_conflicts
+from custom.layouts import (
+    CachedMonadTall,
+    CompiledFloating,
+)
+from custom.lazy import widget
+from custom.palette import Palette
+from custom.reload import reload_config
+from custom.spawn import spawn
+from custom.terminal import sync_alacritty
+from custom.volume import (
+    change_volume,
+    toggle_mute,
+)
+from custom.screens import (
+    count_monitors,
+    make_screens,
+    reload_on_hotplug,
+)
+from custom.widgets import (
+    AlignedClock,
+    AsyncNvidiaSensors,
+    CPUHeat,
+    DebouncedCurrentLayout,
+    DebouncedWindowName,
+    IndexedPrompt,
+    SampledCPU,
+    SampledMemory,
+    SmoothedNet,
+)
+
 mod = "mod4"            # Set the windows key as the mod key.
 terminal = "alacritty"  # Set Alacritty as the default terminal.
 
@@ -39,17 +81,18 @@ keys = [
         lazy.layout.toggle_split(),
         desc="Toggle between split and unsplit sides of stack",
     ),
-    Key([mod], "Return", lazy.spawn(terminal), desc="Launch terminal"),
+    Key([mod], "Return", spawn(terminal), desc="Launch terminal"),
     Key([mod], "Tab", lazy.next_layout(), desc="Toggle between layouts"),
     Key([mod], "w", lazy.window.kill(), desc="Kill focused window"),
-    Key([mod, "control"], "r", lazy.reload_config(), desc="Reload the config"),
+    Key([mod, "control"], "r", lazy.function(reload_config), desc="Reload the config"),
     Key([mod, "control"], "q", lazy.shutdown(), desc="Shutdown Qtile"),
     Key([mod], "r", lazy.spawncmd(), desc="Spawn a command using a prompt widget"),
 
     # Bindings for the volume keys.
-    Key([], "XF86AudioLowerVolume", lazy.spawn("pamixer --decrease 5")),
-    Key([], "XF86AudioRaiseVolume", lazy.spawn("pamixer --increase 5")),
-    Key([], "XF86AudioMute", lazy.spawn("pamixer --toggle-mute")),
+    # Held down, repeats are added up and sent once per frame.
+    Key([], "XF86AudioLowerVolume", lazy.function(change_volume, -5)),
+    Key([], "XF86AudioRaiseVolume", lazy.function(change_volume, 5)),
+    Key([], "XF86AudioMute", lazy.function(toggle_mute)),
 ]
 
 
@@ -84,9 +127,17 @@ for num_key, (name, params) in enumerate(group_names, 1):
 
     # Number each group and bind its number to a key.
     # For instance, if "SYS" is group 3, Mod + 3 switches to it.
-    keys.append(Key([mod], str(num_key), lazy.group[name].toscreen()))         # Switch to another group.
+    keys.append(Key([mod], str(num_key), lazy.function(switch_group, name)))   # Switch to another group.
     keys.append(Key([mod, "shift"], str(num_key), lazy.window.togroup(name)))  # Send window to another group.
 
+# Resolve every binding to the chord Qtile grabs, once,
+# and warn about any that clash.
+key_conflicts = find_conflicts(keys)
+
+# Look up what each `lazy` command calls once, instead of on every
+# press. Lookups are redone only when the layout, group or focus changes.
+prebind(keys)
+
 
 # LAYOUTS
 # 
@@ -100,6 +151,9 @@ hybrid = {
     2:      "8c9440",
     3:      "de935f",
     4:      "5f819d",
+    5:      "85678f",
+    6:      "5e8d87",
+    7:      "707880",
 }
 kasugano = {
     "bar":  "1b1b1b",
@@ -131,6 +185,13 @@ blue_gradient = {
 
 theme = blue_gradient
 
+# Check and parse the theme's colors once, rather than looking them up
+# in the dict every time a widget needs one.
+palette = Palette.from_theme(theme)
+
+# Give Alacritty the same colors. Open terminals pick them up live.
+sync_alacritty(palette)
+
 # Change this to true if you'd like gaps between
 # your windows.
 use_gaps = True
@@ -139,14 +200,14 @@ use_gaps = True
 # most layouts will have in common.
 layout_defaults = {
     "border_width":  2,
-    "border_focus":  theme[4],
-    "border_normal": theme[3],
+    "border_focus":  palette.normal[4],
+    "border_normal": palette.normal[3],
     "margin":        12 if use_gaps else 0, 
 }
 
 layouts = [
     layout.Max(),
-    layout.MonadTall(**layout_defaults),
+    CachedMonadTall(**layout_defaults),
 ]
 
 # WIDGETS
@@ -157,195 +218,153 @@ widget_defaults = {
     "font":       "Ubuntu Mono Bold",
     "fontsize":   12,
     "padding":    6,
-    "foreground": theme["text"],
+    "foreground": palette.fg,
 }
 
 # This is redundant as of now.
 extension_defaults = widget_defaults.copy()
 
 
-# Define some useful functions for creating widgets
-# that are repeated.
-def separator(background: str):
-    """
-    Create a separator widget to put between other widgets.
-
-    background (str): Hexadecimal code for the background color.
-    """
-    return widget.Sep(
-        linewidth=0,
-        padding=10,
-        background=background,
-    )
-
-
-def left_arrow(foreground: str, background: str, padding: int=-4):
-    """
-    Create a left-facing powerline-style arrow (◀).
-    
-    foreground (str): Hexadecimal code for the foreground color.
-    background (str): Hexadecimal code for the background color.
-    """
-    return widget.TextBox(
-        font="Ubuntu Mono",
-        text="\u25c0",
-        foreground=foreground,
-        background=background,
-        padding=padding,
-        fontsize=37,
-    )
-
-
-def right_arrow(foreground: str, background: str, padding: int=-4):
-    """
-    Create a right-facing powerline-style arrow (◀).
-    
-    foreground (str): Hexadecimal code for the foreground color.
-    background (str): Hexadecimal code for the background color.
-    """
-    return widget.TextBox(
-        font="Ubuntu Mono",
-        text="\u25b6",
-        foreground=foreground,
-        background=background,
-        padding=padding,
-        fontsize=37,
-    )
-
-
-def icon(icon: str, foreground: str, background: str):
-    """
-    Create an icon to be displayed in the bar.
-
-    icon       (str): The icon to show.
-    foreground (str): Hexadecimal code for the foreground color.
-    background (str): Hexadecimal code for the background color.
-    """
-    return widget.TextBox(
-        font="Ubuntu Mono",
-        text=icon,
-        foreground=foreground,
-        background=background,
-        padding=3,
-        fontsize=16,
-    )
-
-
 # Configure the bar/panel with widgets and decorations.
 # Change the colors, etc, in the above sections.
-screens = [
-    Screen(
-        top=bar.Bar(
-            [
-                # Right hand side of the bar.
-                separator(theme[4]),
-                icon("⌦", theme["text"], theme[4]),
-                widget.QuickExit(
-                    default_text="[Log Out]",
-                    background=theme[4],
-                    **widget_defaults,
-                ),
-                right_arrow(theme[4], theme[3]),
-                separator(theme[3]),
-                icon("\u2318", theme["text"], theme[3]),
-                widget.TextBox(
-                    text=" Workspaces",
-                    background=theme[3],
-                    **widget_defaults,
-                ),
-                right_arrow(theme[3], theme[2]),
-                separator(theme[2]),
-                widget.GroupBox(
-                    font="Ubuntu Mono Bold",
-                    highlight_method="line",
-                    highlight_color=theme[3],
-                    padding_y=3,
-                    margin_x=8,
-                    padding_x=6,
-                    borderwidth=2,
-                    active=theme[4],
-                    inactive=theme["text"],
-                    this_current_screen_border=theme[4],
-                    background=theme[2],
-                    fontsize=widget_defaults["fontsize"],
-                ),
-                right_arrow(theme[2], theme[1]),
-                separator(theme[1]),
-                icon("\u2387", theme["text"], theme[1]),
-                widget.CurrentLayout(
-                    background=theme[1],
-                    **widget_defaults,
-                ),
-                separator(theme[1]),
-                widget.Prompt(
-                    background=theme[1],
-                    cursor_color=theme["text"],
-                    **widget_defaults,
-                ),
-                right_arrow(theme[1], theme[0]),
-                right_arrow(theme[0], theme["bar"]),
-                separator(theme["bar"]),
-                widget.WindowName(
-                    **widget_defaults,
-                ),
-                separator(theme["bar"]),
-
-                # Right hand side of the bar.
-                # Use arrows for a powerline-style effect.
-                separator(theme["bar"]),
-                left_arrow(theme[0], theme["bar"], padding=-5),
-                left_arrow(theme[1], theme[0]),
-                icon("\u26c1", theme["text"], theme[1]),
-                widget.Net(
-                    interface="wlan0",
-                    format="{down}↓ {up}↑",
-                    background=theme[1],
-                    **widget_defaults,
-                ),
-                separator(theme[1]),
-                left_arrow(theme[2], theme[1]),
-                widget.CPU(
-                    format="CPU {load_percent}%",
-                    background=theme[2],
-                    **widget_defaults,
-                ),
-                widget.Memory(
-                    measure_mem="G",
-                    format="Mem {MemUsed: .1f}/{MemTotal: .1f}GB",
-                    background=theme[2],
-                    **widget_defaults,
-                ),
-                widget.NvidiaSensors(
-                    format="GPU {perf} {temp}°C",
-                    background=theme[2],
-                    **widget_defaults,
-                ),
-                separator(theme[2]),
-                left_arrow(theme[3], theme[2]),
-                icon("⌨", theme["text"], theme[3]),
-                widget.TextBox(
-                    text="System",
-                    background=theme[3],
-                    **widget_defaults,
-                ),
-                separator(theme[3]),
-                left_arrow(theme[4], theme[3]),
-                icon("\u231b", theme["text"], theme[4]),
-                widget.Clock(
-                    format="%m/%d %H:%M",
-                    background=theme[4],
-                    **widget_defaults,
-                ),
-                separator(theme[4]),
-            ],
-            24,
-            background=theme["bar"],
-            # border_width=[2, 0, 2, 0],  # Draw top and bottom borders
-            # border_color=["ff00ff", "000000", "ff00ff", "000000"]  # Borders are magenta
-        ),
+#
+# The bar is described as a list of segments, which
+# `make_screens()` turns into widgets for each monitor.
+bar_spec = [
+    # Right hand side of the bar.
+    Separator(palette.normal[4]),
+    Icon("⌦", palette.fg, palette.normal[4]),
+    Widget(
+        widget.QuickExit,
+        default_text="[Log Out]",
+        background=palette.normal[4],
+        **widget_defaults,
+    ),
+    RightArrow(palette.normal[4], palette.normal[3]),
+    Separator(palette.normal[3]),
+    Icon("\u2318", palette.fg, palette.normal[3]),
+    Widget(
+        widget.TextBox,
+        text=" Workspaces",
+        background=palette.normal[3],
+        **widget_defaults,
     ),
+    RightArrow(palette.normal[3], palette.normal[2]),
+    Separator(palette.normal[2]),
+    Widget(
+        widget.GroupBox,
+        font="Ubuntu Mono Bold",
+        highlight_method="line",
+        highlight_color=palette.normal[3],
+        padding_y=3,
+        margin_x=8,
+        padding_x=6,
+        borderwidth=2,
+        active=palette.normal[4],
+        inactive=palette.fg,
+        this_current_screen_border=palette.normal[4],
+        background=palette.normal[2],
+        fontsize=widget_defaults["fontsize"],
+    ),
+    RightArrow(palette.normal[2], palette.normal[1]),
+    Separator(palette.normal[1]),
+    Icon("\u2387", palette.fg, palette.normal[1]),
+    Widget(
+        DebouncedCurrentLayout,
+        background=palette.normal[1],
+        **widget_defaults,
+    ),
+    Separator(palette.normal[1]),
+    Widget(
+        IndexedPrompt,
+        background=palette.normal[1],
+        cursor_color=palette.fg,
+        **widget_defaults,
+    ),
+    RightArrow(palette.normal[1], palette.normal[0]),
+    RightArrow(palette.normal[0], palette.bg),
+    Separator(palette.bg),
+    Widget(
+        DebouncedWindowName,
+        **widget_defaults,
+    ),
+    Separator(palette.bg),
+
+    # Right hand side of the bar.
+    # Use arrows for a powerline-style effect.
+    Separator(palette.bg),
+    LeftArrow(palette.normal[0], palette.bg),
+    LeftArrow(palette.normal[1], palette.normal[0]),
+    # CPU and Memory share one reading of /proc per tick. Net shows the
+    # interface of the default route, wherever it moves.
+    Icon("\u26c1", palette.fg, palette.normal[1]),
+    Widget(
+        SmoothedNet,
+        interface="auto",
+        format="{down}↓ {up}↑",
+        background=palette.normal[1],
+        **widget_defaults,
+    ),
+    Separator(palette.normal[1]),
+    LeftArrow(palette.normal[2], palette.normal[1]),
+    Widget(
+        SampledCPU,
+        format="CPU {load_percent}%",
+        background=palette.normal[2],
+        **widget_defaults,
+    ),
+    # Every core's load over the last 30 seconds, busiest in white.
+    Widget(
+        CPUHeat,
+        colors=(palette.normal[2], palette.normal[4], palette.fg),
+        background=palette.normal[2],
+    ),
+    Widget(
+        SampledMemory,
+        measure_mem="G",
+        format="Mem {MemUsed: .1f}/{MemTotal: .1f}GB",
+        background=palette.normal[2],
+        **widget_defaults,
+    ),
+    Widget(
+        AsyncNvidiaSensors,
+        format="GPU {perf} {temp}°C",
+        background=palette.normal[2],
+        **widget_defaults,
+    ),
+    Separator(palette.normal[2]),
+    LeftArrow(palette.normal[3], palette.normal[2]),
+    Icon("⌨", palette.fg, palette.normal[3]),
+    Widget(
+        widget.TextBox,
+        text="System",
+        background=palette.normal[3],
+        **widget_defaults,
+    ),
+    Separator(palette.normal[3]),
+    LeftArrow(palette.normal[4], palette.normal[3]),
+    Icon("\u231b", palette.fg, palette.normal[4]),
+    Widget(
+        AlignedClock,
+        format="%m/%d %H:%M",
+        background=palette.normal[4],
+        **widget_defaults,
+    ),
+    Separator(palette.normal[4]),
 ]
 
+# Give every monitor its own copy of the bar. The widgets on each
+# copy share the same CPU, Memory and GPU readings.
+screens = make_screens(
+    bar_spec,
+    count_monitors(),
+    24,
+    background=palette.bg,
+    # border_width=[2, 0, 2, 0],  # Draw top and bottom borders
+    # border_color=["ff00ff", "000000", "ff00ff", "000000"]  # Borders are magenta
+)
+reload_on_hotplug()
+
 # Drag floating layouts.
 mouse = [
     Drag([mod], "Button1", lazy.window.set_position_floating(), start=lazy.window.get_position()),
@@ -353,12 +372,17 @@ mouse = [
     Click([mod], "Button2", lazy.window.bring_to_front()),
 ]
 
+# Move or resize a dragged window at most once per frame, to
+# the latest pointer position, however fast the mouse reports.
+prebind(mouse, drag_interval=1 / 60)
+
 dgroups_key_binder = None
 dgroups_app_rules = []  # type: list
 follow_mouse_focus = True
 bring_front_click = False
 cursor_warp = False
-floating_layout = layout.Floating(
+# Float rules are indexed once, rather than tried one by one for every window.
+floating_layout = CompiledFloating(
     float_rules=[
         # Run the utility of `xprop` to see the wm class and name of an X client.
         *layout.Floating.default_float_rules,
@@ -390,3 +414,5 @@ wl_input_rules = None
 # We choose LG3D to maximize irony: it is a 3D non-reparenting WM written in
 # java that happens to be on java's whitelist.
 wmname = "LG3D"
+
+profiler.mark("config loaded")
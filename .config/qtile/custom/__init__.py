@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers and widgets used by the Qtile config.
+
+Qtile puts the config directory on `sys.path`, so `config.py` can import
+these as `custom.<module>`.
+"""
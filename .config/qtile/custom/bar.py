@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+A bar that coalesces redraws and only repaints widgets that changed.
+
+Qtile's bar redraws every widget whenever any of them asks for a bar redraw.
+`CoalescingBar` waits up to one frame so that several requests turn into one
+redraw, and then skips widgets whose position, size, text and colors are the
+same as the last time they were painted.
+
+Redraw counters can be read from a running Qtile, e.g. under Xvfb:
+
+    qtile cmd-obj -o bar top -f draw_stats
+"""
+
+# IMPORTS
+import time
+
+from libqtile import bar, widget
+from libqtile.widget import base
+
+from custom import profiler
+from custom.widgets import Arrow
+
+# Widgets that only ever draw the same thing for the same colors.
+STATIC_WIDGETS = (widget.Sep, Arrow)
+
+
+class CoalescingBar(bar.Bar):
+    """
+    A `bar.Bar` with per-frame redraw coalescing and dirty-widget tracking.
+    """
+
+    defaults = [
+        ("frame_time", 1 / 60, "Seconds to wait for more redraw requests before redrawing."),
+    ]
+
+    def __init__(self, widgets: list, size: int, **config):
+        bar.Bar.__init__(self, widgets, size, **config)
+        self.add_defaults(CoalescingBar.defaults)
+        self._painted = {}  # Widget -> the draw key it was last painted with.
+        self._draw_pending = False
+        self.cmd_reset_draw_stats()
+
+    def _configure(self, qtile, screen, *args, **kwargs):
+        self._painted.clear()
+        with profiler.span("configure bar on screen {}".format(screen.index), "bar"):
+            bar.Bar._configure(self, qtile, screen, *args, **kwargs)
+
+    def process_window_expose(self):
+        # The window's contents were lost, so everything has to be painted.
+        self._painted.clear()
+        bar.Bar.process_window_expose(self)
+
+    def draw(self):
+        if not self.widgets:
+            return
+        self._stats["requests"] += 1
+        if not self._draw_pending:
+            self._draw_pending = True
+            # Kept in `future`, so that `Bar.finalize()` cancels it.
+            self.future = self.qtile.call_later(self.frame_time, self._actual_draw)
+
+    def _draw_key(self, widget):
+        """
+        Everything that decides what a widget looks like, or None if it has
+        to be redrawn every time.
+        """
+        geometry = (widget.offset, widget.length, widget.background)
+        if isinstance(widget, STATIC_WIDGETS):
+            return geometry + (getattr(widget, "foreground", None),)
+        if isinstance(widget, base._TextBox) and type(widget).draw is base._TextBox.draw:
+            layout = widget.layout
+            return geometry + (widget.text, layout.colour if layout else None)
+        return None
+
+    def _actual_draw(self):
+        self._draw_pending = False
+        self.queued_draws = 0
+        self._resize(self.length, self.widgets)
+        self._stats["frames"] += 1
+        if any(self.border_width) and not self._borders_drawn:
+            self._draw_borders()
+            # That cleared the whole bar, widgets included.
+            self._painted.clear()
+
+        painted = {}
+        for w in self.widgets:
+            key = self._draw_key(w)
+            if key is not None and self._painted.get(w) == key:
+                self._stats["skipped"] += 1
+            else:
+                w.draw()
+                self._stats["widgets"] += 1
+                self._stats["pixels"] += w.length * self.size
+            painted[w] = key
+        self._painted = painted
+
+        end = w.offset + w.length
+        if end < self.length:
+            if self.horizontal:
+                self.drawer.draw(offsetx=end, width=self.length - end)
+            else:
+                self.drawer.draw(offsety=end, height=self.length - end)
+        profiler.mark("first bar paint")
+
+    def _draw_borders(self):
+        # The same as `Bar._actual_draw()`. The border is drawn "outside" of
+        # the bar, around the space the widgets occupy.
+        width = self.width + self.border_width[1] + self.border_width[3]
+        height = self.height + self.border_width[0] + self.border_width[2]
+
+        # The start and end of each border, in the order N, E, S, W.
+        line_opts = [
+            ((0, self.border_width[0] * 0.5), (width, self.border_width[0] * 0.5)),
+            (
+                (width - (self.border_width[1] * 0.5), self.border_width[0]),
+                (width - (self.border_width[1] * 0.5), height - self.border_width[2]),
+            ),
+            (
+                (0, height - self.border_width[2] + (self.border_width[2] * 0.5)),
+                (width, height - self.border_width[2] + (self.border_width[2] * 0.5)),
+            ),
+            (
+                (self.border_width[3] * 0.5, self.border_width[0]),
+                (self.border_width[3] * 0.5, height - self.border_width[2]),
+            ),
+        ]
+
+        self.drawer.clear(self.background)
+        for border_width, colour, (move_to, line_to) in zip(self.border_width, self.border_color, line_opts):
+            if not border_width:
+                continue
+            self.drawer.set_source_rgb(colour)
+            self.drawer.ctx.set_line_width(border_width)
+            self.drawer.ctx.move_to(*move_to)
+            self.drawer.ctx.line_to(*line_to)
+            self.drawer.ctx.stroke()
+        self.drawer.draw(0, 0)
+        self._borders_drawn = True
+
+    def cmd_draw_stats(self):
+        """
+        Redraw counters since they were last reset: redraw requests, frames
+        actually drawn, widgets painted and skipped, pixels repainted, and the
+        per-second rates of frames and pixels.
+        """
+        elapsed = max(time.monotonic() - self._stats_since, 1e-9)
+        stats = dict(self._stats)
+        stats["seconds"] = elapsed
+        stats["frames_per_second"] = stats["frames"] / elapsed
+        stats["pixels_per_second"] = stats["pixels"] / elapsed
+        return stats
+
+    def cmd_reset_draw_stats(self):
+        """
+        Reset the redraw counters.
+        """
+        self._stats = dict.fromkeys(["requests", "frames", "widgets", "skipped", "pixels"], 0)
+        self._stats_since = time.monotonic()
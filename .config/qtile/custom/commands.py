@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Resolve `lazy` commands in key and mouse bindings once, not on every press.
+
+For a binding like `lazy.layout.left()`, Qtile walks the command graph from
+the root on every press: it selects the "layout" node, looks up the current
+group's layout, and then finds `cmd_left` on it by name. `prebind()`
+replaces such commands with a `PreResolved` one that remembers the bound
+method it ended up calling. The method is looked up again only after a hook
+says that what the selectors point to may have changed, e.g. for layouts
+after `layout_change` or `setgroup`.
+
+Mouse drags can also be throttled: with `prebind(mouse, drag_interval=1 / 60)`
+a drag's motion events are coalesced so that its command runs at most once
+per frame, with the latest pointer position. The rest are dropped.
+
+Each `PreResolved` times how much of a press is spent resolving the command
+and how much running it, and counts dropped motion events. The totals can be
+read from a running Qtile:
+
+    qtile cmd-obj -f eval -a "__import__('custom.commands').commands.stats()"
+"""
+
+# IMPORTS
+import functools
+import logging
+import time
+import weakref
+
+from libqtile import hook
+from libqtile.command import lazy
+from libqtile.command.base import SelectError
+from libqtile.config import Drag
+
+from custom.events import Coalescer
+from custom.hooks import subscribe_once
+
+logger = logging.getLogger("libqtile")
+
+# The hooks after which the object a selector points to may be a different
+# one. Commands on the root object (e.g. `lazy.spawn()`) never need to be
+# resolved again.
+INVALIDATED_BY = {
+    "layout": ("layout_change", "setgroup", "current_screen_change"),
+    "group":  ("setgroup", "current_screen_change", "addgroup", "delgroup"),
+    "screen": ("current_screen_change", "screen_change"),
+    "window": ("client_focus", "client_killed", "setgroup", "current_screen_change"),
+}
+
+# Every PreResolved command of the loaded config.
+_commands = weakref.WeakSet()
+
+
+class PreResolved:
+    """
+    A `lazy` call that keeps the bound method it resolves to until one of
+    its hooks fires.
+
+    call     (LazyCall): The `lazy` call to run, e.g. `lazy.layout.left()`.
+    interval (float):    If given, calls are coalesced to at most one per
+                         `interval` seconds, with the latest arguments.
+    """
+
+    __slots__ = (
+        "call",
+        "hooks",
+        "presses",
+        "resolves",
+        "resolve_time",
+        "call_time",
+        "updates",
+        "_target",
+        "__weakref__",
+    )
+
+    def __init__(self, call, interval: float=None):
+        self.call = call
+        self.hooks = {name for selector, _ in call.selectors for name in INVALIDATED_BY.get(selector, ())}
+        self.presses = 0         # Times the command was run.
+        self.resolves = 0        # Times the command graph was walked.
+        self.resolve_time = 0.0  # Seconds spent walking the command graph.
+        self.call_time = 0.0     # Seconds spent in the command itself.
+        self.updates = None if interval is None else Coalescer(self._run, interval)
+        self._target = None
+
+    def __repr__(self):
+        return "PreResolved({})".format(describe(self.call))
+
+    def invalidate(self):
+        """
+        Forget the resolved method, so the next press looks it up again.
+        """
+        self._target = None
+
+    def resolve(self, qtile):
+        """
+        Walk the command graph from `qtile` to the bound method to call.
+        """
+        method = qtile.select(self.call.selectors).command(self.call.name)
+        if method is None:
+            raise SelectError("No command {}".format(self.call.name), self.call.name, self.call.selectors)
+        return method
+
+    def __call__(self, qtile, *args):
+        if self.updates is not None:
+            self.updates.push(qtile, *args)
+        else:
+            self._run(qtile, *args)
+
+    def _run(self, qtile, *args):
+        start = time.perf_counter()
+        target = self._target
+        if target is None:
+            try:
+                target = self.resolve(qtile)
+            except SelectError:
+                # Nothing to act on, e.g. no window is focused.
+                logger.debug("Couldn't resolve %s", describe(self.call))
+                return None
+            self._target = target
+            self.resolves += 1
+        resolved = time.perf_counter()
+        try:
+            return target(*self.call.args, *args, **self.call.kwargs)
+        finally:
+            self.presses += 1
+            self.resolve_time += resolved - start
+            self.call_time += time.perf_counter() - resolved
+
+
+def describe(call):
+    """
+    The `lazy` expression a call was made from, e.g. "layout.left".
+    """
+    path = []
+    for selector, index in call.selectors:
+        path.append(selector if index is None else "{}[{!r}]".format(selector, index))
+    return ".".join(path + [call.name])
+
+
+def _invalidate(name: str, *args):
+    for command in _commands:
+        if name in command.hooks:
+            command.invalidate()
+
+
+# One function per hook, created once so that re-running the config
+# doesn't subscribe the same hook twice.
+_invalidators = {
+    name: functools.partial(_invalidate, name)
+    for hooks in INVALIDATED_BY.values()
+    for name in hooks
+}
+
+
+def _prebindable(call):
+    # lazy.function() already calls straight into Python, and calls
+    # restricted with `.when()` keep going through Qtile so their
+    # conditions are checked.
+    return (
+        hasattr(call, "selectors")
+        and call.name != "function"
+        and not getattr(call, "_layouts", None)
+        and getattr(call, "_focused", None) is None
+        and getattr(call, "_when_floating", True) is True
+    )
+
+
+def prebind(bindings: list, drag_interval: float=None):
+    """
+    Replace the `lazy` commands of Keys, Drags and Clicks with `PreResolved`
+    ones, in place. Returns the bindings.
+
+    A Drag's `start` command is left alone, because Qtile needs its return
+    value and `lazy.function()` doesn't pass one on.
+
+    bindings      (list):  The config's `keys` or `mouse`.
+    drag_interval (float): If given, Drag commands run at most once per
+                           `drag_interval` seconds, e.g. 1 / 60.
+    """
+    for binding in bindings:
+        interval = drag_interval if isinstance(binding, Drag) else None
+        commands = list(binding.commands)
+        for i, call in enumerate(commands):
+            if _prebindable(call):
+                command = PreResolved(call, interval)
+                _commands.add(command)
+                for name in command.hooks:
+                    subscribe_once(name, _invalidators[name])
+                commands[i] = lazy.function(command)
+        binding.commands = tuple(commands)
+    return bindings
+
+
+def check_subscriptions():
+    """
+    Make every live command look its method up again on the next press, and
+    subscribe its hooks again if they were cleared, e.g. by a full reload.
+    Returns the names of the hooks that had to be subscribed again.
+    """
+    missing = set()
+    for command in _commands:
+        command.invalidate()
+        for name in command.hooks:
+            if _invalidators[name] not in hook.subscriptions.get(name, []):
+                missing.add(name)
+                subscribe_once(name, _invalidators[name])
+    return sorted(missing)
+
+
+def stats():
+    """
+    Per command: presses (or applied motion events), command graph walks,
+    the average microseconds per press spent resolving the command and
+    running it, and for throttled drags the motion events dropped.
+    """
+    totals = {}
+    for command in _commands:
+        if command.presses:
+            total = totals.setdefault(describe(command.call), [0, 0, 0.0, 0.0, 0])
+            total[0] += command.presses
+            total[1] += command.resolves
+            total[2] += command.resolve_time
+            total[3] += command.call_time
+            total[4] += command.updates.dropped if command.updates else 0
+    return {
+        name: {
+            "presses": presses,
+            "resolves": resolves,
+            "resolve_us": resolve_time / presses * 1e6,
+            "call_us": call_time / presses * 1e6,
+            "dropped": dropped,
+        }
+        for name, (presses, resolves, resolve_time, call_time, dropped) in sorted(totals.items())
+    }
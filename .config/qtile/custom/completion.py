@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*-
+"""
+An index of the executables on $PATH, for completing commands in the prompt.
+
+Qtile's command completer globs every $PATH directory again each time a
+completion starts. `PathIndex` scans them once and keeps the result in a
+cache file, one sorted "name<TAB>directory" line per executable, after a
+header with the modification time of every directory:
+
+    - A cold start maps the cache file into memory and only stats the $PATH
+      directories. Only directories whose mtime changed are scanned again.
+    - Prefix lookups are a binary search straight over the mapped file.
+    - If no name starts with what was typed, names containing its characters
+      in order are found with one regex pass over the file.
+    - Matches are ranked by how often they were launched before, then by
+      length.
+    - With inotify (Linux, through ctypes), a directory that changes while
+      Qtile runs is scanned again in the background, so the next completion
+      doesn't have to. That includes a file in it being made executable,
+      which doesn't change the directory's mtime.
+"""
+
+# IMPORTS
+import ctypes
+import ctypes.util
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+
+logger = logging.getLogger("libqtile")
+
+CACHE_DIR = "~/.cache/qtile"
+DEFAULT_PATH = "/bin:/usr/bin:/usr/local/bin"
+MAGIC = b"qtile-path-index 1\n"
+
+# inotify events that change which executables a directory has.
+IN_ATTRIB = 0x4
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT = struct.Struct("iIII")
+
+
+def scan(directory: str):
+    """
+    The names of the executable files in `directory`.
+    """
+    names = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if "\t" in entry.name or "\n" in entry.name:
+                    continue  # Can't be stored in the index.
+                try:
+                    if entry.is_file() and os.access(entry.path, os.X_OK):
+                        names.append(entry.name)
+                except OSError:
+                    pass
+    except OSError:
+        pass
+    return names
+
+
+def _mtime(directory: str):
+    try:
+        return os.stat(directory).st_mtime_ns
+    except OSError:
+        return 0
+
+
+class PathIndex:
+    """
+    A cached, incrementally updated index of the executables on a PATH.
+
+    path      (str): The PATH to index. Defaults to $PATH.
+    cache_dir (str): Where to keep the index and the launch history.
+    """
+
+    def __init__(self, path: str=None, cache_dir: str=CACHE_DIR):
+        self.path = path
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.scans = 0  # Directories scanned since creation.
+        self._data = b""
+        self._entries = len(MAGIC)  # Offset of the first entry in `_data`.
+        self._mtimes = {}
+        self._history = None
+        self._inotify = None
+        self._watches = {}
+        self._watchers = 0  # Callers of `watch()` that haven't called `stop()` yet.
+        self._loop = None
+        # The first refresh runs in a thread (see `IndexedPrompt`).
+        self._lock = threading.RLock()
+
+    @property
+    def cache_file(self):
+        return os.path.join(self.cache_dir, "path-index")
+
+    @property
+    def history_file(self):
+        return os.path.join(self.cache_dir, "launch-history.json")
+
+    def directories(self):
+        """
+        The directories of the PATH, in order, without duplicates.
+        """
+        path = self.path if self.path is not None else os.environ.get("PATH", DEFAULT_PATH)
+        directories = []
+        for directory in path.split(":"):
+            directory = os.path.expanduser(directory)
+            if directory and directory not in directories:
+                directories.append(directory)
+        return directories
+
+    # Loading and saving.
+
+    def _load(self):
+        try:
+            with open(self.cache_file, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):  # Missing, unreadable or empty.
+            return False
+        if data[:len(MAGIC)] != MAGIC:
+            return False
+        end = data.find(b"\n\n", len(MAGIC) - 1)
+        if end < 0:
+            return False
+        mtimes = {}
+        for line in data[len(MAGIC):end].split(b"\n"):
+            if not line:
+                continue
+            directory, _, mtime = line.decode(errors="surrogateescape").rpartition("\t")
+            mtimes[directory] = int(mtime)
+        self._data = data
+        self._entries = end + 2
+        self._mtimes = mtimes
+        return True
+
+    def _entries_by_directory(self):
+        entries = {}
+        for line in self._data[self._entries:].splitlines():
+            name, _, directory = line.partition(b"\t")
+            entries.setdefault(directory, []).append(name)
+        return entries
+
+    def _save(self, directories: list, entries: dict, mtimes: dict):
+        # The first directory on the PATH wins, like the shell.
+        names = {}
+        for directory in reversed(directories):
+            for name in entries.get(directory.encode(errors="surrogateescape"), ()):
+                names[name] = directory.encode(errors="surrogateescape")
+        header = MAGIC + b"".join(
+            "{}\t{}\n".format(directory, mtimes[directory]).encode(errors="surrogateescape")
+            for directory in directories
+        )
+        body = b"".join(name + b"\t" + names[name] + b"\n" for name in sorted(names))
+        data = header + b"\n" + body
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, temporary = tempfile.mkstemp(prefix=".path-index-", dir=self.cache_dir)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temporary, self.cache_file)
+        except OSError:
+            logger.exception("Couldn't write %s", self.cache_file)
+        if not self._load():
+            # Keep the index in memory if it can't be cached.
+            self._data = data
+            self._entries = len(header) + 1
+            self._mtimes = dict(mtimes)
+
+    def refresh(self, changed: set=frozenset()):
+        """
+        Bring the index up to date, scanning only the directories that
+        changed since it was built.
+
+        changed (set): Directories to scan again even if their mtime is the
+                       same, e.g. because a file in them was made executable,
+                       which doesn't change the directory's mtime.
+        """
+        with self._lock:
+            self._refresh(changed)
+
+    def _refresh(self, changed: set):
+        if not self._data and not self._load():
+            self._mtimes = {}
+        directories = self.directories()
+        mtimes = {directory: _mtime(directory) for directory in directories}
+        changed = changed.intersection(directories)
+        if mtimes == self._mtimes and list(self._mtimes) == directories and not changed:
+            return
+        entries = self._entries_by_directory()
+        for directory in directories:
+            if mtimes[directory] != self._mtimes.get(directory) or directory in changed:
+                entries[directory.encode(errors="surrogateescape")] = [
+                    name.encode(errors="surrogateescape") for name in scan(directory)
+                ]
+                self.scans += 1
+        self._save(directories, entries, mtimes)
+
+    # Searching.
+
+    def _line(self, position: int):
+        start = self._data.rfind(b"\n", self._entries, position) + 1 or self._entries
+        end = self._data.find(b"\n", start)
+        return start, len(self._data) if end < 0 else end
+
+    def _lower_bound(self, key: bytes):
+        low, high = self._entries, len(self._data)
+        while low < high:
+            start, end = self._line(low + (high - low) // 2)
+            if self._data[start:self._data.find(b"\t", start, end)] < key:
+                low = end + 1
+            else:
+                high = start
+        return low
+
+    def prefix(self, prefix: str):
+        """
+        (name, path) of every executable starting with `prefix`, by name.
+        """
+        key = prefix.encode(errors="surrogateescape")
+        position = self._lower_bound(key)
+        matches = []
+        while position < len(self._data):
+            start, end = self._line(position)
+            name, _, directory = self._data[start:end].partition(b"\t")
+            if not name.startswith(key):
+                break
+            name = name.decode(errors="surrogateescape")
+            matches.append((name, os.path.join(directory.decode(errors="surrogateescape"), name)))
+            position = end + 1
+        return matches
+
+    def fuzzy(self, text: str, limit: int=50):
+        """
+        (name, path) of up to `limit` executables containing the characters
+        of `text` in order.
+        """
+        if not text:
+            return []
+        field = rb"[^\t\n]*"
+        pattern = re.compile(
+            rb"^(" + field + field.join(re.escape(c.encode(errors="surrogateescape")) for c in text)
+            + field + rb")\t([^\n]*)$",
+            re.MULTILINE,
+        )
+        matches = []
+        for match in pattern.finditer(self._data, self._entries):
+            name, directory = (g.decode(errors="surrogateescape") for g in match.groups())
+            matches.append((name, os.path.join(directory, name)))
+            if len(matches) >= limit:
+                break
+        return matches
+
+    def complete(self, text: str):
+        """
+        Completions for `text`, best first: prefix matches, or fuzzy matches
+        if there are none, ranked by launch count and then length.
+        """
+        with self._lock:
+            self.refresh()
+            matches = self.prefix(text) or self.fuzzy(text)
+        history = self.history()
+        matches.sort(key=lambda match: (-history.get(match[0], 0), len(match[0]), match[0]))
+        return matches
+
+    # Launch history.
+
+    def history(self):
+        """
+        How many times each command was launched from the prompt.
+        """
+        if self._history is None:
+            try:
+                with open(self.history_file) as f:
+                    self._history = json.load(f)
+            except (OSError, ValueError):
+                self._history = {}
+        return self._history
+
+    def record(self, command: str):
+        """
+        Count a launch of `command`'s executable, for ranking.
+        """
+        name = os.path.basename(command.split(maxsplit=1)[0]) if command.strip() else ""
+        if not name:
+            return
+        history = self.history()
+        history[name] = history.get(name, 0) + 1
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self.history_file, "w") as f:
+                json.dump(history, f)
+        except OSError:
+            logger.exception("Couldn't write %s", self.history_file)
+
+    # Watching the PATH.
+
+    def watch(self, loop):
+        """
+        Rescan PATH directories when inotify says they changed, on `loop`.
+        Does nothing if inotify isn't available. Every call must be matched
+        by one to `stop()`.
+
+        loop (asyncio.AbstractEventLoop): The loop to watch on.
+        """
+        self._watchers += 1
+        if self._inotify is not None:
+            return
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return
+        if fd < 0:
+            return
+        self._inotify = fd
+        self._loop = loop
+        for directory in self.directories():
+            wd = libc.inotify_add_watch(fd, directory.encode(errors="surrogateescape"), WATCH_MASK)
+            if wd >= 0:
+                self._watches[wd] = directory
+        loop.add_reader(fd, self._read_events)
+
+    def stop(self):
+        """
+        Stop watching and close the inotify descriptor, once every caller of
+        `watch()` has called this.
+        """
+        self._watchers = max(self._watchers - 1, 0)
+        if self._watchers or self._inotify is None:
+            return
+        self._loop.remove_reader(self._inotify)
+        os.close(self._inotify)
+        self._inotify = None
+        self._loop = None
+        self._watches.clear()
+
+    def _read_events(self):
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._inotify, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = EVENT.unpack_from(data, offset)
+                offset += EVENT.size + length
+                if wd in self._watches:
+                    changed.add(self._watches[wd])
+        if changed:
+            self.refresh(changed)
+
+
+shared = PathIndex()
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Per-core CPU load history, for a heat strip in the bar.
+
+`widget.CPU` shows one number for the whole machine, which hides a build step
+saturating a single core. `CoreHistory` reads the per-core lines of
+/proc/stat on each tick and keeps every core's load over the last `samples`
+ticks in a preallocated ring buffer. `render()` turns the history into ARGB
+pixels: time runs from left to right, and each row of pixels is a group of
+cores showing the busiest of them, so one saturated core still stands out
+on a 128-core machine.
+
+    - `NumpyCoreHistory` keeps the history in a cores × samples array and
+      does the parsing, the deltas and the rendering as a handful of array
+      operations, whatever the number of cores. It needs the optional
+      `numpy` package.
+    - `CoreHistory` does the same in plain Python, and is used when `numpy`
+      isn't installed.
+"""
+
+# IMPORTS
+import os
+from array import array
+
+from custom.palette import rgb
+from custom.sampler import cpu_percent
+
+
+def heat_colors(colors: list):
+    """
+    256 ARGB pixel values going through `colors` evenly, from a load of 0
+    to a load of 1.
+
+    colors (list): Hexadecimal color codes, coldest first.
+    """
+    stops = [rgb(color)[:3] for color in colors]
+    if len(stops) == 1:
+        stops *= 2
+    pixels = []
+    for level in range(256):
+        position = level / 255 * (len(stops) - 1)
+        i = min(int(position), len(stops) - 2)
+        fraction = position - i
+        r, g, b = (
+            round(255 * (low + (high - low) * fraction)) for low, high in zip(stops[i], stops[i + 1])
+        )
+        pixels.append(0xff000000 | r << 16 | g << 8 | b)
+    return pixels
+
+
+class CoreHistory:
+    """
+    The load of every core over the last `samples` updates.
+
+    samples (int): Number of updates to keep.
+    root    (str): Where procfs is mounted. Point this at a fake directory for
+                   benchmarks.
+    """
+
+    def __init__(self, samples: int=30, root: str="/proc"):
+        self.samples = samples
+        self.path = os.path.join(root, "stat")
+        self.cores = 0
+        self._fd = None
+        self._size = 65536
+        self._previous = None
+        self._history = None
+        self._next = 0  # Column of the next sample; the oldest one.
+
+    def _read(self):
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDONLY | os.O_CLOEXEC)
+        while True:
+            data = os.pread(self._fd, self._size, 0)
+            if len(data) < self._size:
+                return data
+            self._size *= 2
+
+    def _core_lines(self, data: bytes):
+        # The "cpuN" lines, after the "cpu" line for the whole machine.
+        start = data.find(b"\n") + 1
+        return data[start:data.find(b"\n", data.rfind(b"\ncpu") + 1)]
+
+    def _counters(self, data: bytes):
+        return [tuple(map(int, line.split()[1:])) for line in self._core_lines(data).split(b"\n")]
+
+    def _reset(self, counters):
+        self.cores = len(counters)
+        self._history = [array("f", bytes(4 * self.samples)) for _ in range(self.cores)]
+        self._next = 0
+
+    def _push(self, counters):
+        for history, now, before in zip(self._history, counters, self._previous):
+            history[self._next] = cpu_percent(before, now) / 100
+
+    def update(self):
+        """
+        Read /proc/stat and add every core's load since the last update.
+        Returns False if there was nothing to compare with yet, e.g. on the
+        first update or after a core went on- or offline.
+        """
+        counters = self._counters(self._read())
+        compared = self._previous is not None and len(counters) == self.cores
+        if compared:
+            self._push(counters)
+            self._next = (self._next + 1) % self.samples
+        else:
+            self._reset(counters)
+        self._previous = counters
+        return compared
+
+    def pixels(self, height: int, sample_width: int):
+        """
+        A buffer for `render()`, to wrap in a cairo ImageSurface.
+        """
+        return array("I", bytes(4 * height * self.samples * sample_width))
+
+    def lut(self, colors: list):
+        """
+        The colors for `render()`, from `heat_colors()`.
+        """
+        return heat_colors(colors)
+
+    def _groups(self, height: int):
+        groups = min(self.cores, height)
+        return [(g * self.cores // groups, (g + 1) * self.cores // groups) for g in range(groups)]
+
+    def render(self, pixels, height: int, sample_width: int, lut):
+        """
+        Draw the history into `pixels`, `sample_width` pixels per sample,
+        oldest first.
+        """
+        order = [(self._next + s) % self.samples for s in range(self.samples)]
+        strip = []
+        for first, last in self._groups(height):
+            row = array("I")
+            for i in order:
+                row.extend([lut[int(255 * max(self._history[c][i] for c in range(first, last)))]] * sample_width)
+            strip.append(row)
+        width = len(strip[0])
+        for y in range(height):
+            pixels[y * width:(y + 1) * width] = strip[y * len(strip) // height]
+
+
+class NumpyCoreHistory(CoreHistory):
+    """
+    A `CoreHistory` that keeps its history in a NumPy array.
+    """
+
+    def __init__(self, samples: int=30, root: str="/proc"):
+        import numpy
+        self._numpy = numpy
+        self._layouts = (None,)
+        CoreHistory.__init__(self, samples, root)
+
+    def _counters(self, data: bytes):
+        # Without the letters of "cpuN", each line starts with its core's
+        # number, which is dropped after parsing.
+        lines = self._core_lines(data)
+        numbers = self._numpy.fromstring(lines.translate(None, b"cpu"), dtype=self._numpy.int64, sep=" ")
+        return numbers.reshape(lines.count(b"\n") + 1, -1)[:, 1:]
+
+    def _reset(self, counters):
+        self.cores = len(counters)
+        self._history = self._numpy.zeros((self.cores, self.samples), dtype=self._numpy.float32)
+        self._next = 0
+
+    def _push(self, counters):
+        numpy = self._numpy
+        delta = counters - self._previous
+        total = delta.sum(axis=1)
+        busy = total - delta[:, 3] - delta[:, 4]
+        loads = numpy.divide(busy, total, out=numpy.zeros(self.cores), where=total > 0)
+        self._history[:, self._next] = numpy.clip(loads, 0, 1)
+
+    def pixels(self, height: int, sample_width: int):
+        return self._numpy.zeros((height, self.samples * sample_width), dtype=self._numpy.uint32)
+
+    def lut(self, colors: list):
+        return self._numpy.array(heat_colors(colors), dtype=self._numpy.uint32)
+
+    def _layout(self, height: int, sample_width: int):
+        # Which cores go in which group, and which group and sample each
+        # pixel shows. Only changes with the number of cores.
+        key = (self.cores, height, sample_width)
+        if self._layouts[0] != key:
+            numpy = self._numpy
+            groups = min(self.cores, height)
+            starts = numpy.arange(groups) * self.cores // groups
+            rows = (numpy.arange(height) * groups // height)[:, None]
+            columns = numpy.arange(self.samples * sample_width) // sample_width
+            self._layouts = (key, starts, rows, columns)
+        return self._layouts[1:]
+
+    def render(self, pixels, height: int, sample_width: int, lut):
+        starts, rows, columns = self._layout(height, sample_width)
+        # Oldest sample first.
+        columns = (columns + self._next) % self.samples
+        strip = self._numpy.maximum.reduceat(self._history, starts, axis=0)
+        levels = (strip * 255).astype(self._numpy.uint8)
+        lut.take(levels[rows, columns], out=pixels)
+
+
+def default_history(samples: int=30, root: str="/proc"):
+    """
+    A `NumpyCoreHistory` if `numpy` is installed, otherwise a `CoreHistory`.
+    """
+    try:
+        return NumpyCoreHistory(samples, root)
+    except ImportError:
+        return CoreHistory(samples, root)
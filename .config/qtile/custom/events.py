@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Coalesce bursts of events into at most one update per interval.
+
+A `Coalescer` remembers the arguments of the latest event it was given and
+passes only those on, at most once every `interval` seconds. Events in
+between are dropped. It is used to stop a stream of focus changes, or mouse
+motion during a drag, from doing the same expensive work for every event.
+"""
+
+# IMPORTS
+import asyncio
+import time
+
+
+class Coalescer:
+    """
+    Call `callback` with the latest pushed arguments, at most once per
+    `interval` seconds.
+
+    callback   (callable): The function doing the actual work.
+    interval   (float):    The minimum number of seconds between calls, e.g.
+                           1 / 60 for at most once per frame.
+    call_later (callable): Scheduler with the signature of
+                           `loop.call_later()`. Defaults to the running
+                           asyncio event loop's.
+    """
+
+    def __init__(self, callback, interval: float, call_later=None):
+        self.callback = callback
+        self.interval = interval
+        self.pushed = 0   # Events received.
+        self.applied = 0  # Calls made to `callback`.
+        self._call_later = call_later
+        self._args = ()
+        self._handle = None
+        self._last = float("-inf")
+
+    @property
+    def dropped(self):
+        """
+        Events that were replaced by a later one before being applied.
+        """
+        return self.pushed - self.applied - (self._handle is not None)
+
+    def push(self, *args):
+        """
+        Queue a call with these arguments, replacing any queued call.
+        """
+        self.pushed += 1
+        self._args = args
+        if self._handle is None:
+            call_later = self._call_later or asyncio.get_event_loop().call_later
+            delay = max(self._last + self.interval - time.monotonic(), 0)
+            self._handle = call_later(delay, self.flush)
+
+    def flush(self):
+        """
+        Make the queued call now, if there is one.
+        """
+        if self._handle is None:
+            return
+        self._handle.cancel()
+        self._handle = None
+        self._last = time.monotonic()
+        self.applied += 1
+        args, self._args = self._args, ()
+        self.callback(*args)
+
+    def cancel(self):
+        """
+        Drop the queued call, if there is one.
+        """
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
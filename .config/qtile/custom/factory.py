@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Declarative bar definitions.
+
+A bar is written as a list of lightweight, hashable segment records and turned
+into widgets by `build_bar()`, in place of the `separator()`, `icon()` and
+arrow helper functions. Every segment gets its own widget and settings:
+Qtile keeps per-widget state, and working the settings out takes next to no
+time next to creating the widget, so there is nothing worth sharing.
+
+    build_bar([
+        Separator("151515"),
+        Icon("⌘", "fafafa", "151515"),
+        RightArrow("151515", "0841a9"),
+        Widget(widget.Clock, format="%H:%M", background="0841a9"),
+    ])
+"""
+
+# IMPORTS
+from collections import namedtuple
+
+from libqtile import widget
+
+from custom import profiler
+from custom.lazy import present
+from custom.widgets import Arrow
+
+# A gap between widgets.
+Separator = namedtuple("Separator", ["background"])
+
+# A glyph shown in the bar.
+Icon = namedtuple("Icon", ["text", "foreground", "background"])
+
+# Powerline-style arrows (◀ and ▶).
+LeftArrow = namedtuple("LeftArrow", ["foreground", "background"])
+RightArrow = namedtuple("RightArrow", ["foreground", "background"])
+
+
+class Widget(namedtuple("Widget", ["cls", "config"])):
+    """
+    Any other widget: the widget class and the settings to create it with.
+
+    Widget(widget.Clock, format="%H:%M", background="0841a9")
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, widget_cls, **config):
+        return super().__new__(cls, widget_cls, tuple(sorted(config.items())))
+
+
+def segment_config(segment: tuple):
+    """
+    The widget class and settings for a segment.
+
+    segment (tuple): One of the segment records above.
+    """
+    kind = type(segment)
+    if kind is Separator:
+        return widget.Sep, {
+            "linewidth": 0,
+            "padding": 10,
+            "background": segment.background,
+        }
+    if kind is Icon:
+        return widget.TextBox, {
+            "font": "Ubuntu Mono",
+            "text": segment.text,
+            "foreground": segment.foreground,
+            "background": segment.background,
+            "padding": 3,
+            "fontsize": 16,
+        }
+    if kind in (LeftArrow, RightArrow):
+        return Arrow, {
+            "direction": "left" if kind is LeftArrow else "right",
+            "foreground": segment.foreground,
+            "background": segment.background,
+        }
+    if kind is Widget:
+        return segment.cls, dict(segment.config)
+    raise TypeError("Not a bar segment: {!r}".format(segment))
+
+
+def build_bar(spec: list):
+    """
+    Create the widgets for a bar from a list of segments. Widgets disabled
+    through `custom.lazy` are left out.
+
+    spec (list): Segment records, in the order they appear in the bar.
+    """
+    widgets = []
+    for index, segment in enumerate(spec):
+        cls, config = segment_config(segment)
+        name = "[{}] {} {}".format(index, type(segment).__name__, getattr(cls, "__name__", cls))
+        with profiler.span(name, "widget"):
+            widgets.append(cls(**config))
+    return present(widgets)
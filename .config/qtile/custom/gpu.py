@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Read GPU sensors from one long-lived `nvidia-smi` process.
+
+`widget.NvidiaSensors` starts a new `nvidia-smi` for every poll, and a slow
+start shows up as bar lag. `NvidiaSmiReader` instead keeps a single
+`nvidia-smi --loop-ms` process running, reads its output on the asyncio event
+loop and remembers the last reading. If the process dies or stops producing
+output it is killed and restarted after an exponentially growing delay.
+"""
+
+# IMPORTS
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger("libqtile")
+
+# The fields asked for, in the order nvidia-smi prints them.
+QUERY_FIELDS = ("temp", "fan_speed", "perf")
+QUERY = "temperature.gpu,fan.speed,pstate"
+
+
+class NvidiaSmiReader:
+    """
+    Keep the latest reading from a looping `nvidia-smi` query.
+
+    executable  (str):   The nvidia-smi binary. Point this at a fake script to
+                         test without a GPU.
+    interval    (float): Seconds between readings.
+    gpu_bus_id  (str):   Bus ID of the GPU to read. Empty for the first GPU.
+    max_backoff (float): Longest delay, in seconds, before restarting a dead or
+                         stalled process.
+    """
+
+    def __init__(self, executable: str="nvidia-smi", interval: float=2.0,
+                 gpu_bus_id: str="", max_backoff: float=60.0):
+        self.executable = executable
+        self.interval = interval
+        self.gpu_bus_id = gpu_bus_id
+        self.max_backoff = max_backoff
+        self.latest = None  # Dict of QUERY_FIELDS, or None before the first reading.
+        self.updated = 0.0  # `time.monotonic()` of the latest reading.
+        self.restarts = 0
+        self.users = 0  # Callers of `start()` that haven't called `stop()` yet.
+        self._backoff = interval
+        self._task = None
+        self._warned = False  # Whether the failure to run nvidia-smi was logged.
+
+    def command(self):
+        """
+        The argv of the looping nvidia-smi query.
+        """
+        command = [
+            self.executable,
+            "--query-gpu=" + QUERY,
+            "--format=csv,noheader,nounits",
+            "--loop-ms=%d" % (self.interval * 1000),
+        ]
+        if self.gpu_bus_id:
+            command.append("--id=" + self.gpu_bus_id)
+        return command
+
+    @property
+    def stale(self):
+        """
+        Whether the latest reading is too old to show.
+        """
+        return self.latest is None or time.monotonic() - self.updated > 3 * self.interval
+
+    def start(self):
+        """
+        Start reading in the background, if it isn't already. Must be called
+        from the event loop. Every call must be matched by one to `stop()`.
+        """
+        self.users += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_event_loop().create_task(self._run())
+
+    def stop(self):
+        """
+        Stop reading and kill the nvidia-smi process, once every caller of
+        `start()` has called this.
+        """
+        self.users = max(self.users - 1, 0)
+        if not self.users and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self._read_process()
+            except OSError as e:
+                # E.g. no nvidia-smi at all: say so once, then keep trying
+                # quietly.
+                if not self._warned:
+                    logger.warning("Couldn't run %s: %s", self.executable, e)
+                    self._warned = True
+
+            # The process exited or stalled. Wait before starting another one,
+            # backing off further each time it goes wrong in a row.
+            await asyncio.sleep(self._backoff)
+            self._backoff = min(self._backoff * 2, self.max_backoff)
+            self.restarts += 1
+
+    async def _read_process(self):
+        process = await asyncio.create_subprocess_exec(
+            *self.command(),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            while True:
+                line = await asyncio.wait_for(process.stdout.readline(), 3 * self.interval)
+                if not line:
+                    return
+                self._parse(line)
+        except asyncio.TimeoutError:
+            logger.warning("%s stopped producing output, restarting it", self.executable)
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+
+    def _parse(self, line: bytes):
+        values = [value.strip() for value in line.decode(errors="replace").split(",")]
+        if len(values) != len(QUERY_FIELDS):
+            return
+        self.latest = dict(zip(QUERY_FIELDS, values))
+        self.updated = time.monotonic()
+        self._backoff = self.interval
+        self._warned = False
+
+
+# Readers are shared between widgets with the same settings, so that more
+# than one bar doesn't mean more than one nvidia-smi.
+_readers = {}
+
+
+def get_reader(executable: str="nvidia-smi", interval: float=2.0, gpu_bus_id: str=""):
+    """
+    Return the shared reader for these settings, creating it if needed.
+    """
+    key = (executable, interval, gpu_bus_id)
+    if key not in _readers:
+        _readers[key] = NvidiaSmiReader(executable, interval, gpu_bus_id)
+    return _readers[key]
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Switch groups and measure how long it takes.
+
+`switch_group()` does what `lazy.group[name].toscreen()` does, and records
+the time it took against the number of windows in the group. Latencies are
+kept per size bucket:
+
+    qtile cmd-obj -f eval -a "__import__('custom.groups').groups.stats()"
+
+By default that is the time Qtile spent on the switch. To also count the
+time the X server takes to handle the requests it sent, set `SYNC`, which
+waits for a round trip to the server after each switch. That blocks Qtile
+until the reply is in, so only turn it on while measuring:
+
+    qtile cmd-obj -f eval -a "setattr(__import__('custom.groups').groups, 'SYNC', True)"
+"""
+
+# IMPORTS
+import bisect
+import time
+
+# Upper bounds of the window count buckets latencies are kept in.
+BUCKETS = (5, 25, 100)
+
+# Bucket -> seconds taken by each recent switch.
+_latencies = {}
+
+MAX_SAMPLES = 200
+
+# Whether to wait for the X server after each switch. See above.
+SYNC = False
+
+
+def _sync(qtile):
+    # A round trip: once the reply is in, the server has handled everything
+    # sent before it.
+    try:
+        qtile.core.conn.conn.core.GetInputFocus().reply()
+    except AttributeError:  # Not running on X11.
+        pass
+
+
+def bucket(count: int):
+    """
+    The size bucket for a group of `count` windows, e.g. "<=25".
+    """
+    i = bisect.bisect_left(BUCKETS, count)
+    return "<={}".format(BUCKETS[i]) if i < len(BUCKETS) else ">{}".format(BUCKETS[-1])
+
+
+def switch_group(qtile, name: str):
+    """
+    Show group `name` on the current screen and record how long it took.
+    Bind with `lazy.function(switch_group, name)`.
+    """
+    start = time.perf_counter()
+    group = qtile.groups_map[name]
+    group.cmd_toscreen()
+    if SYNC:
+        _sync(qtile)
+    samples = _latencies.setdefault(bucket(len(group.windows)), [])
+    samples.append(time.perf_counter() - start)
+    del samples[:-MAX_SAMPLES]
+
+
+def stats():
+    """
+    Per window count bucket: switches recorded, and the p50, p95 and worst
+    latency in milliseconds.
+    """
+    result = {}
+    for name, samples in sorted(_latencies.items()):
+        samples = sorted(samples)
+        result[name] = {
+            "switches": len(samples),
+            "p50_ms": samples[len(samples) // 2] * 1000,
+            "p95_ms": samples[int(len(samples) * 0.95)] * 1000,
+            "max_ms": samples[-1] * 1000,
+        }
+    return result
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""
+Hook helpers that are safe to call from a config that may be run more than
+once, e.g. by `custom.reload`.
+"""
+
+# IMPORTS
+from libqtile import hook
+
+
+def subscribe_once(name: str, function):
+    """
+    Subscribe `function` to the hook `name`, unless it already is.
+
+    name     (str):      The hook's name, e.g. "screens_reconfigured".
+    function (callable): The function to call when the hook fires.
+    """
+    if function not in hook.subscriptions.get(name, []):
+        getattr(hook.subscribe, name)(function)
+    return function
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Find keybindings that resolve to the same chord.
+
+`find_conflicts()` is run once when the config loads. It resolves every
+binding to the same (modifier mask, keysym) pair Qtile grabs, so two bindings
+that spell the same chord differently (e.g. ["shift", "mod4"] and ["mod4",
+"shift"]) are caught, and logs any conflicts. Qtile would otherwise silently
+keep only the last one.
+"""
+
+# IMPORTS
+import logging
+
+logger = logging.getLogger("libqtile")
+
+# X11 modifier masks, as used by Qtile.
+MODIFIER_MASKS = {
+    "shift": 1 << 0,
+    "lock": 1 << 1,
+    "control": 1 << 2,
+    "mod1": 1 << 3,
+    "mod2": 1 << 4,
+    "mod3": 1 << 5,
+    "mod4": 1 << 6,
+    "mod5": 1 << 7,
+}
+
+try:
+    from libqtile.backend.x11.xkeysyms import keysyms
+except ImportError:  # Not running under X11, or Qtile isn't installed.
+    keysyms = {}
+
+
+def modifier_mask(modifiers: list):
+    """
+    The X11 modifier mask for a list of modifier names.
+
+    modifiers (list): Names such as "mod4" or "shift".
+    """
+    mask = 0
+    for name in modifiers:
+        try:
+            mask |= MODIFIER_MASKS[name.lower()]
+        except KeyError:
+            raise ValueError("Unknown modifier: {!r}".format(name)) from None
+    return mask
+
+
+def keysym(name: str):
+    """
+    The X keysym for a key name, or the name itself if it isn't known. Like
+    Qtile, names are case-sensitive: "a" and "A" are different keys.
+
+    name (str): A key name such as "Return" or "h".
+    """
+    return keysyms.get(name, name)
+
+
+def find_conflicts(keys: list):
+    """
+    The bindings that resolve to the same chord as an earlier one, as
+    (earlier, later) Key pairs, logging a warning for each. Like Qtile, the
+    last binding for a chord wins.
+
+    keys (list): The config's Key objects.
+    """
+    chords = {}
+    conflicts = []
+    for key in keys:
+        code = (modifier_mask(key.modifiers), keysym(key.key))
+        if code in chords:
+            conflicts.append((chords[code], key))
+            logger.warning(
+                "Keybinding %s conflicts with an earlier binding: %s",
+                "+".join([*key.modifiers, key.key]),
+                getattr(chords[code], "desc", "") or "no description",
+            )
+        chords[code] = key
+    return conflicts
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Layouts that do less work per window.
+
+Every relayout of `layout.MonadTall` places every window again: a configure
+request, a border change and a synthetic ConfigureNotify each, even for the
+windows that stay exactly where they were. With 30+ windows, one shuffle or
+focus change sends around a hundred requests to move two windows.
+
+`CachedMonadTall` remembers everything that decides where a window goes and
+what its border looks like, and skips windows for which none of it changed
+and that are still where they were placed. The cache is kept while the group
+is hidden, so switching back to a group only maps its windows again. The requests that are left are flushed together by Qtile at
+the end of the event, as usual.
+
+Counters can be read from a running Qtile:
+
+    qtile cmd-obj -o layout -f relayout_stats
+
+`CompiledFloating` checks new windows against its float rules through an
+index built once, instead of trying every `Match` in turn.
+"""
+
+# IMPORTS
+import re
+
+from libqtile import layout
+
+# Match properties that usually don't change once a window is mapped, and
+# how to read them from a window.
+STATIC_PROPERTIES = {
+    "wm_class":          lambda win: win.get_wm_class(),
+    "wm_instance_class": lambda win: (win.get_wm_class() or [None])[:1],
+    "wm_type":           lambda win: win.get_wm_type(),
+    "role":              lambda win: win.get_wm_role(),
+}
+
+
+class PlacementCache:
+    """
+    Mixed into a layout to skip re-placing windows that wouldn't move.
+
+    Subclasses define `_place_key()`. A window whose key is the same as when
+    it was last placed, and which is still where it was placed, is left
+    alone, or, if its group was hidden in the meantime, only mapped again: X
+    keeps the geometry of unmapped windows, so there is nothing else to redo.
+    A window that was moved or resized since, e.g. by another layout of its
+    group, is placed again. The focused window is always handled first, so
+    it is the first to be shown.
+
+    Layouts keep the name of the layout they extend (`layout_name`), so
+    groups, keys and widgets can keep calling them e.g. "monadtall".
+    """
+
+    layout_name = None
+
+    def __init__(self, **config):
+        config.setdefault("name", self.layout_name)
+        super().__init__(**config)
+        self._placed = {}  # Window -> (placement key, geometry) it was last placed with.
+        self.cmd_reset_relayout_stats()
+
+    def clone(self, group):
+        c = super().clone(group)
+        c._placed = {}
+        c.cmd_reset_relayout_stats()
+        return c
+
+    def _place_key(self, client, screen_rect):
+        """
+        Everything that decides `client`'s geometry and border.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _geometry(client):
+        return (
+            getattr(client, "x", None),
+            getattr(client, "y", None),
+            getattr(client, "width", None),
+            getattr(client, "height", None),
+            getattr(client, "borderwidth", None),
+            getattr(client, "bordercolor", None),
+        )
+
+    def layout(self, windows, screen_rect):
+        current = self.clients.current_client
+        super().layout(sorted(windows, key=lambda w: w is not current), screen_rect)
+
+    def configure(self, client, screen_rect):
+        if client not in self.clients:
+            self._placed.pop(client, None)
+            super().configure(client, screen_rect)
+            return
+        key = self._place_key(client, screen_rect)
+        if self._placed.get(client) == (key, self._geometry(client)):
+            if getattr(client, "hidden", True):
+                client.unhide()
+                self._stats["unhidden"] += 1
+            else:
+                self._stats["skipped"] += 1
+            return
+        super().configure(client, screen_rect)
+        self._stats["placed"] += 1
+        self._placed[client] = (key, self._geometry(client))
+
+    def add(self, client):
+        self._placed.pop(client, None)
+        return super().add(client)
+
+    def remove(self, client):
+        self._placed.pop(client, None)
+        return super().remove(client)
+
+    def cmd_relayout_stats(self):
+        """
+        Windows placed, skipped and only mapped again since the counters were
+        reset.
+        """
+        return dict(self._stats)
+
+    def cmd_reset_relayout_stats(self):
+        """
+        Reset the relayout counters.
+        """
+        self._stats = {"placed": 0, "skipped": 0, "unhidden": 0}
+
+
+class CachedMonadTall(PlacementCache, layout.MonadTall):
+    """
+    A `layout.MonadTall` that skips re-placing windows that wouldn't move.
+    """
+
+    layout_name = "monadtall"
+
+    def _place_key(self, client, screen_rect):
+        return (
+            self.clients.index(client),
+            len(self.clients),
+            client.has_focus,
+            screen_rect.x,
+            screen_rect.y,
+            screen_rect.width,
+            screen_rect.height,
+            self.ratio,
+            tuple(self.relative_sizes),
+            self.align,
+            self.border_width,
+            self.single_border_width,
+            self.margin,
+            self.single_margin,
+            self.border_focus,
+            self.border_normal,
+        )
+
+
+class CompiledFloating(layout.Floating):
+    """
+    A `layout.Floating` that matches windows against an index of its float
+    rules, built once:
+
+        - Rules on a single property with a plain string are joined into
+          one string per property. Like `Match`, a window matches one if its
+          value is part of the rule's string, which is one substring search
+          in the joined string.
+        - Rules on a single property with a regex are joined into one regex
+          per property.
+        - Any other rule (several properties, `func=...`, ...) is checked
+          the usual way, after the index.
+
+    A window's class, type and role are read on every match, since some
+    programs (Electron, Java) set them after mapping, but whether they
+    matched is remembered per set of values, for up to `CACHE_SIZE` of
+    them. The title is checked on every match.
+    """
+
+    CACHE_SIZE = 1024
+
+    def __init__(self, float_rules: list=None, no_reposition_rules: list=None, **config):
+        layout.Floating.__init__(self, float_rules, no_reposition_rules, **config)
+        self.compile()
+
+    def compile(self):
+        """
+        Build the index from `float_rules`. Call again after changing them.
+        """
+        strings = {}
+        patterns = {}
+        self._other = []
+        for rule in self.float_rules:
+            rules = getattr(rule, "_rules", None)
+            if not rules or len(rules) != 1:
+                self._other.append(rule)
+                continue
+            ((name, value),) = rules.items()
+            if name != "title" and name not in STATIC_PROPERTIES:
+                self._other.append(rule)
+            elif isinstance(value, str):
+                strings.setdefault(name, []).append(value)
+            elif isinstance(value, re.Pattern) and not value.groups:
+                patterns.setdefault((name, value.flags), []).append(value.pattern)
+            else:
+                # Numbered groups would be renumbered in a joined regex.
+                self._other.append(rule)
+
+        # A value without a NUL can only be found in the joined string
+        # within one of the rules.
+        self._strings = {name: ("\0".join(values), values) for name, values in strings.items()}
+        self._patterns = {}
+        for (name, flags), sources in patterns.items():
+            try:
+                compiled = [re.compile("|".join("(?:{})".format(p) for p in sources), flags)]
+            except re.error:
+                # E.g. inline flags, which have to come first.
+                compiled = [re.compile(p, flags) for p in sources]
+            self._patterns.setdefault(name, []).extend(compiled)
+        self._static = [name for name in STATIC_PROPERTIES if name in strings or name in self._patterns]
+        self._results = {}  # The window's static values -> whether a rule matched.
+
+    def _matches(self, name: str, values):
+        joined, strings = self._strings.get(name, ("", ()))
+        patterns = self._patterns.get(name, ())
+        for value in values:
+            if value is None:
+                continue
+            if strings and (value in joined if "\0" not in value else any(value in s for s in strings)):
+                return True
+            if any(p.match(value) for p in patterns):
+                return True
+        return False
+
+    def _static_match(self, win):
+        values = []
+        for name in self._static:
+            value = STATIC_PROPERTIES[name](win)
+            values.append(tuple(value) if isinstance(value, list) else value)
+        values = tuple(values)
+        static = self._results.get(values)
+        if static is None:
+            if len(self._results) >= self.CACHE_SIZE:
+                self._results.clear()
+            static = self._results[values] = any(
+                self._matches(name, value if isinstance(value, tuple) else (value,))
+                for name, value in zip(self._static, values)
+                if value is not None
+            )
+        return static
+
+    def match(self, win):
+        if self._static_match(win) or self._matches("title", (win.name,)):
+            return True
+        return any(win.match(rule) for rule in self._other)
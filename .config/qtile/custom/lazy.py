@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+A lazy stand-in for the `libqtile.widget` namespace.
+
+    from custom.lazy import present, widget
+
+`widget.Net` gives back a placeholder without importing anything. The
+widget's module, and whatever it depends on (psutil, dbus, ...), is imported
+the first time the widget is actually created. If that import fails, the
+error is logged and a TextBox saying so is shown in its place, instead of the
+whole config failing to load.
+
+Widgets listed in QTILE_DISABLED_WIDGETS (comma separated class names) are
+never imported: creating one gives back None, and `present()` drops those
+from a list of widgets.
+"""
+
+# IMPORTS
+import importlib
+import logging
+import os
+
+logger = logging.getLogger("libqtile")
+
+ENV = "QTILE_DISABLED_WIDGETS"
+
+
+class LazyWidget:
+    """
+    A widget class that is only imported when first called.
+
+    module (str): Module to find the class in.
+    name   (str): Name of the class.
+    """
+
+    __slots__ = ("module", "name", "_cls")
+
+    def __init__(self, module: str, name: str):
+        self.module = module
+        self.name = name
+        self._cls = None
+
+    def __repr__(self):
+        return "LazyWidget({!r}, {!r})".format(self.module, self.name)
+
+    def resolve(self):
+        """
+        Import and return the real widget class.
+        """
+        if self._cls is None:
+            self._cls = getattr(importlib.import_module(self.module), self.name)
+        return self._cls
+
+    def __call__(self, *args, **config):
+        if self.name in disabled:
+            return None
+        try:
+            cls = self.resolve()
+        except ImportError as e:
+            logger.exception("Couldn't import widget %s", self.name)
+            from libqtile.widget.textbox import TextBox
+            return TextBox(text="{} unavailable: {}".format(self.name, e))
+        return cls(*args, **config)
+
+
+class LazyWidgets:
+    """
+    A namespace whose attributes are `LazyWidget`s from `module`.
+
+    module (str): The module the widget classes live in.
+    """
+
+    def __init__(self, module: str):
+        self._module = module
+        self._widgets = {}
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name not in self._widgets:
+            self._widgets[name] = LazyWidget(self._module, name)
+        return self._widgets[name]
+
+
+def present(widgets: list):
+    """
+    Drop disabled widgets (None) from a list of widgets.
+    """
+    return [w for w in widgets if w is not None]
+
+
+# Class names of widgets to leave out of the bar.
+disabled = {name.strip() for name in os.environ.get(ENV, "").split(",") if name.strip()}
+
+widget = LazyWidgets("libqtile.widget")
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+Network rates, read straight from /proc/net/dev.
+
+`widget.Net` and `ProcSampler` parse the counters of every interface on each
+tick, which on a machine with dozens of veth/docker interfaces is a dict, a
+list of fields and two ints per interface, to show a single one of them.
+`NetDevReader` keeps /proc/net/dev open and reads it into the same buffer
+every tick, stopping as soon as the line of its interface is in, and pulls
+the two counters it needs out of that line with one regex match. What is
+allocated per tick is a handful of small objects, however many interfaces
+there are.
+
+`NetRates` turns the counters into rates, and keeps the last `window`
+samples in a preallocated ring buffer for a smoothed rate (an exponentially
+weighted moving average) and a 95th percentile. `InterfaceRates` does the
+same from every interface's counters, read in one pass, for the interface of
+the default route (see `custom.routes`) or for all of them together.
+"""
+
+# IMPORTS
+import math
+import os
+import re
+import time
+from array import array
+
+# Fields 0 and 8 after the interface name: bytes received and sent.
+COUNTERS = rb":\s*(\d+)(?:\s+\d+){7}\s+(\d+)"
+# The same for every line, with the interface's name, spelled out in full
+# because it is faster that way.
+ALL_COUNTERS = re.compile(rb"^ *([^ :\n]+): *(\d+)" + rb" +\d+" * 7 + rb" +(\d+)", re.MULTILINE)
+
+
+class NetDevReader:
+    """
+    Reads byte counters from /proc/net/dev.
+
+    interface (str): The interface `read()` reads. Not needed for
+                     `read_all()`.
+    root      (str): Where procfs is mounted. Point this at a fake directory
+                     for benchmarks.
+    """
+
+    def __init__(self, interface: str=None, root: str="/proc"):
+        self.interface = interface
+        self.path = os.path.join(root, "net", "dev")
+        self.reads = 0  # read() calls made on the file.
+        self._pattern = None
+        if interface is not None:
+            self._pattern = re.compile(rb"^\s*" + re.escape(interface.encode()) + COUNTERS, re.MULTILINE)
+        self._buffer = bytearray(4096)
+        self._views = [memoryview(self._buffer)]
+        self._fd = None
+
+    def _grow(self):
+        self._views[0].release()
+        self._buffer.extend(bytes(len(self._buffer)))
+        self._views = [memoryview(self._buffer)]
+
+    def _fill(self, pattern=None):
+        """
+        Read the file into the buffer: up to the end of the first complete
+        match of `pattern`, or to the end of the file. Returns the number of
+        bytes read and the match, if any.
+        """
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDONLY | os.O_CLOEXEC)
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        length = 0
+        while True:
+            if length == len(self._buffer):
+                self._grow()
+            # procfs hands out about a page per read, so with a pattern, read
+            # until the line is complete rather than to the end of the file.
+            if not length:
+                count = os.readv(self._fd, self._views)
+            else:
+                with self._views[0][length:] as rest:
+                    count = os.readv(self._fd, [rest])
+            self.reads += 1
+            length += count
+            if pattern is not None:
+                match = pattern.search(self._buffer, 0, length)
+                if match is not None and (match.end() < length or not count):
+                    return length, match
+            if not count:
+                return length, None
+
+    def read(self):
+        """
+        (received, sent) bytes of the interface, or None if it doesn't exist.
+        """
+        _, match = self._fill(self._pattern)
+        if match is None:
+            return None
+        return int(match.group(1)), int(match.group(2))
+
+    def read_all(self):
+        """
+        Every interface's name mapped to its (received, sent) bytes, from one
+        read of the file. Names and counters are left as the bytes in the
+        file, so that only the counters that are used get converted.
+        """
+        length, _ = self._fill()
+        with self._views[0][:length] as data:
+            return {name: (received, sent) for name, received, sent in ALL_COUNTERS.findall(data)}
+
+    def close(self):
+        """
+        Close /proc/net/dev. The next `read()` opens it again.
+        """
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class RateWindow:
+    """
+    The last `size` rates in a ring buffer, with their moving average.
+
+    size      (int):   Number of rates to keep.
+    smoothing (float): Time constant of the moving average, in seconds: a
+                       change in rate is about two thirds reflected in it
+                       after that long.
+    """
+
+    def __init__(self, size: int, smoothing: float):
+        self.size = max(size, 1)
+        self.smoothing = smoothing
+        self.count = 0
+        self.average = 0.0
+        self._rates = array("d", bytes(8 * self.size))
+        self._next = 0
+
+    def add(self, rate: float, elapsed: float):
+        """
+        Add a rate measured over `elapsed` seconds.
+        """
+        self._rates[self._next] = rate
+        self._next = (self._next + 1) % self.size
+        if not self.count or self.smoothing <= 0:
+            self.average = rate
+        else:
+            self.average += (1 - math.exp(-elapsed / self.smoothing)) * (rate - self.average)
+        self.count = min(self.count + 1, self.size)
+
+    def percentile(self, percent: float):
+        """
+        The `percent`th percentile of the rates in the window.
+        """
+        if not self.count:
+            return 0.0
+        rates = sorted(self._rates[:self.count])
+        return rates[min(int(self.count * percent / 100), self.count - 1)]
+
+
+class NetRates:
+    """
+    Download and upload rates of one interface, with a window of history.
+
+    reader    (NetDevReader): Where to read the counters from.
+    size      (int):          Number of rates to keep for the percentiles.
+    smoothing (float):        Time constant of the averages, in seconds.
+    """
+
+    def __init__(self, reader: NetDevReader, size: int=60, smoothing: float=10.0):
+        self.reader = reader
+        self.down = RateWindow(size, smoothing)
+        self.up = RateWindow(size, smoothing)
+        self.last = (0.0, 0.0)  # The last (down, up) rates, in bytes per second.
+        self._previous = None
+
+    def update(self, now: float=None):
+        """
+        Read the counters and work out the rates since the last update.
+        Returns the (down, up) rates, in bytes per second.
+        """
+        now = time.monotonic() if now is None else now
+        counters = self.reader.read() or (0, 0)
+        previous, self._previous = self._previous, (now, counters)
+        if previous is None or now <= previous[0]:
+            return self.last
+        elapsed = now - previous[0]
+        # A counter that went down was reset, e.g. the interface came back.
+        down = max(counters[0] - previous[1][0], 0) / elapsed
+        up = max(counters[1] - previous[1][1], 0) / elapsed
+        return self._add(down, up, elapsed)
+
+    def _add(self, down: float, up: float, elapsed: float):
+        self.down.add(down, elapsed)
+        self.up.add(up, elapsed)
+        self.last = (down, up)
+        return self.last
+
+
+class InterfaceRates(NetRates):
+    """
+    Rates of one interface chosen on each update, or of all of them together,
+    from one read of every interface's counters.
+
+    Each interface's rate comes from its own counters, so switching to
+    another interface, or one appearing or going away, doesn't show up as a
+    jump in the rate.
+
+    reader    (NetDevReader): Where to read the counters from.
+    size      (int):          Number of rates to keep for the percentiles.
+    smoothing (float):        Time constant of the averages, in seconds.
+    exclude   (str):          Regex of interfaces left out of the total,
+                              e.g. loopback, and virtual ones whose traffic
+                              also goes through a physical interface.
+    """
+
+    def __init__(self, reader: NetDevReader, size: int=60, smoothing: float=10.0, exclude: str=None):
+        NetRates.__init__(self, reader, size, smoothing)
+        self.exclude = re.compile(exclude or r"(?!)")
+        self._included = {}  # Interface name, as bytes -> whether it counts in the total.
+
+    def _names(self, counters: dict, interface: str):
+        if interface is not None:
+            name = interface.encode()
+            return (name,) if name in counters else ()
+        included = self._included
+        for name in counters:
+            if name not in included:
+                included[name] = not self.exclude.match(name.decode(errors="replace"))
+        return [name for name in counters if included[name]]
+
+    def update(self, now: float=None, interface: str=None):
+        """
+        Read the counters and work out the rates since the last update, of
+        `interface`, or of every interface but the excluded ones if it is
+        None. Returns the (down, up) rates, in bytes per second.
+        """
+        now = time.monotonic() if now is None else now
+        counters = self.reader.read_all()
+        previous, self._previous = self._previous, (now, counters)
+        if previous is None or now <= previous[0]:
+            return self.last
+        elapsed = now - previous[0]
+        down = up = 0
+        for name in self._names(counters, interface):
+            before = previous[1].get(name)
+            if before is not None:
+                down += max(int(counters[name][0]) - int(before[0]), 0)
+                up += max(int(counters[name][1]) - int(before[1]), 0)
+        return self._add(down / elapsed, up / elapsed, elapsed)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Color palettes built once from the theme dicts in the configs.
+
+The configs use two theme schemas:
+
+    Flat:   {"bar": ..., "text": ..., 0: ..., 1: ..., ...}
+    Nested: {"primary": {"bg": ..., "fg": ...}, "dark": {0: ...}, "light": {0: ...}}
+
+`Palette.from_theme()` accepts either, checks every color once and gives back
+plain attributes, so building the bar doesn't repeat dict lookups.
+"""
+
+# IMPORTS
+import functools
+import string
+
+HEX_DIGITS = set(string.hexdigits)
+
+
+def normalize_hex(color: str):
+    """
+    Turn "#abc", "0xAABBCC" or "aabbcc" into "aabbcc", raising a ValueError
+    if it isn't a hex color.
+
+    color (str): The color to normalize.
+    """
+    value = str(color).strip().lower()
+    if value.startswith("#"):
+        value = value[1:]
+    elif value.startswith("0x"):
+        value = value[2:]
+    if len(value) == 3:
+        value = "".join(c * 2 for c in value)
+    if len(value) != 6 or not HEX_DIGITS.issuperset(value):
+        raise ValueError("Invalid hex color: {!r}".format(color))
+    return value
+
+
+@functools.lru_cache(maxsize=None)
+def rgb(color: str):
+    """
+    Parse a hex color into an (r, g, b, a) tuple of floats between 0 and 1,
+    the same as `libqtile.utils.rgb()`. Results are cached.
+
+    color (str): The color to parse.
+    """
+    value = normalize_hex(color)
+    return tuple(int(value[i:i + 2], 16) / 255 for i in (0, 2, 4)) + (1.0,)
+
+
+class Palette:
+    """
+    A validated set of theme colors.
+
+    bg     (str):   Bar background.
+    fg     (str):   Text color.
+    normal (tuple): Numbered colors. The flat schema's 0, 1, ... or the
+                    nested schema's "dark" colors.
+    bright (tuple): The nested schema's "light" colors. The same as `normal`
+                    for flat themes.
+    """
+
+    __slots__ = ("bg", "fg", "normal", "bright")
+
+    def __init__(self, bg: str, fg: str, normal: tuple, bright: tuple=None):
+        self.bg = normalize_hex(bg)
+        self.fg = normalize_hex(fg)
+        self.normal = tuple(normalize_hex(c) for c in normal)
+        self.bright = self.normal if bright is None else tuple(normalize_hex(c) for c in bright)
+
+    def __repr__(self):
+        return "Palette(bg={!r}, fg={!r}, normal={!r}, bright={!r})".format(
+            self.bg, self.fg, self.normal, self.bright
+        )
+
+    @staticmethod
+    def rgb(color: str):
+        """
+        Parsed RGBA of one of this palette's colors. See `rgb()`.
+        """
+        return rgb(color)
+
+    @classmethod
+    def from_theme(cls, theme: dict):
+        """
+        Build a palette from a theme dict of either schema. Palettes are
+        cached, so reloading the config with the same theme reuses one.
+
+        theme (dict): The theme to convert.
+        """
+        key = _freeze(theme)
+        if key not in _palettes:
+            if "primary" in theme:
+                _palettes[key] = cls(
+                    theme["primary"]["bg"],
+                    theme["primary"]["fg"],
+                    _numbered(theme["dark"]),
+                    _numbered(theme["light"]),
+                )
+            else:
+                _palettes[key] = cls(theme["bar"], theme["text"], _numbered(theme))
+        return _palettes[key]
+
+
+_palettes = {}
+
+
+def _numbered(colors: dict):
+    """
+    The values of the integer keys of `colors`, in order.
+    """
+    return tuple(colors[i] for i in sorted(k for k in colors if isinstance(k, int)))
+
+
+def _freeze(value):
+    """
+    A hashable copy of a (possibly nested) theme dict.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted(((str(k), _freeze(v)) for k, v in value.items())))
+    return value
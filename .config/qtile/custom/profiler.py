@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+A startup profiler for the config, enabled by an environment variable.
+
+    QTILE_PROFILE_STARTUP=~/qtile-startup.json qtile start
+
+records how long each module import, each bar segment's widget construction
+and each bar's configuration take, and when the first bar paint happens. The
+report is written in the Chrome trace event format, which chrome://tracing,
+Perfetto and speedscope all show as a flame graph. Spans nest by time, so an
+import shows up inside the import or widget that triggered it.
+
+When the variable isn't set, everything here is a no-op.
+"""
+
+# IMPORTS
+import builtins
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+ENV = "QTILE_PROFILE_STARTUP"
+
+_profiler = None
+
+
+class StartupProfiler:
+    """
+    Collects spans and writes them to `path` as a Chrome trace.
+
+    path (str): Where to write the report.
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        self.start = time.perf_counter()
+        self.events = []
+        self._import = builtins.__import__
+        self._marked = set()
+
+    def _now(self):
+        return (time.perf_counter() - self.start) * 1e6
+
+    def install(self):
+        builtins.__import__ = self._timed_import
+
+    def uninstall(self):
+        builtins.__import__ = self._import
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level == 0 and name in sys.modules:
+            return self._import(name, globals, locals, fromlist, level)
+
+        loaded = len(sys.modules)
+        start = self._now()
+        try:
+            return self._import(name, globals, locals, fromlist, level)
+        finally:
+            if len(sys.modules) > loaded:
+                self.add(name, "import", start, self._now() - start)
+
+    def add(self, name: str, category: str, start: float, duration: float, **args):
+        """
+        Record a finished span. Times are in microseconds since startup.
+        """
+        self.events.append({
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": start,
+            "dur": duration,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args,
+        })
+
+    def mark(self, name: str):
+        """
+        Record an instant, the first time it happens, and write the report.
+        """
+        if name in self._marked:
+            return
+        self._marked.add(name)
+        self.events.append({
+            "name": name,
+            "cat": "mark",
+            "ph": "i",
+            "s": "g",
+            "ts": self._now(),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        })
+        self.write()
+
+    def summary(self):
+        """
+        Total microseconds per span name, slowest first. Totals include
+        any nested spans.
+        """
+        totals = {}
+        for event in self.events:
+            if event["ph"] == "X":
+                key = "{}: {}".format(event["cat"], event["name"])
+                totals[key] = totals.get(key, 0) + event["dur"]
+        return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+    def write(self):
+        """
+        Write the report to `path`.
+        """
+        with open(self.path, "w") as f:
+            json.dump(
+                {"traceEvents": self.events, "displayTimeUnit": "ms", "summary": self.summary()},
+                f,
+                indent=1,
+            )
+
+
+def start():
+    """
+    Start profiling if QTILE_PROFILE_STARTUP is set. Call this before any
+    other import in the config.
+    """
+    global _profiler
+    path = os.environ.get(ENV)
+    if path and _profiler is None:
+        _profiler = StartupProfiler(path)
+        _profiler.install()
+
+        from libqtile import hook
+        hook.subscribe.startup_complete(lambda: mark("startup complete"))
+
+
+def enabled():
+    """
+    Whether the profiler is running.
+    """
+    return _profiler is not None
+
+
+@contextlib.contextmanager
+def _span(name: str, category: str):
+    start = _profiler._now()
+    try:
+        yield
+    finally:
+        _profiler.add(name, category, start, _profiler._now() - start)
+
+
+def span(name: str, category: str):
+    """
+    A context manager that records the time spent inside it.
+
+    name     (str): What is being timed.
+    category (str): The kind of span, e.g. "widget".
+    """
+    if _profiler is None:
+        return contextlib.nullcontext()
+    return _span(name, category)
+
+
+def mark(name: str):
+    """
+    Record the first time `name` happens and write the report so far. Import
+    timing stops at "startup complete".
+    """
+    if _profiler is not None:
+        _profiler.mark(name)
+        if name == "startup complete":
+            _profiler.uninstall()
@@ -0,0 +1,407 @@
+# -*- coding: utf-8 -*-
+"""
+Reload the config without tearing down everything that didn't change.
+
+`lazy.reload_config()` re-runs `config.py` and rebuilds every bar and widget.
+`reload_config()` below also re-runs it, but then diffs the result against the
+live config:
+
+    - Widgets whose settings are unchanged are left alone, along with their
+      timers and text layouts.
+    - Widgets and layouts where only colors changed are recolored in place.
+    - Any other changed widget is recreated on its own.
+    - Changed keybindings are re-grabbed without touching the bar.
+    - Anything else (layouts, groups, mouse bindings, a different number of
+      screens or widgets, ...) falls back to Qtile's full reload, using the
+      config that was just loaded and the hooks it subscribed to.
+    - If a module next to config.py (e.g. `custom/*.py`) changed, Qtile's
+      own reload is used straight away, since it imports those again.
+
+Widgets of the new config that end up unused are finalized.
+
+Bind it with `lazy.function(reload_config)`.
+"""
+
+# IMPORTS
+import logging
+import os
+import runpy
+import sys
+import time
+from types import SimpleNamespace
+
+logger = logging.getLogger("libqtile")
+
+# When the modules next to config.py were loaded. Qtile's full reload imports
+# them all again, and this one with them.
+LOADED_AT = time.time()
+
+# Widget and layout settings that can be changed on a live object.
+RECOLORABLE = {"background", "foreground"}
+RECOLORABLE_LAYOUT = {"border_focus", "border_normal"}
+
+# Top-level settings that need a full reload when they change.
+SETTINGS = [
+    "groups",
+    "mouse",
+    "floating_layout",
+    "follow_mouse_focus",
+    "bring_front_click",
+    "cursor_warp",
+    "auto_fullscreen",
+    "focus_on_window_activation",
+    "reconfigure_screens",
+    "auto_minimize",
+    "wmname",
+]
+
+
+def describe(value):
+    """
+    A comparable description of a config value. Qtile objects are described
+    by their type and the settings they were created with, and functions by
+    their qualified name, so two runs of the config compare equal.
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(describe(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), describe(v)) for k, v in value.items()))
+    if hasattr(value, "call") and hasattr(value, "resolve"):  # A custom.commands.PreResolved.
+        return describe(value.call)
+    if callable(value) and hasattr(value, "__qualname__"):
+        return (getattr(value, "__module__", None), value.__qualname__)
+    if hasattr(value, "_user_config"):
+        # Floating layouts take their rules as an argument, not a setting.
+        rules = describe(getattr(value, "float_rules", None))
+        return (type(value).__name__, describe(value._user_config), rules)
+    if hasattr(value, "selectors") and hasattr(value, "name"):  # A lazy command.
+        return (describe(value.selectors), value.name, describe(value.args), describe(value.kwargs))
+    if hasattr(value, "commands"):  # A Key, Drag or Click.
+        return (
+            type(value).__name__,
+            describe(getattr(value, "modifiers", None)),
+            getattr(value, "key", getattr(value, "button", None)),
+            describe(value.commands),
+        )
+    if hasattr(value, "__dict__") and not isinstance(value, type):
+        return (type(value).__name__, describe(vars(value)))
+    return value
+
+
+def widget_changes(live, new):
+    """
+    The settings that differ between a live widget and a newly built one, or
+    None if the widget has to be recreated.
+    """
+    if type(live) is not type(new):
+        return None
+    # Most widgets change their own text, but a plain TextBox shows what the
+    # config gave it.
+    if type(live).__name__ == "TextBox" and live.text != new.text:
+        return None
+    keys = set(live._user_config) | set(new._user_config)
+    return {
+        key: new._user_config.get(key)
+        for key in keys
+        if describe(live._user_config.get(key)) != describe(new._user_config.get(key))
+    }
+
+
+def _bars(config):
+    for screen in config.screens:
+        for position in ("top", "bottom", "left", "right"):
+            bar = getattr(screen, position, None)
+            if bar is not None:
+                yield position, bar
+
+
+def diff_config(live, new):
+    """
+    Work out how to get from the live config to the new one.
+
+    Returns a plan dict with "full" (whether a full reload is needed), "keys"
+    (whether the keybindings need re-grabbing), "layouts" and "bars" (lists of
+    (index, changes) entries), "recolor" and "recreate" (lists of (bar index,
+    widget index, ...) entries) and "unchanged" (the number of widgets left
+    alone).
+
+    live (object): The live `qtile.config`, or anything with the same
+                   attributes.
+    new  (object): The newly loaded config.
+    """
+    plan = {
+        "full": False,
+        "keys": False,
+        "layouts": [],
+        "bars": [],
+        "recolor": [],
+        "recreate": [],
+        "unchanged": 0,
+    }
+
+    for name in SETTINGS:
+        if describe(getattr(live, name, None)) != describe(getattr(new, name, None)):
+            logger.debug("%s changed, doing a full reload", name)
+            plan["full"] = True
+            return plan
+
+    if len(live.layouts) != len(new.layouts):
+        plan["full"] = True
+        return plan
+    for index, (live_layout, new_layout) in enumerate(zip(live.layouts, new.layouts)):
+        changes = widget_changes(live_layout, new_layout)
+        if changes is None or not RECOLORABLE_LAYOUT.issuperset(changes):
+            plan["full"] = True
+            return plan
+        if changes:
+            plan["layouts"].append((index, changes))
+
+    live_bars = list(_bars(live))
+    new_bars = list(_bars(new))
+    if [p for p, _ in live_bars] != [p for p, _ in new_bars]:
+        plan["full"] = True
+        return plan
+
+    for index, ((_, live_bar), (_, new_bar)) in enumerate(zip(live_bars, new_bars)):
+        changes = widget_changes(live_bar, new_bar)
+        if (len(live_bar.widgets) != len(new_bar.widgets) or live_bar.size != new_bar.size
+                or not {"background"}.issuperset(changes)):
+            plan["full"] = True
+            return plan
+        if changes:
+            plan["bars"].append((index, changes))
+
+        for position, (live_widget, new_widget) in enumerate(zip(live_bar.widgets, new_bar.widgets)):
+            changes = widget_changes(live_widget, new_widget)
+            if changes is None or not RECOLORABLE.issuperset(changes):
+                plan["recreate"].append((index, position, new_widget))
+            elif changes:
+                plan["recolor"].append((index, position, changes))
+            else:
+                plan["unchanged"] += 1
+
+    plan["keys"] = describe(live.keys) != describe(new.keys)
+    return plan
+
+
+def apply_plan(qtile, plan: dict, new):
+    """
+    Apply a plan from `diff_config()` to the running Qtile.
+    """
+    bars = [bar for _, bar in _bars(qtile.config)]
+
+    # Groups hold their own copies of the layouts in `config.layouts`.
+    for index, changes in plan["layouts"]:
+        copies = [qtile.config.layouts[index]]
+        copies += [group.layouts[index] for group in qtile.groups if len(group.layouts) > index]
+        for layout in copies:
+            if type(layout) is type(qtile.config.layouts[index]):
+                for key, value in changes.items():
+                    setattr(layout, key, value)
+                layout._user_config.update(changes)
+
+    for index, changes in plan["bars"]:
+        bars[index].background = changes["background"]
+        bars[index]._user_config.update(changes)
+
+    for index, position, changes in plan["recolor"]:
+        widget = bars[index].widgets[position]
+        for key, value in changes.items():
+            setattr(widget, key, value)
+            widget._user_config[key] = value
+            if key == "foreground" and getattr(widget, "layout", None) is not None:
+                widget.layout.colour = value
+
+    for index, position, new_widget in plan["recreate"]:
+        bar = bars[index]
+        old_widget = bar.widgets[position]
+        old_widget.finalize()
+        # Qtile may have registered it under a suffixed name, e.g. "prompt_1".
+        for name, widget in list(qtile.widgets_map.items()):
+            if widget is old_widget:
+                del qtile.widgets_map[name]
+        qtile.register_widget(new_widget)
+        bar.widgets[position] = new_widget
+        bar._configure_widget(new_widget)
+
+    if plan["keys"]:
+        for key in qtile.config.keys:
+            qtile.ungrab_key(key)
+        qtile.config.keys = new.keys
+        for key in new.keys:
+            qtile.grab_key(key)
+
+    if plan["layouts"]:
+        for screen in qtile.screens:
+            screen.group.layout_all()
+    for bar in bars:
+        bar.draw()
+
+
+def load_config(path: str):
+    """
+    Run a config file and return its globals as an object.
+    """
+    return SimpleNamespace(**runpy.run_path(path))
+
+
+def changed_modules(config_file: str, since: float=None):
+    """
+    The modules imported from the directory of `config_file`, other than
+    the config itself, whose file changed since they were loaded, i.e. since
+    this module was.
+
+    config_file (str):   The path of config.py.
+    since       (float): A `time.time()`. Defaults to when this module was
+                         loaded.
+    """
+    since = LOADED_AT if since is None else since
+    config_file = os.path.abspath(config_file)
+    config_dir = os.path.dirname(config_file)
+    changed = []
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if not path:
+            continue
+        path = os.path.abspath(path)
+        if path == config_file or not path.startswith(config_dir + os.sep):
+            continue
+        try:
+            if os.stat(path).st_mtime > since:
+                changed.append(name)
+        except OSError:
+            pass
+    return sorted(changed)
+
+
+def load_with_hooks(path: str):
+    """
+    Run a config file like `load_config()`, keeping the hook subscriptions
+    it makes apart from the live ones. Returns the config and its
+    subscriptions.
+    """
+    from libqtile import hook
+
+    live = {name: list(functions) for name, functions in hook.subscriptions.items()}
+    hook.subscriptions.clear()
+    try:
+        new = load_config(path)
+        subscriptions = {name: list(functions) for name, functions in hook.subscriptions.items()}
+    finally:
+        hook.subscriptions.clear()
+        hook.subscriptions.update(live)
+    return new, subscriptions
+
+
+def add_subscriptions(subscriptions: dict):
+    """
+    Subscribe every function of `subscriptions` to its hook, unless it
+    already is.
+    """
+    from libqtile import hook
+
+    for name, functions in subscriptions.items():
+        live = hook.subscriptions.setdefault(name, [])
+        live.extend(f for f in functions if f not in live)
+
+
+def discard_widgets(plan: dict, new):
+    """
+    Finalize the widgets of the new config that a plan didn't put in a bar,
+    so that whatever they set up when they were created is released.
+    """
+    used = {id(widget) for _, _, widget in plan["recreate"]}
+    for _, bar in _bars(new):
+        for widget in bar.widgets:
+            if id(widget) in used:
+                continue
+            try:
+                widget.finalize()
+            except AttributeError:
+                # Never configured, so it has no drawer to finalize.
+                pass
+
+
+def full_reload(qtile, new, subscriptions: dict):
+    """
+    Do what `qtile.cmd_reload_config()` does, but with a config that was
+    already loaded, so that config.py doesn't run a second time. The hooks
+    the config subscribed to while it ran are subscribed again after the old
+    ones are cleared.
+    """
+    from libqtile import hook
+    from libqtile.core.state import QtileState
+
+    from custom import commands
+
+    qtile.config.update(**vars(new))
+    qtile._state = QtileState(qtile, restart=False)
+    qtile._finalize_configurables()
+    hook.clear()
+    add_subscriptions(subscriptions)
+    qtile.ungrab_keys()
+    qtile.chord_stack.clear()
+    qtile.core.ungrab_buttons()
+    qtile.mouse_map.clear()
+    qtile.groups_map.clear()
+    qtile.groups.clear()
+    qtile.screens.clear()
+    # Without a file path, load_config() uses the config as it is instead of
+    # running config.py again.
+    file_path, qtile.config.file_path = qtile.config.file_path, None
+    try:
+        qtile.load_config()
+    finally:
+        qtile.config.file_path = file_path
+
+    # Keys bound through `prebind()` must still follow the new groups and
+    # layouts.
+    missing = commands.check_subscriptions()
+    if missing:
+        logger.warning("Hooks lost in the reload, subscribed again: %s", ", ".join(missing))
+
+
+def reload_config(qtile):
+    """
+    Reload the config, rebuilding only what changed. Falls back to Qtile's
+    own reload if anything can't be changed in place. config.py only runs
+    once either way.
+    """
+    start = time.perf_counter()
+    changed = changed_modules(qtile.config.file_path)
+    if changed:
+        # New code can't be diffed against the live objects. Qtile's reload
+        # imports the changed modules again before running config.py.
+        logger.info("%s changed, doing a full reload", ", ".join(changed))
+        qtile.cmd_reload_config()
+        return
+
+    try:
+        new, subscriptions = load_with_hooks(qtile.config.file_path)
+    except Exception:
+        # Like Qtile's reload: keep the running config.
+        logger.exception("Configuration error, not reloading")
+        return
+
+    try:
+        plan = diff_config(qtile.config, new)
+        if not plan["full"]:
+            apply_plan(qtile, plan, new)
+            add_subscriptions(subscriptions)
+            discard_widgets(plan, new)
+    except Exception:
+        logger.exception("Incremental reload failed, doing a full reload")
+        plan = {"full": True}
+
+    if plan["full"]:
+        full_reload(qtile, new, subscriptions)
+        return
+
+    logger.info(
+        "Reloaded config in %.1fms: %d widgets unchanged, %d recolored, %d recreated%s",
+        (time.perf_counter() - start) * 1000,
+        plan["unchanged"],
+        len(plan["recolor"]),
+        len(plan["recreate"]),
+        ", keys re-grabbed" if plan["keys"] else "",
+    )
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+Which interface the default route goes through, kept up to date from
+netlink.
+
+`RouteMonitor` reads the routing table once, then listens on a netlink socket
+for route and link changes, and only reads it again when one comes in:
+plugging in a cable, joining a wifi network or bringing a VPN up. Link
+messages only count when an interface goes up or down, since a wifi link
+also sends them for every scan. Without netlink (not Linux, or no
+permission), the table is read again at most every `FALLBACK_INTERVAL`
+seconds instead.
+
+Events and table reads can be read from a running Qtile:
+
+    qtile cmd-obj -f eval -a "__import__('custom.routes').routes.shared.stats()"
+"""
+
+# IMPORTS
+import logging
+import os
+import socket
+import struct
+import time
+
+logger = logging.getLogger("libqtile")
+
+FALLBACK_INTERVAL = 10.0
+
+# Netlink multicast groups, message types and flags (linux/rtnetlink.h).
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_ROUTE = 0x40
+RTMGRP_IPV6_ROUTE = 0x400
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+IFF_UP = 0x1
+IFF_LOWER_UP = 0x10000
+RTF_UP = 0x1
+RTF_REJECT = 0x200
+
+# nlmsghdr: length, type, flags, sequence, port.
+NLMSGHDR = struct.Struct("=IHHII")
+# ifinfomsg: family, padding, type, index, flags, change.
+IFINFOMSG = struct.Struct("=BxHiII")
+
+
+def _read(root: str, *path: str):
+    try:
+        with open(os.path.join(root, *path)) as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+def default_routes(route: str, ipv6_route: str=""):
+    """
+    The interfaces of the IPv4 default routes, as (prefix length, metric,
+    interface) tuples, best first; then those of the IPv6 ones.
+
+    A VPN that routes everything without replacing the default route adds
+    0.0.0.0/1 and 128.0.0.0/1 instead; its 0.0.0.0/1 route is more specific,
+    so it comes first.
+
+    route      (str): Contents of /proc/net/route.
+    ipv6_route (str): Contents of /proc/net/ipv6_route.
+    """
+    ipv4 = []
+    for line in route.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) < 8 or not int(fields[3], 16) & RTF_UP:
+            continue
+        prefix = bin(int(fields[7], 16)).count("1")
+        if int(fields[1], 16) == 0 and prefix <= 1:
+            ipv4.append((prefix, int(fields[6]), fields[0]))
+    ipv6 = []
+    for line in ipv6_route.splitlines():
+        fields = line.split()
+        if len(fields) < 10 or fields[9] == "lo":
+            continue
+        flags = int(fields[8], 16)
+        prefix = int(fields[1], 16)
+        if int(fields[0], 16) == 0 and prefix <= 1 and flags & RTF_UP and not flags & RTF_REJECT:
+            ipv6.append((prefix, int(fields[5], 16), fields[9]))
+    return sorted(ipv4, key=lambda r: (-r[0], r[1])) + sorted(ipv6, key=lambda r: (-r[0], r[1]))
+
+
+class RouteMonitor:
+    """
+    Follows the interface of the default route.
+
+    root (str): Where procfs is mounted. Point this at a fake directory for
+                benchmarks.
+    """
+
+    def __init__(self, root: str="/proc"):
+        self.root = root
+        self.events = 0  # Netlink messages received.
+        self.lookups = 0  # Times the routing table was read.
+        self._interface = None
+        self._checked = None
+        self._socket = None
+        self._links = {}  # Interface index -> whether it is up.
+
+    @property
+    def interface(self):
+        """
+        The interface of the default route, or None if there isn't one.
+        """
+        if self._checked is None or (
+            self._socket is None and time.monotonic() - self._checked >= FALLBACK_INTERVAL
+        ):
+            self.refresh()
+        return self._interface
+
+    def refresh(self):
+        """
+        Read the routing table now. Returns whether the interface changed.
+        """
+        routes = default_routes(_read(self.root, "net", "route"), _read(self.root, "net", "ipv6_route"))
+        interface = routes[0][2] if routes else None
+        self.lookups += 1
+        self._checked = time.monotonic()
+        changed, self._interface = interface != self._interface, interface
+        return changed
+
+    def watch(self, loop):
+        """
+        Read the routing table again whenever netlink reports a route or link
+        change, on `loop`. Does nothing if netlink isn't available.
+
+        loop (asyncio.AbstractEventLoop): The loop to watch on.
+        """
+        if self._socket is not None:
+            return
+        try:
+            sock = socket.socket(
+                socket.AF_NETLINK, socket.SOCK_RAW | socket.SOCK_NONBLOCK | socket.SOCK_CLOEXEC,
+                socket.NETLINK_ROUTE,
+            )
+            sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_ROUTE | RTMGRP_IPV6_ROUTE))
+        except (AttributeError, OSError):
+            logger.info("Netlink isn't available, reading the routing table every %ss", FALLBACK_INTERVAL)
+            return
+        self._socket = sock
+        loop.add_reader(sock.fileno(), self._read_events)
+        # Anything that changed before the socket was bound.
+        self.refresh()
+
+    def _relevant(self, data: bytes):
+        offset = 0
+        relevant = False
+        while offset + NLMSGHDR.size <= len(data):
+            length, kind, _, _, _ = NLMSGHDR.unpack_from(data, offset)
+            if length < NLMSGHDR.size:
+                break
+            self.events += 1
+            if kind in (RTM_NEWLINK, RTM_DELLINK) and offset + NLMSGHDR.size + IFINFOMSG.size <= len(data):
+                _, _, index, flags, _ = IFINFOMSG.unpack_from(data, offset + NLMSGHDR.size)
+                up = kind == RTM_NEWLINK and flags & (IFF_UP | IFF_LOWER_UP) == IFF_UP | IFF_LOWER_UP
+                if self._links.get(index) != up:
+                    self._links[index] = up
+                    relevant = True
+            else:
+                relevant = True
+            offset += (length + 3) & ~3
+        return relevant
+
+    def _read_events(self):
+        relevant = False
+        while True:
+            try:
+                data = self._socket.recv(65536)
+            except BlockingIOError:
+                break
+            except OSError:
+                # ENOBUFS: messages were dropped, so look at the table anyway.
+                relevant = True
+                break
+            if not data:
+                break
+            relevant = self._relevant(data) or relevant
+        if relevant:
+            self.refresh()
+
+    def stats(self):
+        """
+        The current interface, netlink messages received and routing table
+        reads so far.
+        """
+        return {
+            "interface": self._interface,
+            "netlink": self._socket is not None,
+            "events": self.events,
+            "lookups": self.lookups,
+        }
+
+
+shared = RouteMonitor()
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+A shared procfs sampler for the CPU and memory widgets.
+
+Instead of every widget polling psutil on its own timer, each widget asks the
+sampler for a snapshot. The first widget to ask during a tick reads
+`/proc/stat` and `/proc/meminfo` (and `/proc/net/dev`, if asked to); every
+other widget polling in the same tick gets that same snapshot back.
+"""
+
+# IMPORTS
+import os
+import threading
+import time
+from collections import namedtuple
+
+# A single reading of procfs.
+#
+# time   (float): `time.monotonic()` when the snapshot was taken.
+# cpu    (dict):  "cpu", "cpu0", ... mapped to a tuple of jiffy counters.
+# memory (dict):  /proc/meminfo keys mapped to their value in kB.
+# net    (dict):  Interface name mapped to a (received, sent) bytes tuple.
+#                 Empty unless the sampler reads /proc/net/dev.
+Snapshot = namedtuple("Snapshot", ["time", "cpu", "memory", "net"])
+
+
+def parse_stat(text: str):
+    """
+    Parse the "cpu" lines of /proc/stat.
+
+    text (str): Contents of /proc/stat.
+    """
+    cpu = {}
+    for line in text.splitlines():
+        if not line.startswith("cpu"):
+            break
+        name, *fields = line.split()
+        cpu[name] = tuple(map(int, fields))
+    return cpu
+
+
+def parse_meminfo(text: str):
+    """
+    Parse /proc/meminfo into a dict of values in kB.
+
+    text (str): Contents of /proc/meminfo.
+    """
+    memory = {}
+    for line in text.splitlines():
+        key, _, value = line.partition(":")
+        memory[key] = int(value.split()[0])
+    return memory
+
+
+def parse_net_dev(text: str):
+    """
+    Parse /proc/net/dev into a dict of (received, sent) byte counters.
+
+    text (str): Contents of /proc/net/dev.
+    """
+    net = {}
+    for line in text.splitlines()[2:]:
+        name, _, counters = line.partition(":")
+        fields = counters.split()
+        net[name.strip()] = (int(fields[0]), int(fields[8]))
+    return net
+
+
+def cpu_percent(previous: tuple, current: tuple):
+    """
+    Work out the busy percentage between two /proc/stat counter tuples.
+
+    previous (tuple): Counters from the earlier snapshot.
+    current  (tuple): Counters from the later snapshot.
+    """
+    total = sum(current) - sum(previous)
+    idle = (current[3] + current[4]) - (previous[3] + previous[4])
+    if total <= 0:
+        return 0.0
+    return 100.0 * (total - idle) / total
+
+
+class ProcSampler:
+    """
+    Read procfs at most once per tick and share the result.
+
+    root    (str):   Where procfs is mounted. Point this at a fake directory
+                     for benchmarks.
+    max_age (float): How old, in seconds, a snapshot can be before the next
+                     request re-reads procfs. Keep this below the widgets'
+                     `update_interval` so that each tick gets a fresh reading.
+    net     (bool):  Whether to read /proc/net/dev.
+    """
+
+    def __init__(self, root: str="/proc", max_age: float=0.5, net: bool=True):
+        self.root = root
+        self.max_age = max_age
+        self.net = net
+        self.reads = 0  # Number of times procfs has actually been read.
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def _read(self, *path: str):
+        with open(os.path.join(self.root, *path)) as f:
+            return f.read()
+
+    def refresh(self):
+        """
+        Read procfs now, regardless of the age of the current snapshot.
+        """
+        self._snapshot = Snapshot(
+            time=time.monotonic(),
+            cpu=parse_stat(self._read("stat")),
+            memory=parse_meminfo(self._read("meminfo")),
+            net=parse_net_dev(self._read("net", "dev")) if self.net else {},
+        )
+        self.reads += 1
+        return self._snapshot
+
+    def snapshot(self):
+        """
+        Return the snapshot for the current tick, reading procfs if needed.
+        """
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or time.monotonic() - snapshot.time >= self.max_age:
+                snapshot = self.refresh()
+            return snapshot
+
+
+# The sampler shared by every widget in the bar. The bar's Net widget reads
+# its one interface itself (see `custom.netdev`).
+shared = ProcSampler(net=False)
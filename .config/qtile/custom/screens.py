@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+One bar per monitor, all built from the same bar spec.
+
+Every screen gets its own widget instances, but the widgets read from shared
+sources: the CPU and Memory widgets from `custom.sampler.shared` and the GPU
+widget from one nvidia-smi process per `custom.gpu.get_reader()` key. A third
+or fourth monitor adds widgets to draw, not more polling, apart from the Net
+widget's read of its one line of /proc/net/dev.
+"""
+
+# IMPORTS
+import re
+import subprocess
+
+import libqtile
+from libqtile.config import Screen
+
+from custom.bar import CoalescingBar
+from custom.factory import build_bar
+from custom.hooks import subscribe_once
+from custom.reload import reload_config
+
+
+def count_monitors(qtile=None):
+    """
+    The number of connected monitors. Defaults to 1.
+
+    While Qtile runs, which includes every reload, this asks its core for
+    the screens it already knows about. `xrandr` is only run when the config
+    is loaded outside of Qtile, e.g. by `qtile check` or a benchmark.
+
+    qtile (Qtile): The running Qtile. Defaults to `libqtile.qtile`.
+    """
+    qtile = qtile if qtile is not None else libqtile.qtile
+    if qtile is not None:
+        return max(len(qtile.core.get_screen_info()), 1)
+    try:
+        output = subprocess.run(
+            ["xrandr", "--listmonitors"], capture_output=True, text=True, timeout=2
+        ).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return 1
+    match = re.match(r"Monitors:\s*(\d+)", output)
+    return max(int(match.group(1)), 1) if match else 1
+
+
+def make_screens(spec: list, count: int, size: int, **config):
+    """
+    Create `count` screens, each with a top bar built from `spec`.
+
+    spec   (list): Bar segments, see `custom.factory`.
+    count  (int):  The number of screens.
+    size   (int):  Height of each bar in pixels.
+    config (dict): Settings passed on to each bar.
+    """
+    return [Screen(top=CoalescingBar(build_bar(spec), size, **config)) for _ in range(count)]
+
+
+def _reload_on_hotplug():
+    # Qtile pads missing screens with empty ones, so reload the config to
+    # give a newly connected monitor its own bar. Through `custom.reload`,
+    # like a reload from the keyboard.
+    qtile = libqtile.qtile
+    if len(qtile.screens) != len(qtile.config.screens):
+        reload_config(qtile)
+
+
+def reload_on_hotplug():
+    """
+    Reload the config when the number of monitors changes.
+    """
+    subscribe_once("screens_reconfigured", _reload_on_hotplug)
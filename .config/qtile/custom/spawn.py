@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Launch programs from a small helper process instead of from Qtile.
+
+`lazy.spawn()` forks Qtile itself for every launch, copying the page tables of
+its whole heap, and runs most commands through a shell. Held down, a volume key
+does that dozens of times a second. `SpawnPool` starts this file once as a
+helper process, which stays small. Qtile only writes each command to the
+helper's stdin. The helper launches it with `posix_spawn()`, without a shell
+unless the command needs one (pipes, redirects, ...), and reports back how
+long it took from the key press to the program being exec'd.
+
+    from custom.spawn import spawn
+    Key([mod], "Return", spawn("alacritty"))
+
+If the helper can't be started or has died, commands are started by Qtile as
+before.
+"""
+
+# IMPORTS
+import asyncio
+import json
+import logging
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import time
+
+logger = logging.getLogger("libqtile")
+
+# Characters that only mean something to a shell.
+SHELL_CHARS = set("|&;<>()$`*?[]{}~#\n")
+
+
+def argv(command: str):
+    """
+    The argv to launch `command` with: split directly if it is a plain
+    command, or run through /bin/sh if it uses any shell syntax.
+
+    command (str): A command line, as given to `lazy.spawn()`.
+    """
+    if SHELL_CHARS.intersection(command):
+        return ["/bin/sh", "-c", command]
+    return shlex.split(command)
+
+
+class SpawnPool:
+    """
+    Sends commands to a helper process that launches them.
+
+    max_samples (int): How many recent launch latencies to keep.
+    """
+
+    def __init__(self, max_samples: int=1000):
+        self.max_samples = max_samples
+        self.latencies = []  # Seconds from request to exec, most recent last.
+        self.requests = 0
+        self.failures = 0
+        self.fallbacks = 0   # Commands Qtile had to start itself.
+        self._process = None
+        self._buffer = b""
+        self._environ = None  # The environment last sent to the helper.
+
+    @property
+    def running(self):
+        """
+        Whether the helper process is up.
+        """
+        return self._process is not None and self._process.poll() is None
+
+    def start(self):
+        """
+        Start the helper process, if it isn't running. Must be called from the
+        event loop.
+        """
+        if self.running:
+            return
+        try:
+            self._process = subprocess.Popen(
+                [sys.executable, "-S", os.path.abspath(__file__)],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                start_new_session=True,
+            )
+        except OSError:
+            logger.exception("Couldn't start the spawn helper")
+            self._process = None
+            return
+        self._buffer = b""
+        self._environ = None
+        os.set_blocking(self._process.stdout.fileno(), False)
+        asyncio.get_event_loop().add_reader(self._process.stdout.fileno(), self._read_replies)
+
+    def stop(self):
+        """
+        Stop the helper process. Programs it launched keep running.
+        """
+        if self._process is None:
+            return
+        asyncio.get_event_loop().remove_reader(self._process.stdout.fileno())
+        self._process.stdin.close()
+        self._process.wait()
+        self._process = None
+
+    def spawn(self, qtile, command: str):
+        """
+        Launch `command` through the helper, or through Qtile if the helper
+        isn't available.
+        """
+        if not self.running:
+            self.start()
+        request = {"argv": argv(command), "sent": time.monotonic()}
+        # Programs get Qtile's environment as it is now, e.g. with variables
+        # set by hooks since the helper started. It is only sent when it
+        # changed.
+        environ = dict(os.environ)
+        if environ != self._environ:
+            request["env"] = environ
+        try:
+            self._process.stdin.write(json.dumps(request).encode() + b"\n")
+            self._process.stdin.flush()
+        except (AttributeError, OSError):
+            logger.warning("Spawn helper unavailable, starting %r from Qtile", command)
+            self.fallbacks += 1
+            qtile.cmd_spawn(command)
+            return
+        self._environ = environ
+        self.requests += 1
+
+    def _read_replies(self):
+        try:
+            data = os.read(self._process.stdout.fileno(), 65536)
+        except BlockingIOError:
+            return
+        if not data:
+            # The helper exited. It is restarted on the next launch.
+            asyncio.get_event_loop().remove_reader(self._process.stdout.fileno())
+            self._process.wait()
+            self._process = None
+            return
+        *lines, self._buffer = (self._buffer + data).split(b"\n")
+        for line in lines:
+            try:
+                reply = json.loads(line)
+            except ValueError:
+                # Only this reply is lost; keep reading the others.
+                self.failures += 1
+                logger.warning("Unreadable reply from the spawn helper: %r", line[:200])
+                continue
+            if reply.get("error"):
+                self.failures += 1
+                logger.warning("Couldn't launch %s: %s", reply["argv"][0], reply["error"])
+                continue
+            self.latencies.append(reply["spawned"] - reply["sent"])
+        del self.latencies[:-self.max_samples]
+
+    def stats(self):
+        """
+        Launches requested, failed and done by Qtile itself, and the p50, p95
+        and worst launch latency in milliseconds.
+        """
+        stats = {"requests": self.requests, "failures": self.failures, "fallbacks": self.fallbacks}
+        latencies = sorted(self.latencies)
+        if latencies:
+            stats["p50_ms"] = latencies[len(latencies) // 2] * 1000
+            stats["p95_ms"] = latencies[int(len(latencies) * 0.95)] * 1000
+            stats["max_ms"] = latencies[-1] * 1000
+        return stats
+
+
+def serve(requests=sys.stdin.buffer, replies=sys.stdout.buffer):
+    """
+    The helper's main loop: launch the argv of every JSON request line and
+    answer with a JSON line saying when it was exec'd, or why it wasn't.
+    Programs get the environment of the last request that had one.
+    """
+    # Let the kernel reap the programs launched, but don't pass that on to them.
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    null = [
+        (os.POSIX_SPAWN_OPEN, fd, os.devnull, os.O_RDWR, 0)
+        for fd in (0, 1)
+    ]
+    environ = dict(os.environ)
+    for line in requests:
+        request = json.loads(line)
+        environ = request.get("env", environ)
+        reply = {"argv": request["argv"], "sent": request["sent"]}
+        try:
+            os.posix_spawnp(
+                request["argv"][0],
+                request["argv"],
+                environ,
+                file_actions=null,
+                setsid=True,
+                setsigdef=(signal.SIGCHLD,),
+            )
+        except OSError as e:
+            reply["error"] = str(e)
+        reply["spawned"] = time.monotonic()
+        replies.write(json.dumps(reply).encode() + b"\n")
+        replies.flush()
+
+
+shared = SpawnPool()
+
+
+def _spawn(qtile, command: str):
+    shared.spawn(qtile, command)
+
+
+def spawn(command: str):
+    """
+    A drop-in replacement for `lazy.spawn(command)` that launches through the
+    shared `SpawnPool`. The helper is started along with Qtile.
+
+    command (str): The command line to run.
+    """
+    # Imported here, so that the helper process doesn't load Qtile.
+    from libqtile.command import lazy
+
+    from custom.hooks import subscribe_once
+    subscribe_once("startup_complete", shared.start)
+    return lazy.function(_spawn, command)
+
+
+if __name__ == "__main__":
+    serve()
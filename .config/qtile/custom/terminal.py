@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Keep Alacritty's colors in sync with the Qtile theme.
+
+`sync_alacritty()` renders the `colors:` section of alacritty.yml from a
+`Palette` and swaps it into the file, leaving every other section as it is.
+Themes without a full set of ANSI colors only set the background and
+foreground, and leave the terminal's normal and bright colors alone.
+With `live_config_reload: true`, every open terminal picks the new colors up
+from that one file, so a theme change is a single write however many
+terminals are open. The file is replaced atomically, so a terminal never
+reads half of it, and isn't touched at all if the colors are already right,
+e.g. when the config is reloaded without changing the theme.
+"""
+
+# IMPORTS
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger("libqtile")
+
+ALACRITTY_CONFIG = "~/.config/alacritty/alacritty.yml"
+
+# Alacritty's names for the numbered colors, in order.
+COLOR_NAMES = ("black", "red", "green", "yellow", "blue", "magenta", "cyan", "white")
+
+
+def ansi_colors(palette):
+    """
+    The palette's ANSI colors as ("normal", colors) and ("bright", colors)
+    pairs, or an empty list if it doesn't have a full set.
+
+    Only a palette of exactly 8 or 16 numbered colors is taken as one: the
+    shorter palettes of the flat themes are shades for the bar, and would
+    turn e.g. red and green into grays.
+
+    palette (Palette): The palette to read.
+    """
+    if palette.bright is palette.normal:
+        if len(palette.normal) == 16:
+            return [("normal", palette.normal[:8]), ("bright", palette.normal[8:])]
+        if len(palette.normal) == 8:
+            return [("normal", palette.normal)]
+        return []
+    if len(palette.normal) == 8 and len(palette.bright) == 8:
+        return [("normal", palette.normal), ("bright", palette.bright)]
+    return []
+
+
+def primary_section(palette):
+    """
+    The `primary:` part of the `colors:` section for a palette.
+
+    palette (Palette): The palette to render.
+    """
+    return "\n".join([
+        "  primary:",
+        "    background: '0x{}'".format(palette.bg),
+        "    foreground: '0x{}'".format(palette.fg),
+    ]) + "\n"
+
+
+def colors_section(palette):
+    """
+    The `colors:` section of alacritty.yml for a palette. ANSI colors are
+    only included if the palette has them (see `ansi_colors()`).
+
+    palette (Palette): The palette to render.
+    """
+    lines = ["colors:", primary_section(palette).rstrip("\n")]
+    for group, colors in ansi_colors(palette):
+        lines += ["", "  {}:".format(group)]
+        for name, color in zip(COLOR_NAMES, colors):
+            lines.append("    {:<8} '0x{}'".format(name + ":", color))
+    return "\n".join(lines) + "\n"
+
+
+def find_section(lines: list, name: str, indent: str=""):
+    """
+    The (start, end) line numbers of the YAML section `name` in `lines`, or
+    None if there isn't one. The section runs until the next line that isn't
+    indented more than `indent`.
+
+    lines  (list): The YAML document's lines, with their line endings.
+    name   (str):  The section's key, e.g. "colors".
+    indent (str):  The indentation of the key.
+    """
+    start = next((i for i, line in enumerate(lines) if line.startswith(indent + name + ":")), None)
+    if start is None:
+        return None
+    end = start + 1
+    while end < len(lines) and (
+        not lines[end].strip()
+        or lines[end].startswith(indent) and lines[end][len(indent):len(indent) + 1] in (" ", "\t")
+    ):
+        end += 1
+    # Keep the blank lines that separated this section from the next.
+    while end > start + 1 and not lines[end - 1].strip():
+        end -= 1
+    return start, end
+
+
+def replace_section(text: str, name: str, section: str, indent: str=""):
+    """
+    Replace the YAML section `name` in `text`, or append it if there isn't
+    one. See `find_section()`.
+
+    text    (str): The YAML document.
+    name    (str): The section's key, e.g. "colors".
+    section (str): The new section, starting with "name:".
+    indent  (str): The indentation of the key.
+    """
+    lines = text.splitlines(keepends=True)
+    bounds = find_section(lines, name, indent)
+    if bounds is None:
+        return text + ("" if not text or text.endswith("\n") else "\n") + "\n" + section
+    start, end = bounds
+    return "".join(lines[:start]) + section + "".join(lines[end:])
+
+
+def sync_alacritty(palette, path: str=ALACRITTY_CONFIG):
+    """
+    Write the palette's colors into an alacritty.yml, if they differ from
+    what is there. Returns whether the file was written.
+
+    palette (Palette): The palette to use.
+    path    (str):     The alacritty.yml to update. Symlinks are followed,
+                       so a dotfiles link stays a link.
+    """
+    path = os.path.realpath(os.path.expanduser(path))
+    try:
+        with open(path) as f:
+            text = f.read()
+    except FileNotFoundError:
+        return False
+
+    section = colors_section(palette)
+    if not ansi_colors(palette):
+        # Only set the primary colors, and keep the terminal's own ANSI ones.
+        lines = text.splitlines(keepends=True)
+        bounds = find_section(lines, "colors")
+        if bounds is not None:
+            current = "".join(lines[bounds[0]:bounds[1]])
+            section = replace_section(current, "primary", primary_section(palette), "  ")
+    updated = replace_section(text, "colors", section)
+    if updated == text:
+        return False
+
+    directory = os.path.dirname(path)
+    fd, temporary = tempfile.mkstemp(prefix=".alacritty-", suffix=".yml", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(updated)
+        os.chmod(temporary, os.stat(path).st_mode & 0o777)
+        os.replace(temporary, path)
+    except OSError:
+        logger.exception("Couldn't update %s", path)
+        os.unlink(temporary)
+        return False
+    return True
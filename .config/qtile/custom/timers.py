@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+One timer for every polling widget, aligned to the wall clock.
+
+Each of Qtile's polling widgets keeps its own `update_interval` timer,
+started whenever the widget happened to be configured, so the process wakes
+up at scattered moments, and a clock that only shows minutes still ticks
+every second. `TimerWheel` runs every timer on multiples of its interval
+since the epoch: a 60 second timer fires exactly on the minute, and timers
+whose intervals line up (1 s, 2 s, 60 s, ...) share one wakeup whenever they
+are due together.
+
+The number of wakeups can be read from a running Qtile:
+
+    qtile cmd-obj -f eval -a "__import__('custom.timers').timers.shared.stats()"
+"""
+
+# IMPORTS
+import asyncio
+import logging
+import math
+import time
+
+logger = logging.getLogger("libqtile")
+
+
+class TimerWheel:
+    """
+    Runs repeating callbacks at wall clock multiples of their intervals,
+    batching the ones that are due at the same moment.
+
+    call_later (callable): Scheduler with the signature of
+                           `loop.call_later()`. Defaults to the running
+                           asyncio event loop's.
+    clock      (callable): Returns the current wall clock time in seconds.
+    """
+
+    def __init__(self, call_later=None, clock=time.time):
+        self.wakeups = 0
+        self.calls = 0
+        self._call_later = call_later
+        self._clock = clock
+        self._timers = {}  # Callback -> [deadline, interval]
+        self._handle = None
+        self._deadline = None
+        self._waking = False
+        self._since = clock()
+
+    def next_deadline(self, interval: float, now: float=None):
+        """
+        The first multiple of `interval` since the epoch after `now`.
+        """
+        now = self._clock() if now is None else now
+        return round((math.floor(now / interval) + 1) * interval, 6)
+
+    def add(self, interval: float, callback):
+        """
+        Call `callback()` every `interval` seconds, on multiples of `interval`,
+        until it is removed. Adding it again changes its interval.
+        """
+        self._timers[callback] = [self.next_deadline(interval), interval]
+        self._schedule()
+
+    def remove(self, callback):
+        """
+        Stop calling `callback`.
+        """
+        self._timers.pop(callback, None)
+        self._schedule()
+
+    def _schedule(self):
+        if self._waking:
+            return  # `_wake()` schedules the next wakeup when it is done.
+        deadline = min((timer[0] for timer in self._timers.values()), default=None)
+        if deadline == self._deadline:
+            return
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._deadline = deadline
+        if deadline is not None:
+            call_later = self._call_later or asyncio.get_event_loop().call_later
+            self._handle = call_later(max(deadline - self._clock(), 0), self._wake)
+
+    def _wake(self):
+        self._handle = None
+        self._deadline = None
+        self.wakeups += 1
+        now = self._clock()
+        self._waking = True
+        try:
+            for callback, timer in list(self._timers.items()):
+                # Allow for the event loop waking up a little early.
+                if timer[0] > now + 0.001 or callback not in self._timers:
+                    continue
+                timer[0] = self.next_deadline(timer[1], max(now, timer[0]))
+                self.calls += 1
+                try:
+                    callback()
+                except Exception:
+                    logger.exception("Timer callback %r failed", callback)
+        finally:
+            self._waking = False
+        self._schedule()
+
+    def stats(self):
+        """
+        Wakeups and callbacks run since the wheel was created, per minute,
+        and the number of timers.
+        """
+        minutes = max(self._clock() - self._since, 1e-9) / 60
+        return {
+            "timers": len(self._timers),
+            "wakeups_per_minute": self.wakeups / minutes,
+            "calls_per_minute": self.calls / minutes,
+        }
+
+
+shared = TimerWheel()
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""
+Volume keys that don't start a process per key repeat.
+
+Binding the volume keys to `pamixer --increase 5` starts a process for every
+auto-repeat, and since each one reads the volume before changing it, repeats
+that overlap lose increments. `VolumeControl` keeps the volume it is heading
+for itself, adds each key press to it, and sends only the latest value to the
+sound server, at most once per frame.
+
+The sound server is reached through a backend:
+
+    - `PulseBackend` keeps one connection to PulseAudio (or PipeWire's pulse
+      server) open, through the optional `pulsectl` package. Pass `server`
+      to point it at a test server. The connection is used from a worker
+      thread, so a slow server doesn't block Qtile.
+    - `PamixerBackend` runs `pamixer` in the background, one process at a
+      time, and is used when `pulsectl` isn't installed. A pamixer that
+      hangs is killed after `timeout` seconds.
+
+Anything with the same four methods can be passed in as the backend, e.g. a
+fake one for testing. The getters may return None while the backend doesn't
+know the state yet, in which case the key press is tried again a little
+later, up to `MAX_RETRIES` times.
+
+    Key([], "XF86AudioRaiseVolume", lazy.function(change_volume, 5))
+"""
+
+# IMPORTS
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from custom.events import Coalescer
+
+logger = logging.getLogger("libqtile")
+
+# Seconds to wait before trying a key press again, when the backend doesn't
+# know the volume or mute state yet.
+RETRY_DELAY = 0.05
+
+# How many times a key press is tried again before it is dropped.
+MAX_RETRIES = 20
+
+
+class PulseBackend:
+    """
+    Controls the default sink over a persistent PulseAudio connection.
+
+    pulsectl blocks, so it is only called from a single worker thread, which
+    also keeps the calls in order. The volume and mute state are read there
+    when they haven't been changed from here for `max_age` seconds, and are
+    None until the first read is done.
+
+    server  (str):   Address of the server. Defaults to the usual one.
+    max_age (float): How long to trust the last known volume, in seconds.
+    """
+
+    def __init__(self, server: str=None, max_age: float=1.0):
+        import pulsectl
+        self._pulsectl = pulsectl
+        self.server = server
+        self.max_age = max_age
+        self._pulse = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qtile-volume")
+        self._volume = None
+        self._mute = None
+        self._error = None  # Why the last read failed, if it did.
+        self._updated = float("-inf")
+        self._reading = None  # The future of the running read, if any.
+
+    def _sink(self):
+        if self._pulse is None:
+            self._pulse = self._pulsectl.Pulse("qtile-volume", server=self.server)
+        return self._pulse.get_sink_by_name(self._pulse.server_info().default_sink_name)
+
+    def _retry(self, action):
+        # Reconnect once if the server went away, e.g. after it restarted.
+        try:
+            return action(self._sink())
+        except self._pulsectl.PulseError:
+            if self._pulse is not None:
+                self._pulse.close()
+            self._pulse = None
+            return action(self._sink())
+
+    def _submit(self, action):
+        return asyncio.get_event_loop().run_in_executor(self._executor, self._retry, action)
+
+    def _read_done(self, future, started):
+        self._reading = None
+        try:
+            volume, mute = future.result()
+        except Exception as e:
+            self._error = e
+        else:
+            # Unless it was changed from here in the meantime.
+            if self._updated == started:
+                self._volume = volume
+                self._mute = mute
+            self._error = None
+        self._updated = time.monotonic()
+
+    def _read(self):
+        if self._reading is None and time.monotonic() - self._updated > self.max_age:
+            started = self._updated
+            self._reading = self._submit(lambda sink: (round(sink.volume.value_flat * 100), bool(sink.mute)))
+            self._reading.add_done_callback(lambda future: self._read_done(future, started))
+        if self._volume is None and self._error is not None:
+            raise self._error
+
+    def _change_done(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("Couldn't change the default sink", exc_info=future.exception())
+
+    def _change(self, action):
+        self._updated = time.monotonic()
+        self._submit(action).add_done_callback(self._change_done)
+
+    def get_volume(self):
+        self._read()
+        return self._volume
+
+    def set_volume(self, volume: int):
+        self._volume = volume
+        self._change(lambda sink: self._pulse.volume_set_all_chans(sink, volume / 100))
+
+    def get_mute(self):
+        self._read()
+        return self._mute
+
+    def set_mute(self, mute: bool):
+        self._mute = mute
+        self._change(lambda sink: self._pulse.mute(sink, mute))
+
+
+class PamixerBackend:
+    """
+    Controls the default sink with `pamixer`, without blocking Qtile.
+
+    The volume and mute state are read by a pamixer run in the background,
+    and only when they haven't been changed from here for `max_age` seconds.
+    Until the first read is done they are None. Changes run one pamixer at a
+    time, so they can't finish out of order. Changes made while one runs
+    replace each other, and only the latest is run after it. A pamixer that
+    doesn't finish within `timeout` seconds is killed and counts as failed.
+
+    executable (str):   The pamixer binary.
+    max_age    (float): How long to trust the last known volume, in seconds.
+    timeout    (float): How long one pamixer may run, in seconds.
+    """
+
+    def __init__(self, executable: str="pamixer", max_age: float=1.0, timeout: float=2.0):
+        self.executable = executable
+        self.max_age = max_age
+        self.timeout = timeout
+        self.runs = 0  # pamixer processes started.
+        self._volume = None
+        self._mute = None
+        self._error = None  # Why the last read failed, if it did.
+        self._updated = float("-inf")
+        self._reading = None  # The task reading the state, while it runs.
+        self._changing = None  # The task running changes, while it runs.
+        self._queued = {}  # "volume" or "mute" -> arguments of the next change.
+
+    async def _pamixer(self, *args):
+        self.runs += 1
+        process = await asyncio.create_subprocess_exec(
+            self.executable, *args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            stdout, _ = await asyncio.wait_for(process.communicate(), self.timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise TimeoutError(f"{self.executable} {' '.join(args)} took over {self.timeout}s")
+        return stdout.decode().strip()
+
+    async def _read_state(self):
+        started = self._updated
+        try:
+            volume = await self._pamixer("--get-volume")
+            mute = await self._pamixer("--get-mute")
+            # Unless it was changed from here in the meantime.
+            if self._updated == started and self._changing is None:
+                self._volume = int(volume or 0)
+                self._mute = mute == "true"
+            self._error = None
+        except (OSError, ValueError) as e:
+            self._error = e
+        finally:
+            self._updated = time.monotonic()
+            self._reading = None
+
+    def _read(self):
+        if self._reading is None and self._changing is None and time.monotonic() - self._updated > self.max_age:
+            self._reading = asyncio.get_event_loop().create_task(self._read_state())
+        if self._volume is None and self._error is not None:
+            raise self._error
+
+    async def _run_queued(self):
+        try:
+            while self._queued:
+                _, args = self._queued.popitem()
+                try:
+                    await self._pamixer(*args)
+                except OSError:
+                    logger.exception("Couldn't run %s", self.executable)
+        finally:
+            self._updated = time.monotonic()
+            self._changing = None
+
+    def _run(self, kind: str, *args):
+        self._updated = time.monotonic()
+        self._queued[kind] = args
+        if self._changing is None:
+            self._changing = asyncio.get_event_loop().create_task(self._run_queued())
+
+    def get_volume(self):
+        self._read()
+        return self._volume
+
+    def set_volume(self, volume: int):
+        self._volume = volume
+        self._run("volume", "--set-volume", str(volume))
+
+    def get_mute(self):
+        self._read()
+        return self._mute
+
+    def set_mute(self, mute: bool):
+        self._mute = mute
+        self._run("mute", "--mute" if mute else "--unmute")
+
+
+def default_backend():
+    """
+    A `PulseBackend` if `pulsectl` is installed, otherwise a `PamixerBackend`.
+    """
+    try:
+        return PulseBackend()
+    except ImportError:
+        return PamixerBackend()
+
+
+class VolumeControl:
+    """
+    Changes the volume by steps, sending one change per frame at most.
+
+    backend  (object): The backend to use. Defaults to `default_backend()`,
+                       created on first use.
+    interval (float):  The minimum number of seconds between changes sent to
+                       the sound server.
+    maximum  (int):    The highest volume, in percent.
+    """
+
+    def __init__(self, backend=None, interval: float=1 / 60, maximum: int=100):
+        self.backend = backend
+        self.maximum = maximum
+        self.updates = Coalescer(self._apply, interval)
+        self._target = None  # The volume a queued change is heading for.
+
+    def _backend(self):
+        if self.backend is None:
+            self.backend = default_backend()
+        return self.backend
+
+    def _apply(self, volume: int):
+        self._target = None
+        try:
+            self._backend().set_volume(volume)
+        except Exception:
+            logger.exception("Couldn't set the volume")
+
+    def _later(self, action, *args, attempt: int):
+        # Try a key press again once the backend may know the state.
+        if attempt >= MAX_RETRIES:
+            logger.warning("The volume backend still doesn't know the state, dropping the key press")
+            return
+        asyncio.get_event_loop().call_later(RETRY_DELAY, action, *args, attempt + 1)
+
+    def change(self, delta: int):
+        """
+        Change the volume by `delta` percent, on top of any queued change.
+        """
+        self._change(delta, 0)
+
+    def _change(self, delta: int, attempt: int):
+        try:
+            current = self._backend().get_volume() if self._target is None else self._target
+        except Exception:
+            logger.exception("Couldn't read the volume")
+            return
+        if current is None:
+            self._later(self._change, delta, attempt=attempt)
+            return
+        self._target = max(0, min(self.maximum, current + delta))
+        self.updates.push(self._target)
+
+    def toggle_mute(self):
+        """
+        Mute or unmute.
+        """
+        self._toggle_mute(0)
+
+    def _toggle_mute(self, attempt: int):
+        try:
+            backend = self._backend()
+            mute = backend.get_mute()
+            if mute is None:
+                self._later(self._toggle_mute, attempt=attempt)
+                return
+            backend.set_mute(not mute)
+        except Exception:
+            logger.exception("Couldn't toggle mute")
+
+
+shared = VolumeControl()
+
+
+def change_volume(qtile, delta: int):
+    """
+    Change the volume by `delta` percent. Bind with
+    `lazy.function(change_volume, 5)`.
+    """
+    shared.change(delta)
+
+
+def toggle_mute(qtile):
+    """
+    Mute or unmute. Bind with `lazy.function(toggle_mute)`.
+    """
+    shared.toggle_mute()
@@ -0,0 +1,522 @@
+# -*- coding: utf-8 -*-
+"""
+Widgets used by the bar in `config.py`.
+"""
+
+# IMPORTS
+import asyncio
+import functools
+import re
+import string
+
+import cairocffi
+from libqtile import widget
+from libqtile.widget import base
+from libqtile.widget.prompt import CommandCompleter
+
+from custom import completion, cores, gpu, netdev, routes, sampler, timers
+from custom.events import Coalescer
+from custom.palette import rgb
+from custom.sampler import cpu_percent
+
+# Divisors for the `measure_mem` option of `SampledMemory`.
+# /proc/meminfo reports values in kB.
+MEMORY_MEASURES = {
+    "G": 1024 * 1024,
+    "M": 1024,
+    "K": 1,
+    "B": 1 / 1024,
+}
+
+
+def format_bytes(num_bytes: float):
+    """
+    Format a byte count with a decimal unit, the same way `widget.Net` does.
+
+    num_bytes (float): The number of bytes.
+    """
+    for unit in ("B", "kB", "MB", "GB"):
+        if abs(num_bytes) < 1000:
+            break
+        num_bytes /= 1000
+    else:
+        unit = "TB"
+    return "{:.2f}{}".format(num_bytes, unit)
+
+
+# strftime directives that show seconds.
+SECONDS_DIRECTIVES = set("STXcrs")
+
+
+class AlignedTimer:
+    """
+    Mixed into a polling widget to run its timer on the shared `TimerWheel`,
+    on wall clock multiples of `update_interval`, instead of on its own.
+    """
+
+    def timer_setup(self):
+        self.tick()
+        if self.update_interval:
+            timers.shared.add(self.update_interval, self.tick)
+
+    def finalize(self):
+        timers.shared.remove(self.tick)
+        super().finalize()
+
+
+class AlignedClock(AlignedTimer, widget.Clock):
+    """
+    A `widget.Clock` on the shared `TimerWheel`. Unless `update_interval` is
+    given, a format without seconds ticks once a minute, exactly on the
+    minute, instead of every second.
+    """
+
+    def __init__(self, **config):
+        widget.Clock.__init__(self, **config)
+        if "update_interval" not in config:
+            directives = set(re.findall(r"%[-_0^#]?(\w)", self.format))
+            self.update_interval = 1.0 if directives & SECONDS_DIRECTIVES else 60.0
+
+
+class SampledCPU(AlignedTimer, base.InLoopPollText):
+    """
+    A drop-in replacement for `widget.CPU` that reads the shared sampler.
+
+    Only `{load_percent}` is available in the format string.
+    """
+
+    defaults = [
+        ("format", "CPU {load_percent}%", "Formatting for the displayed text."),
+        ("update_interval", 1.0, "Update interval for the CPU widget."),
+        ("sampler", None, "The `ProcSampler` to read from. Defaults to the shared one."),
+    ]
+
+    def __init__(self, **config):
+        base.InLoopPollText.__init__(self, "", **config)
+        self.add_defaults(SampledCPU.defaults)
+        self.sampler = self.sampler or sampler.shared
+        self._previous = None
+
+    def poll(self):
+        current = self.sampler.snapshot().cpu["cpu"]
+        previous, self._previous = self._previous, current
+        if previous is None:
+            load = 0.0
+        else:
+            load = cpu_percent(previous, current)
+        return self.format.format(load_percent=round(load, 1))
+
+
+class CPUHeat(AlignedTimer, base._Widget):
+    """
+    Per-core CPU load over the last `samples` ticks, as a heat strip: time
+    runs from left to right, and each row of pixels is a group of cores,
+    colored by the busiest of them. A single saturated core shows up, where
+    `widget.CPU` averages it away.
+
+    The strip is rendered into a cached image when a sample comes in, once
+    per tick; redraws in between only paint that image. Uses NumPy if it is
+    installed (see `custom.cores`).
+    """
+
+    defaults = [
+        ("update_interval", 1.0, "Update interval in seconds."),
+        ("samples", 30, "Number of samples shown."),
+        ("sample_width", 2, "Width of a sample in pixels."),
+        ("colors", ("282828", "d79921", "cc241d"), "Colors from idle to fully busy."),
+        ("procfs", "/proc", "Where procfs is mounted."),
+    ]
+
+    def __init__(self, **config):
+        base._Widget.__init__(self, 0, **config)
+        self.add_defaults(CPUHeat.defaults)
+        self.length = self.samples * self.sample_width
+        self.history = cores.default_history(self.samples, self.procfs)
+        self._lut = self.history.lut(self.colors)
+        self._surface = None
+
+    def _configure(self, qtile, bar):
+        base._Widget._configure(self, qtile, bar)
+        self._pixels = self.history.pixels(bar.height, self.sample_width)
+        self._surface = cairocffi.ImageSurface.create_for_data(
+            self._pixels, cairocffi.FORMAT_ARGB32, self.length, bar.height,
+        )
+
+    def tick(self):
+        if self.history.update():
+            self.history.render(self._pixels, self.bar.height, self.sample_width, self._lut)
+            self._surface.mark_dirty()
+            self.draw()
+
+    def draw(self):
+        self.drawer.clear(self.background or self.bar.background)
+        self.drawer.ctx.set_source_surface(self._surface)
+        self.drawer.ctx.paint()
+        self.drawer.draw(offsetx=self.offsetx, offsety=self.offsety, width=self.length)
+
+
+class SampledMemory(AlignedTimer, base.InLoopPollText):
+    """
+    A drop-in replacement for `widget.Memory` that reads the shared sampler.
+    """
+
+    defaults = [
+        ("format", "{MemUsed: .0f}{mm}/{MemTotal: .0f}{mm}", "Formatting for the displayed text."),
+        ("update_interval", 1.0, "Update interval for the Memory widget."),
+        ("measure_mem", "M", "Measurement for memory (G, M, K, B)."),
+        ("measure_swap", "M", "Measurement for swap (G, M, K, B)."),
+        ("sampler", None, "The `ProcSampler` to read from. Defaults to the shared one."),
+    ]
+
+    def __init__(self, **config):
+        base.InLoopPollText.__init__(self, "", **config)
+        self.add_defaults(SampledMemory.defaults)
+        self.sampler = self.sampler or sampler.shared
+
+    def poll(self):
+        memory = self.sampler.snapshot().memory
+        total = memory["MemTotal"]
+        free = memory["MemFree"]
+        available = memory.get("MemAvailable", free)
+        cached = memory.get("Cached", 0) + memory.get("SReclaimable", 0)
+
+        # Match psutil's definition of used memory.
+        used = total - free - memory.get("Buffers", 0) - cached
+        if used < 0:
+            used = total - free
+
+        swap_total = memory.get("SwapTotal", 0)
+        swap_free = memory.get("SwapFree", 0)
+        mem = MEMORY_MEASURES[self.measure_mem]
+        swap = MEMORY_MEASURES[self.measure_swap]
+
+        return self.format.format(
+            MemUsed=used / mem,
+            MemTotal=total / mem,
+            MemFree=free / mem,
+            MemPercent=round(100 * (total - available) / total, 1),
+            Buffers=memory.get("Buffers", 0) / mem,
+            Active=memory.get("Active", 0) / mem,
+            Inactive=memory.get("Inactive", 0) / mem,
+            Shmem=memory.get("Shmem", 0) / mem,
+            SwapTotal=swap_total / swap,
+            SwapFree=swap_free / swap,
+            SwapUsed=(swap_total - swap_free) / swap,
+            SwapPercent=round(100 * (swap_total - swap_free) / swap_total, 1) if swap_total else 0.0,
+            mm=self.measure_mem,
+            ms=self.measure_swap,
+        )
+
+
+class SmoothedNet(AlignedTimer, base.InLoopPollText):
+    """
+    A replacement for `widget.Net` that reads only its interface's line of
+    /proc/net/dev, and keeps a window of history for smoothed rates.
+
+    Besides `{interface}`, `{down}`, `{up}` and `{total}`, the format can use
+    `{down_avg}`, `{up_avg}` and `{total_avg}`, moving averages over about
+    `smoothing` seconds, and `{down_p95}` and `{up_p95}`, the 95th percentile
+    over the last `window` seconds.
+
+    With `interface="auto"`, the widget shows the interface of the default
+    route, following it through netlink as it moves between ethernet, wifi
+    and a VPN; `{interface}` is then its name, or "-" while there is none.
+    With `interface="all"`, it shows the total of every interface that
+    doesn't match `exclude`. Both read every interface's counters in one
+    pass per tick.
+    """
+
+    defaults = [
+        ("format", "{interface}: {down} ↓↑ {up}", "Formatting for the displayed text."),
+        ("interface", "wlan0", 'The interface to monitor, "auto" or "all".'),
+        ("exclude", r"lo$|veth|docker|br-|virbr|tun|tap|wg", 'Interfaces left out of "all".'),
+        ("update_interval", 1.0, "Update interval for the Net widget."),
+        ("window", 60, "Seconds of history for the percentile fields."),
+        ("smoothing", 10.0, "Time constant of the average fields, in seconds."),
+        ("procfs", "/proc", "Where procfs is mounted."),
+    ]
+
+    def __init__(self, **config):
+        base.InLoopPollText.__init__(self, "", **config)
+        self.add_defaults(SmoothedNet.defaults)
+        size = round(self.window / self.update_interval) if self.update_interval else 1
+        if self.interface in ("auto", "all"):
+            reader = netdev.NetDevReader(root=self.procfs)
+            self.rates = netdev.InterfaceRates(reader, size, self.smoothing, self.exclude)
+            self.routes = routes.shared if self.procfs == "/proc" else routes.RouteMonitor(self.procfs)
+        else:
+            reader = netdev.NetDevReader(self.interface, self.procfs)
+            self.rates = netdev.NetRates(reader, size, self.smoothing)
+        self._fields = {field for _, field, _, _ in string.Formatter().parse(self.format) if field}
+
+    def _configure(self, qtile, bar):
+        base.InLoopPollText._configure(self, qtile, bar)
+        if self.interface == "auto":
+            qtile.call_soon(self._watch_routes)
+
+    def _watch_routes(self):
+        self.routes.watch(asyncio.get_event_loop())
+
+    def finalize(self):
+        self.rates.reader.close()
+        super().finalize()
+
+    def poll(self):
+        if self.interface == "auto":
+            interface = self.routes.interface
+            # No default route: count no interface rather than all of them.
+            down, up = self.rates.update(interface=interface or "")
+            interface = interface or "-"
+        elif self.interface == "all":
+            interface = "all"
+            down, up = self.rates.update()
+        else:
+            interface = self.interface
+            down, up = self.rates.update()
+        fields = {
+            "interface": interface,
+            "down": format_bytes(down),
+            "up": format_bytes(up),
+            "total": format_bytes(down + up),
+            "down_avg": format_bytes(self.rates.down.average),
+            "up_avg": format_bytes(self.rates.up.average),
+            "total_avg": format_bytes(self.rates.down.average + self.rates.up.average),
+        }
+        # Only sort the window if the format shows a percentile.
+        if "down_p95" in self._fields:
+            fields["down_p95"] = format_bytes(self.rates.down.percentile(95))
+        if "up_p95" in self._fields:
+            fields["up_p95"] = format_bytes(self.rates.up.percentile(95))
+        return self.format.format(**fields)
+
+
+class AsyncNvidiaSensors(AlignedTimer, base.InLoopPollText):
+    """
+    A non-blocking replacement for `widget.NvidiaSensors`.
+
+    Polling only formats the last reading of a shared, long-lived nvidia-smi
+    process (see `custom.gpu`), so a slow GPU driver can't stall the bar.
+    """
+
+    defaults = [
+        ("format", "{temp}°C", "Format of the displayed text. Fields: temp, fan_speed, perf."),
+        ("executable", "nvidia-smi", "The nvidia-smi binary to run."),
+        ("gpu_bus_id", "", "Bus ID of the GPU to read. Empty for the first GPU."),
+        ("update_interval", 2.0, "Update interval in seconds."),
+        ("threshold", 70, "Temperature at which to switch to `foreground_alert`."),
+        ("foreground_alert", "ff0000", "Foreground color when over `threshold`."),
+    ]
+
+    def __init__(self, **config):
+        base.InLoopPollText.__init__(self, "", **config)
+        self.add_defaults(AsyncNvidiaSensors.defaults)
+        self.reader = gpu.get_reader(self.executable, self.update_interval, self.gpu_bus_id)
+        self._reading = False
+
+    def _configure(self, qtile, bar):
+        base.InLoopPollText._configure(self, qtile, bar)
+        if not self._reading:
+            self.reader.start()
+            self._reading = True
+
+    def finalize(self):
+        # The reader is shared; its nvidia-smi is killed once no widget uses it.
+        if self._reading:
+            self.reader.stop()
+            self._reading = False
+        super().finalize()
+
+    def poll(self):
+        if self.reader.stale:
+            return "N/A"
+
+        sensors = self.reader.latest
+        try:
+            hot = int(sensors["temp"]) > self.threshold
+        except ValueError:
+            hot = False
+        self.layout.colour = self.foreground_alert if hot else self.foreground
+        return self.format.format(**sensors)
+
+
+@functools.lru_cache(maxsize=64)
+def render_arrow(foreground: str, background: str, direction: str, width: int, height: int):
+    """
+    Rasterize a powerline arrow once. The surfaces for the most recently used
+    64 combinations of arguments are kept.
+
+    foreground (str): Hexadecimal code for the arrow color.
+    background (str): Hexadecimal code for the color behind the arrow.
+    direction  (str): "left" (◀) or "right" (▶).
+    width      (int): Width of the arrow in pixels.
+    height     (int): Height of the arrow in pixels.
+    """
+    surface = cairocffi.ImageSurface(cairocffi.FORMAT_ARGB32, width, height)
+    ctx = cairocffi.Context(surface)
+    ctx.set_source_rgba(*rgb(background))
+    ctx.paint()
+
+    ctx.set_source_rgba(*rgb(foreground))
+    if direction == "left":
+        ctx.move_to(width, 0)
+        ctx.line_to(0, height / 2)
+        ctx.line_to(width, height)
+    else:
+        ctx.move_to(0, 0)
+        ctx.line_to(width, height / 2)
+        ctx.line_to(0, height)
+    ctx.close_path()
+    ctx.fill()
+    return surface
+
+
+class Arrow(base._Widget):
+    """
+    A powerline-style arrow, drawn from a cached surface rather than laid out
+    as text on every redraw. It is half as wide as the bar is tall.
+    """
+
+    defaults = [
+        ("direction", "right", "Which way the arrow points, \"left\" or \"right\"."),
+        ("foreground", "ffffff", "Color of the arrow."),
+    ]
+
+    def __init__(self, **config):
+        base._Widget.__init__(self, 0, **config)
+        self.add_defaults(Arrow.defaults)
+
+    def _configure(self, qtile, bar):
+        base._Widget._configure(self, qtile, bar)
+        self.length = bar.height // 2
+
+    def draw(self):
+        surface = render_arrow(
+            self.foreground,
+            self.background or self.bar.background,
+            self.direction,
+            self.length,
+            self.bar.height,
+        )
+        self.drawer.ctx.set_source_surface(surface)
+        self.drawer.ctx.paint()
+        self.drawer.draw(offsetx=self.offsetx, offsety=self.offsety, width=self.length)
+
+
+class DebouncedWindowName(widget.WindowName):
+    """
+    A `widget.WindowName` that updates at most once per `latency` seconds.
+
+    With `follow_mouse_focus`, moving the mouse over a stack of windows fires
+    a focus change for every window crossed. Only the last one in each
+    interval is shown, and a title that didn't change isn't laid out again.
+    """
+
+    defaults = [
+        ("latency", 1 / 60, "Minimum seconds between updates. The default is one frame."),
+    ]
+
+    def __init__(self, **config):
+        widget.WindowName.__init__(self, **config)
+        self.add_defaults(DebouncedWindowName.defaults)
+        self.updates = Coalescer(self._hook_response, self.latency)
+
+    def hook_response(self, *args):
+        self.updates.push(*args)
+
+    def _hook_response(self, *args):
+        widget.WindowName.hook_response(self, *args)
+
+    def update(self, text):
+        if text != self.text:
+            widget.WindowName.update(self, text)
+
+    def finalize(self):
+        self.updates.cancel()
+        widget.WindowName.finalize(self)
+
+
+class DebouncedCurrentLayout(widget.CurrentLayout):
+    """
+    A `widget.CurrentLayout` that updates at most once per `latency` seconds,
+    and only for layout changes on its own screen.
+    """
+
+    defaults = [
+        ("latency", 1 / 60, "Minimum seconds between updates. The default is one frame."),
+    ]
+
+    def __init__(self, **config):
+        widget.CurrentLayout.__init__(self, **config)
+        self.add_defaults(DebouncedCurrentLayout.defaults)
+        self.updates = Coalescer(self._hook_response, self.latency)
+
+    def hook_response(self, layout, group):
+        if group.screen is not None and group.screen == self.bar.screen:
+            self.updates.push(layout, group)
+
+    def _hook_response(self, layout, group):
+        if layout.name != self.text:
+            widget.CurrentLayout.hook_response(self, layout, group)
+
+    def finalize(self):
+        self.updates.cancel()
+        widget.CurrentLayout.finalize(self)
+
+
+class IndexedCommandCompleter(CommandCompleter):
+    """
+    A `CommandCompleter` that looks commands up in the shared
+    `custom.completion.PathIndex` instead of globbing every $PATH directory.
+    Paths (starting with "~" or "/") are completed as before.
+    """
+
+    def complete(self, txt, *args, **kwargs):
+        if txt and txt[0] in "~/":
+            return CommandCompleter.complete(self, txt, *args, **kwargs)
+        if self.lookup is None:
+            self.lookup = completion.shared.complete(txt)
+            self.lookup.append((txt, txt))
+            self.offset = -1
+        self.offset = (self.offset + 1) % len(self.lookup)
+        display, self.thisfinal = self.lookup[self.offset]
+        return display
+
+
+class IndexedPrompt(widget.Prompt):
+    """
+    A `widget.Prompt` whose command completion uses the shared PATH index,
+    ranked by how often each command was launched from it.
+    """
+
+    completers = dict(widget.Prompt.completers, cmd=IndexedCommandCompleter)
+
+    def __init__(self, **config):
+        # Keep the name `lazy.spawncmd()` looks for.
+        config.setdefault("name", "prompt")
+        widget.Prompt.__init__(self, **config)
+        self._watching = False
+
+    def _configure(self, qtile, bar):
+        widget.Prompt._configure(self, qtile, bar)
+        qtile.call_soon(self._watch_path)
+
+    def _watch_path(self):
+        if self._watching:
+            return
+        loop = asyncio.get_event_loop()
+        # Without a cache, this scans every $PATH directory, so keep it off
+        # the event loop.
+        loop.run_in_executor(None, completion.shared.refresh)
+        completion.shared.watch(loop)
+        self._watching = True
+
+    def finalize(self):
+        if self._watching:
+            completion.shared.stop()
+            self._watching = False
+        widget.Prompt.finalize(self)
+
+    def _send_cmd(self):
+        if isinstance(self.completer, IndexedCommandCompleter):
+            completion.shared.record(self.user_input)
+        widget.Prompt._send_cmd(self)
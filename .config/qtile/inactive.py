@@ -14,10 +14,40 @@ from libqtile.config import (
 from libqtile import (
     bar,
     layout,
-    widget,
     qtile,
 )
 
+from custom.commands import prebind
+from custom.groups import switch_group
+from custom.keys import find_conflicts
+from custom.layouts import (
+    CachedMonadTall,
+    CompiledFloating,
+)
+
+# Widgets are imported the first time they're created, so ones that
+# are disabled through QTILE_DISABLED_WIDGETS cost nothing at startup.
+from custom.lazy import (
+    present,
+    widget,
+)
+from custom.palette import Palette
+from custom.spawn import spawn
+from custom.terminal import sync_alacritty
+from custom.volume import (
+    change_volume,
+    toggle_mute,
+)
+from custom.widgets import (
+    AlignedClock,
+    AsyncNvidiaSensors,
+    CPUHeat,
+    IndexedPrompt,
+    SampledCPU,
+    SampledMemory,
+    SmoothedNet,
+)
+
 mod = "mod4"            # Set the windows key as the mod key.
 terminal = "alacritty"  # Set Alacritty as the default terminal.
 
@@ -39,7 +69,7 @@ keys = [
         lazy.layout.toggle_split(),
         desc="Toggle between split and unsplit sides of stack",
     ),
-    Key([mod], "Return", lazy.spawn(terminal), desc="Launch terminal"),
+    Key([mod], "Return", spawn(terminal), desc="Launch terminal"),
     Key([mod], "Tab", lazy.next_layout(), desc="Toggle between layouts"),
     Key([mod], "w", lazy.window.kill(), desc="Kill focused window"),
     Key([mod, "control"], "r", lazy.reload_config(), desc="Reload the config"),
@@ -47,14 +77,15 @@ keys = [
     Key([mod], "r", lazy.spawncmd(), desc="Spawn a command using a prompt widget"),
 
     # Bindings for the volume keys.
-    Key([], "XF86AudioLowerVolume", lazy.spawn("pamixer --decrease 5")),
-    Key([], "XF86AudioRaiseVolume", lazy.spawn("pamixer --increase 5")),
-    Key([], "XF86AudioMute", lazy.spawn("pamixer --toggle-mute")),
+    # Held down, repeats are added up and sent once per frame.
+    Key([], "XF86AudioLowerVolume", lazy.function(change_volume, -5)),
+    Key([], "XF86AudioRaiseVolume", lazy.function(change_volume, 5)),
+    Key([], "XF86AudioMute", lazy.function(toggle_mute)),
 
     # Bindings for screenshotting.
     # Use Win + Shift + S to save a screenshot to .screenshots.
     Key([mod, "shift"], "s",
-        lazy.spawn("maim -s -u | xclip -selection clipboard -t image/png -i"),
+        spawn("maim -s -u | xclip -selection clipboard -t image/png -i"),
         desc="Screenshot a selected area of the screen and save it to the clipboard."
     ),
 ]
@@ -81,9 +112,17 @@ for num_key, (name, params) in enumerate(group_names, 1):
 
     # Number each group and bind its number to a key.
     # For instance, if "SYS" is group 3, Mod + 3 switches to it.
-    keys.append(Key([mod], str(num_key), lazy.group[name].toscreen()))         # Switch to another group.
+    keys.append(Key([mod], str(num_key), lazy.function(switch_group, name)))   # Switch to another group.
     keys.append(Key([mod, "shift"], str(num_key), lazy.window.togroup(name)))  # Send window to another group.
 
+# Resolve every binding to the chord Qtile grabs, once,
+# and warn about any that clash.
+key_conflicts = find_conflicts(keys)
+
+# Look up what each `lazy` command calls once, instead of on every
+# press. Lookups are redone only when the layout, group or focus changes.
+prebind(keys)
+
 
 # LAYOUTS
 # 
@@ -226,6 +265,13 @@ rezza = {
 
 theme = rezza
 
+# Check and parse the theme's colors once, rather than looking them up
+# in the nested dicts every time a widget needs one.
+palette = Palette.from_theme(theme)
+
+# Give Alacritty the same colors. Open terminals pick them up live.
+sync_alacritty(palette)
+
 # Change this to true if you'd like gaps between
 # your windows.
 use_gaps = True
@@ -234,15 +280,15 @@ use_gaps = True
 # most layouts will have in common.
 layout_defaults = {
     "border_width":  1,
-    "border_focus":  theme["dark"][1],
-    "border_normal": theme["dark"][0],
+    "border_focus":  palette.normal[1],
+    "border_normal": palette.normal[0],
     "margin":        12 if use_gaps else 0, 
 }
 
 layouts = [
     layout.Stack(**layout_defaults),
     layout.Max(),
-    layout.MonadTall(**layout_defaults),
+    CachedMonadTall(**layout_defaults),
 ]
 
 # WIDGETS
@@ -253,13 +299,13 @@ widget_defaults = {
     "font":       "Ubuntu Mono Bold",
     "fontsize":   12,
     "padding":    6,
-    "foreground": theme["primary"]["fg"],
+    "foreground": palette.fg,
 }
 colored_widget_defaults = {
     "font":       "Ubuntu Mono Bold",
     "fontsize":   12,
     "padding":    6,
-    "foreground": theme["primary"]["bg"]
+    "foreground": palette.bg
 }
 
 # This is redundant as of now.
@@ -338,105 +384,109 @@ def icon(icon: str, foreground: str, background: str):
 screens = [
     Screen(
         top=bar.Bar(
-            [
+            present([
                 # Right hand side of the bar.
-                separator(theme["primary"]["bg"]),
-                icon("\u2318", theme["primary"]["fg"], theme["primary"]["bg"]),
+                separator(palette.bg),
+                icon("\u2318", palette.fg, palette.bg),
                 widget.TextBox(
                     text=" Workspaces:",
                     **widget_defaults,
                 ),
-                right_arrow(theme["primary"]["bg"], theme["dark"][0]),
-                right_arrow(theme["dark"][0], theme["light"][1]),
-                separator(theme["light"][1]),
+                right_arrow(palette.bg, palette.normal[0]),
+                right_arrow(palette.normal[0], palette.bright[1]),
+                separator(palette.bright[1]),
                 widget.GroupBox(
                     font="Ubuntu Mono",
                     highlight_method="line",
-                    highlight_color=theme["light"][1],
+                    highlight_color=palette.bright[1],
                     padding_y=2,
                     margin_x=8,
                     padding_x=3,
                     borderwidth=1,
-                    active=theme["light"][7],
-                    inactive=theme["primary"]["bg"],
-                    this_current_screen_border=theme["primary"]["fg"],
-                    background=theme["light"][1],
+                    active=palette.bright[7],
+                    inactive=palette.bg,
+                    this_current_screen_border=palette.fg,
+                    background=palette.bright[1],
                     fontsize=widget_defaults["fontsize"],
                     paddin=widget_defaults["padding"],
                 ),
-                right_arrow(theme["light"][1], theme["dark"][1]),
-                separator(theme["dark"][1]),
-                icon("\u2387", theme["primary"]["bg"], theme["dark"][1]),
+                right_arrow(palette.bright[1], palette.normal[1]),
+                separator(palette.normal[1]),
+                icon("\u2387", palette.bg, palette.normal[1]),
                 widget.CurrentLayout(
-                    background=theme["dark"][1],
+                    background=palette.normal[1],
                     **colored_widget_defaults,
                 ),
-                separator(theme["dark"][1]),
-                widget.Prompt(
-                    background=theme["dark"][1],
-                    cursor_color=theme["primary"]["fg"],
+                separator(palette.normal[1]),
+                IndexedPrompt(
+                    background=palette.normal[1],
+                    cursor_color=palette.fg,
                     **widget_defaults,
                 ),
-                right_arrow(theme["dark"][1], theme["light"][1]),
-                right_arrow(theme["light"][1], theme["dark"][0]),
-                right_arrow(theme["dark"][0], theme["primary"]["bg"]),
-                separator(theme["primary"]["bg"]),
+                right_arrow(palette.normal[1], palette.bright[1]),
+                right_arrow(palette.bright[1], palette.normal[0]),
+                right_arrow(palette.normal[0], palette.bg),
+                separator(palette.bg),
                 widget.WindowName(
                     **widget_defaults,
                 ),
-                separator(theme["primary"]["bg"]),
+                separator(palette.bg),
 
                 # Right hand side of the bar.
                 # Use arrows for a powerline-style effect.
-                separator(theme["primary"]["bg"]),
-                left_arrow(theme["dark"][0], theme["primary"]["bg"], padding=-5),
-                left_arrow(theme["light"][1], theme["dark"][0], padding=-5),
-                left_arrow(theme["dark"][1], theme["light"][1]),
-                icon("\u26c1", theme["primary"]["bg"], theme["dark"][1]),
-                widget.Net(
-                    interface="wlan0",
+                separator(palette.bg),
+                left_arrow(palette.normal[0], palette.bg, padding=-5),
+                left_arrow(palette.bright[1], palette.normal[0], padding=-5),
+                left_arrow(palette.normal[1], palette.bright[1]),
+                icon("\u26c1", palette.bg, palette.normal[1]),
+                SmoothedNet(
+                    interface="auto",
                     format="{down} ↓↑ {up}",
-                    background=theme["dark"][1],
+                    background=palette.normal[1],
                     **colored_widget_defaults,
                 ),
-                separator(theme["dark"][1]),
-                left_arrow(theme["light"][2], theme["dark"][1]),
-                left_arrow(theme["dark"][2], theme["light"][2]),
-                widget.CPU(
+                separator(palette.normal[1]),
+                left_arrow(palette.bright[2], palette.normal[1]),
+                left_arrow(palette.normal[2], palette.bright[2]),
+                SampledCPU(
                     format="CPU: {load_percent}%",
-                    background=theme["dark"][2],
+                    background=palette.normal[2],
                     **colored_widget_defaults,
                 ),
-                separator(theme["dark"][2]),
-                left_arrow(theme["light"][3], theme["dark"][2]),
-                left_arrow(theme["dark"][3], theme["light"][3]),
-                widget.Memory(
+                CPUHeat(
+                    colors=(palette.normal[2], palette.bright[2], palette.bg),
+                    background=palette.normal[2],
+                ),
+                separator(palette.normal[2]),
+                left_arrow(palette.bright[3], palette.normal[2]),
+                left_arrow(palette.normal[3], palette.bright[3]),
+                SampledMemory(
                     measure_mem="G",
                     format="Mem: {MemUsed:.1f}/{MemTotal:.1f}GB",
-                    background=theme["dark"][3],
+                    background=palette.normal[3],
                     **colored_widget_defaults,
                 ),
-                separator(theme["dark"][3]),
-                left_arrow(theme["light"][4], theme["dark"][3]),
-                left_arrow(theme["dark"][4], theme["light"][4]),
-                widget.NvidiaSensors(
+                separator(palette.normal[3]),
+                left_arrow(palette.bright[4], palette.normal[3]),
+                left_arrow(palette.normal[4], palette.bright[4]),
+                AsyncNvidiaSensors(
                     format="GPU: {perf} {temp}°C",
-                    background=theme["dark"][4],
+                    background=palette.normal[4],
                     **colored_widget_defaults,
                 ),
-                separator(theme["dark"][4]),
-                left_arrow(theme["light"][5], theme["dark"][4]),
-                left_arrow(theme["dark"][5], theme["light"][5]),
-                icon("\u231b", theme["primary"]["bg"], theme["dark"][5]),
-                widget.Clock(
+                separator(palette.normal[4]),
+                left_arrow(palette.bright[5], palette.normal[4]),
+                left_arrow(palette.normal[5], palette.bright[5]),
+                icon("\u231b", palette.bg, palette.normal[5]),
+                AlignedClock(
                     format="%A, %B %d - %H:%M",
-                    background=theme["dark"][5],
+                    background=palette.normal[5],
                     **colored_widget_defaults,
                 ),
-                separator(theme["dark"][5]),
-            ],
+                separator(palette.normal[5]),
+            ]),
             24,
-            background=theme["primary"]["bg"],
+            background=palette.bg,
         ),
     ),
 ]
@@ -448,12 +498,17 @@ mouse = [
     Click([mod], "Button2", lazy.window.bring_to_front()),
 ]
 
+# Move or resize a dragged window at most once per frame, to
+# the latest pointer position, however fast the mouse reports.
+prebind(mouse, drag_interval=1 / 60)
+
 dgroups_key_binder = None
 dgroups_app_rules = []  # type: list
 follow_mouse_focus = True
 bring_front_click = False
 cursor_warp = False
-floating_layout = layout.Floating(
+# Float rules are indexed once, rather than tried one by one for every window.
+floating_layout = CompiledFloating(
     float_rules=[
         # Run the utility of `xprop` to see the wm class and name of an X client.
         *layout.Floating.default_float_rules,
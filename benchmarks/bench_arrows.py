@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Time to draw the bar's powerline arrows as 37pt "Ubuntu Mono" text, like the
+old `widget.TextBox` arrows, versus blitting the cached surfaces from
+`custom.widgets.render_arrow()`.
+
+Each "frame" draws the same 11 arrows as the bar in `config.py` onto a 24px
+high image surface. Text layouts are built once up front, as a TextBox does,
+so the text numbers are only the per-redraw cost.
+
+Needs Qtile (for cairocffi and its pango bindings), but no X server.
+
+    python benchmarks/bench_arrows.py [--frames N]
+"""
+
+# IMPORTS
+import argparse
+import time
+
+import cairocffi
+import fakeproc  # noqa: F401 (puts the Qtile config on sys.path)
+from libqtile import pangocffi
+
+from custom.palette import rgb
+from custom.widgets import render_arrow
+
+HEIGHT = 24
+COLORS = ["151515", "191919", "282828", "323232", "3b3b3b", "0841a9"]
+ARROWS = (
+    [("right", COLORS[i + 1], COLORS[i]) for i in range(5)]
+    + [("left", COLORS[i + 1], COLORS[i]) for i in range(5)]
+    + [("left", COLORS[1], COLORS[0])]
+)
+
+
+def text_frame(ctx, layouts):
+    x = 0
+    for (_, foreground, background), layout in zip(ARROWS, layouts):
+        width = layout.get_pixel_size()[0] - 8  # padding=-4 on both sides.
+        ctx.set_source_rgba(*rgb(background))
+        ctx.rectangle(x, 0, width, HEIGHT)
+        ctx.fill()
+        ctx.set_source_rgba(*rgb(foreground))
+        ctx.move_to(x - 4, (HEIGHT - layout.get_pixel_size()[1]) / 2)
+        ctx.show_layout(layout)
+        x += width
+
+
+def surface_frame(ctx):
+    x = 0
+    for direction, foreground, background in ARROWS:
+        ctx.set_source_surface(render_arrow(foreground, background, direction, HEIGHT // 2, HEIGHT), x, 0)
+        ctx.paint()
+        x += HEIGHT // 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--frames", type=int, default=2000)
+    args = parser.parse_args()
+
+    surface = cairocffi.ImageSurface(cairocffi.FORMAT_ARGB32, 1920, HEIGHT)
+    ctx = pangocffi.patch_cairo_context(cairocffi.Context(surface))
+    font = pangocffi.FontDescription.from_string("Ubuntu Mono")
+    font.set_absolute_size(pangocffi.units_from_double(37))
+    layouts = []
+    for direction, _, _ in ARROWS:
+        layout = ctx.create_layout()
+        layout.set_font_description(font)
+        layout.set_text("◀" if direction == "left" else "▶")
+        layouts.append(layout)
+
+    start = time.perf_counter()
+    for _ in range(args.frames):
+        text_frame(ctx, layouts)
+    text = (time.perf_counter() - start) / args.frames * 1e6
+
+    render_arrow.cache_clear()
+    start = time.perf_counter()
+    for _ in range(args.frames):
+        surface_frame(ctx)
+    cached = (time.perf_counter() - start) / args.frames * 1e6
+
+    print("%d arrows per frame, %d frames" % (len(ARROWS), args.frames))
+    print("TextBox glyphs:  %8.1f us/frame" % text)
+    print("cached surfaces: %8.1f us/frame (%s)" % (cached, render_arrow.cache_info()))
+
+
+if __name__ == "__main__":
+    main()
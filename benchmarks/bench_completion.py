@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Command completion over a synthetic PATH of 20,000 executables: globbing
+every directory on each completion, as Qtile's `CommandCompleter` does,
+versus `custom.completion.PathIndex`.
+
+Reported are the first index build, a cold start from the cache file (a new
+index, as after restarting Qtile), the update after one executable is added,
+and per-completion times for prefix and fuzzy queries.
+
+    python benchmarks/bench_completion.py [--entries N] [--dirs N]
+"""
+
+# IMPORTS
+import argparse
+import glob
+import os
+import random
+import string
+import tempfile
+import time
+
+import fakeproc  # noqa: F401 (puts the Qtile config on sys.path)
+
+from custom.completion import PathIndex
+
+QUERIES = ["a", "fi", "gi", "pyth", "xdg-", "qtl", "zz"]
+
+
+def glob_complete(directories: list, text: str):
+    # What CommandCompleter does for every new completion.
+    matches = []
+    for directory in directories:
+        for command in glob.iglob(os.path.join(directory, "%s*" % text)):
+            if os.access(command, os.X_OK):
+                matches.append((os.path.basename(command), command))
+    return sorted(matches)
+
+
+def make_path(root: str, entries: int, dirs: int):
+    directories = [os.path.join(root, "bin%d" % i) for i in range(dirs)]
+    for directory in directories:
+        os.mkdir(directory)
+    for i in range(entries):
+        name = "".join(random.choice(string.ascii_lowercase + "-") for _ in range(random.randint(3, 12)))
+        path = os.path.join(random.choice(directories), "%s%d" % (name, i))
+        with open(path, "w"):
+            pass
+        os.chmod(path, 0o755)
+    return directories
+
+
+def timed(function, *args, repeat: int=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function(*args)
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--dirs", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        directories = make_path(root, args.entries, args.dirs)
+        path = ":".join(directories)
+        cache = os.path.join(root, "cache")
+
+        ms, _ = timed(PathIndex(path, cache).refresh)
+        print("first build:          %8.2f ms" % ms)
+        ms, _ = timed(PathIndex(path, cache).refresh)
+        print("cold start from cache: %7.2f ms" % ms)
+
+        index = PathIndex(path, cache)
+        index.refresh()
+        new = os.path.join(directories[0], "qtile-new-command")
+        with open(new, "w"):
+            pass
+        os.chmod(new, 0o755)
+        ms, _ = timed(index.refresh)
+        print("update after 1 new:   %8.2f ms (%d directory scanned)" % (ms, index.scans))
+
+        for query in QUERIES:
+            glob_ms, expected = timed(glob_complete, directories, query, repeat=3)
+            index_ms, matches = timed(index.complete, query, repeat=20)
+            agrees = sorted(matches) == expected or not expected
+            print("%-6r glob %8.2f ms, index %6.3f ms, %5d matches%s" % (
+                query, glob_ms, index_ms, len(matches), "" if agrees else " (DIFFERENT)",
+            ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Sample and render cost of the per-core CPU heat strip, for 4 to 128 cores on
+a fake /proc/stat, with `NumpyCoreHistory` and with the plain Python
+`CoreHistory` it falls back to.
+
+"Sample" is reading /proc/stat and adding every core's load to the history;
+"render" is turning the history into the strip's pixels, done once per
+sample. Redraws between samples only paint the cached image, which costs
+the same for any number of cores; with cairocffi installed that is timed as
+"paint".
+
+    python benchmarks/bench_cores.py [--ticks N] [--height N]
+"""
+
+# IMPORTS
+import argparse
+import tempfile
+import time
+
+from fakeproc import FakeProc
+
+from custom.cores import CoreHistory, NumpyCoreHistory
+
+COLORS = ["323232", "0841a9", "fafafa"]
+SAMPLE_WIDTH = 2
+
+
+def measure(history: CoreHistory, fake: FakeProc, ticks: int, height: int):
+    pixels = history.pixels(height, SAMPLE_WIDTH)
+    lut = history.lut(COLORS)
+    history.update()
+    sample = render = 0.0
+    for _ in range(ticks):
+        fake.tick()
+        start = time.perf_counter()
+        history.update()
+        middle = time.perf_counter()
+        history.render(pixels, height, SAMPLE_WIDTH, lut)
+        sample += middle - start
+        render += time.perf_counter() - middle
+    return sample / ticks * 1e6, render / ticks * 1e6, pixels
+
+
+def paint(pixels, width: int, height: int, ticks: int):
+    import cairocffi
+    image = cairocffi.ImageSurface.create_for_data(pixels, cairocffi.FORMAT_ARGB32, width, height)
+    target = cairocffi.ImageSurface(cairocffi.FORMAT_ARGB32, width, height)
+    ctx = cairocffi.Context(target)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        ctx.set_source_surface(image)
+        ctx.paint()
+    return (time.perf_counter() - start) / ticks * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--ticks", type=int, default=500)
+    parser.add_argument("--height", type=int, default=24, help="Bar height in pixels.")
+    args = parser.parse_args()
+
+    backends = [("python", CoreHistory)]
+    try:
+        NumpyCoreHistory()
+        backends.insert(0, ("numpy", NumpyCoreHistory))
+    except ImportError:
+        print("numpy isn't installed, only timing the plain Python fallback")
+
+    print("%-7s %6s %12s %12s %12s" % ("", "cores", "sample us", "render us", "paint us"))
+    for name, cls in backends:
+        for cores in (4, 8, 16, 32, 64, 128):
+            with tempfile.TemporaryDirectory() as root:
+                fake = FakeProc(root, cores=cores)
+                history = cls(root=root)
+                sample, render, pixels = measure(history, fake, args.ticks, args.height)
+                try:
+                    painted = "%12.1f" % paint(pixels, history.samples * SAMPLE_WIDTH, args.height, args.ticks)
+                except ImportError:
+                    painted = "%12s" % "-"
+                print("%-7s %6d %12.1f %12.1f %s" % (name, cores, sample, render, painted))
+
+
+if __name__ == "__main__":
+    main()
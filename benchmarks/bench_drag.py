@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+A synthetic mouse drag: motion events at a gaming mouse's polling rate,
+delivered to the drag command from `config.py`, run on every event versus
+throttled to one per frame by `custom.commands.prebind(drag_interval=...)`.
+
+Moving the window is simulated by a busy wait of `--move-us` microseconds,
+roughly a configure request plus the resulting redraws. Reported are the
+motion events applied and dropped, the share of the run spent moving the
+window and whether it ended up at the last pointer position.
+
+Needs Qtile installed, but no X server. For end-to-end numbers drive a real
+drag under Xvfb with `xdotool` (XTest) and read `custom.commands.stats()`.
+
+    python benchmarks/bench_drag.py [--rate N] [--seconds N] [--move-us N]
+"""
+
+# IMPORTS
+import argparse
+import asyncio
+import time
+
+import fakeproc  # noqa: F401 (puts the Qtile config on sys.path)
+
+from libqtile.command import lazy
+
+from custom.commands import PreResolved
+
+
+class FakeWindow:
+    def __init__(self, move_us: float):
+        self.move_us = move_us
+        self.position = None
+        self.moving = 0.0
+
+    def command(self, name):
+        return self.set_position_floating
+
+    def set_position_floating(self, x, y):
+        start = time.monotonic()
+        while time.monotonic() - start < self.move_us / 1e6:
+            pass
+        self.position = (x, y)
+        self.moving += time.monotonic() - start
+
+
+class FakeQtile:
+    def __init__(self, window):
+        self.window = window
+
+    def select(self, selectors):
+        return self.window
+
+
+async def run(command, qtile, rate: int, seconds: float):
+    start = time.monotonic()
+    events = 0
+    while time.monotonic() - start < seconds:
+        events += 1
+        command(qtile, events, events // 2)
+        await asyncio.sleep(1 / rate)
+    await asyncio.sleep(0.05)  # Let the last queued move run.
+    return events, time.monotonic() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rate", type=int, default=1000, help="Motion events per second.")
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--move-us", type=float, default=800)
+    args = parser.parse_args()
+
+    for name, interval in (("every event", None), ("throttled", 1 / 60)):
+        window = FakeWindow(args.move_us)
+        command = PreResolved(lazy.window.set_position_floating(), interval)
+        events, elapsed = asyncio.run(run(command, FakeQtile(window), args.rate, args.seconds))
+        print(
+            "%-12s %5d events (%4.0f/s), %5d applied, %5d dropped, %4.1f%% of time moving, final position %s" % (
+                name + ":",
+                events,
+                events / elapsed,
+                command.presses,
+                command.updates.dropped if command.updates else 0,
+                100 * window.moving / elapsed,
+                "correct" if window.position == (events, events // 2) else "stale",
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
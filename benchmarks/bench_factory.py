@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Construction time and memory per screen for the bar in `config.py`, built by
+`custom.factory.build_bar()`, split into working out the segments' settings
+and creating the widgets.
+
+Needs Qtile installed, but not running.
+
+    python benchmarks/bench_factory.py [--runs N]
+"""
+
+# IMPORTS
+import argparse
+import os
+import time
+import tracemalloc
+
+from fakeproc import QTILE_CONFIG
+
+from custom.factory import build_bar, segment_config
+from custom.reload import load_config
+
+
+def settings_only(spec: list):
+    return [segment_config(segment) for segment in spec]
+
+
+def measure(function, spec: list, runs: int):
+    """
+    Average construction time in ms, and the memory held by one built bar.
+    """
+    start = time.perf_counter()
+    for _ in range(runs):
+        function(spec)
+    elapsed = (time.perf_counter() - start) / runs * 1000
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    widgets = function(spec)
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del widgets
+    return elapsed, held
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    spec = load_config(os.path.join(os.path.normpath(QTILE_CONFIG), "config.py")).bar_spec
+    print("%d segments per screen, %d runs" % (len(spec), args.runs))
+    for name, function in (("settings", settings_only), ("whole bar", build_bar)):
+        elapsed, held = measure(function, spec, args.runs)
+        print("%-10s %7.3f ms/screen, %7.1f KiB/screen" % (name + ":", elapsed, held / 1024))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Float rule matching for 1,000 synthetic windows against 200 rules:
+`layout.Floating` trying each `Match` in turn versus the index of
+`custom.layouts.CompiledFloating`.
+
+The rules are Qtile's defaults plus generated wm_class, title and regex rules
+and a few with several properties. Each window is matched when it appears and
+again after three title changes. Reported are the time per match, the
+window property reads (X round trips on a real server) per match. Both must
+agree on every window, or the benchmark fails.
+
+Needs Qtile installed, but no X server.
+
+    python benchmarks/bench_floating.py [--windows N] [--rules N]
+"""
+
+# IMPORTS
+import argparse
+import random
+import re
+import time
+
+import fakeproc  # noqa: F401 (puts the Qtile config on sys.path)
+
+from libqtile import layout
+from libqtile.config import Match
+
+from custom.layouts import CompiledFloating
+
+WM_TYPES = ["normal"] * 20 + ["dialog", "utility", "splash", "toolbar", "notification"]
+
+
+class FakeWindow:
+    reads = 0
+
+    def __init__(self, wid: int, wm_class: str, title: str, wm_type: str):
+        self.wid = wid
+        self.name = title
+        self._wm_class = [wm_class.lower(), wm_class]
+        self._wm_type = wm_type
+
+    def __hash__(self):
+        return self.wid
+
+    def get_wm_class(self):
+        FakeWindow.reads += 1
+        return self._wm_class
+
+    def get_wm_type(self):
+        FakeWindow.reads += 1
+        return self._wm_type
+
+    def get_wm_role(self):
+        FakeWindow.reads += 1
+        return None
+
+    def get_pid(self):
+        FakeWindow.reads += 1
+        return 1000 + self.wid
+
+    def has_fixed_size(self):
+        FakeWindow.reads += 1
+        return False
+
+    def has_fixed_ratio(self):
+        FakeWindow.reads += 1
+        return False
+
+    def match(self, rule):
+        return rule.compare(self)
+
+
+def make_rules(count: int):
+    rules = list(layout.Floating.default_float_rules)
+    i = 0
+    while len(rules) < count:
+        kind = i % 4
+        if kind == 0:
+            rules.append(Match(wm_class="App%d" % i))
+        elif kind == 1:
+            rules.append(Match(title="Dialog %d" % i))
+        elif kind == 2:
+            rules.append(Match(title=re.compile(r"Progress \(%d%%\)" % i)))
+        else:
+            rules.append(Match(wm_class="Tool%d" % i, wm_type="dialog"))
+        i += 1
+    return rules
+
+
+def make_windows(count: int, rules: int):
+    windows = []
+    for wid in range(count):
+        n = random.randrange(rules * 2)
+        wm_class = random.choice(["App%d" % n, "Tool%d" % n, "Alacritty", "firefox"])
+        title = random.choice(["Dialog %d" % n, "Progress (%d%%)" % n, "~/src", "Mozilla Firefox"])
+        windows.append(FakeWindow(wid, wm_class, title, random.choice(WM_TYPES)))
+    return windows
+
+
+def run(floating, windows: list):
+    FakeWindow.reads = 0
+    results = []
+    start = time.perf_counter()
+    for win in windows:
+        title = win.name
+        for suffix in ("", " - 1", " - 2", " - 3"):
+            win.name = title + suffix
+            results.append(floating.match(win))
+        win.name = title
+    matches = len(windows) * 4
+    return (time.perf_counter() - start) / matches, FakeWindow.reads / matches, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--windows", type=int, default=1000)
+    parser.add_argument("--rules", type=int, default=200)
+    args = parser.parse_args()
+
+    rules = make_rules(args.rules)
+    windows = make_windows(args.windows, args.rules)
+    results = {}
+    for name, cls in (("Floating", layout.Floating), ("CompiledFloating", CompiledFloating)):
+        seconds, reads, results[name] = run(cls(float_rules=rules), windows)
+        print("%-17s %7.2f us/match, %5.2f property reads/match, %d floating" % (
+            name + ":", seconds * 1e6, reads, sum(results[name]),
+        ))
+    assert results["Floating"] == results["CompiledFloating"], "CompiledFloating disagrees with Floating"
+    print("results agree")
+
+
+if __name__ == "__main__":
+    main()
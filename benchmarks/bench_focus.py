@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+A synthetic focus storm: several hundred focus changes per second, delivered
+through Qtile's `client_focus` hook, to a handler that redraws on every event
+versus one behind a `custom.events.Coalescer` with a one-frame budget.
+
+The redraw is simulated by a busy wait of `--draw-us` microseconds, roughly a
+title layout plus a bar redraw. Reported are the redraws done, the events
+dropped, the share of the run spent drawing and the worst delay between the
+last event and the redraw that showed it.
+
+Uses Qtile's hook module when Qtile is installed, and calls the handlers
+directly otherwise.
+
+    python benchmarks/bench_focus.py [--rate N] [--seconds N] [--draw-us N]
+"""
+
+# IMPORTS
+import argparse
+import asyncio
+import time
+
+import fakeproc  # noqa: F401 (puts the Qtile config on sys.path)
+
+from custom.events import Coalescer
+
+try:
+    from libqtile import hook
+except ImportError:
+    hook = None
+
+
+class Storm:
+    def __init__(self, draw_us: float, coalesce: bool):
+        self.draw_us = draw_us
+        self.draws = 0
+        self.drawing = 0.0
+        self.worst = 0.0
+        self.last_event = None
+        self.updates = Coalescer(self.draw, 1 / 60) if coalesce else None
+
+    def on_focus(self, *args):
+        self.last_event = time.monotonic()
+        if self.updates is not None:
+            self.updates.push()
+        else:
+            self.draw()
+
+    def draw(self):
+        start = time.monotonic()
+        while time.monotonic() - start < self.draw_us / 1e6:
+            pass
+        self.draws += 1
+        self.drawing += time.monotonic() - start
+        self.worst = max(self.worst, time.monotonic() - self.last_event)
+
+
+async def run(storm: Storm, rate: int, seconds: float):
+    if hook is not None:
+        hook.subscriptions.clear()
+        hook.subscribe.client_focus(storm.on_focus)
+        fire = lambda: hook.fire("client_focus", None)  # noqa: E731
+    else:
+        fire = storm.on_focus
+
+    start = time.monotonic()
+    events = 0
+    while time.monotonic() - start < seconds:
+        fire()
+        events += 1
+        await asyncio.sleep(1 / rate)
+    await asyncio.sleep(0.05)  # Let the last queued update run.
+    return events, time.monotonic() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rate", type=int, default=500, help="Focus changes per second.")
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--draw-us", type=float, default=400)
+    args = parser.parse_args()
+
+    print("via %s" % ("Qtile hooks" if hook is not None else "direct calls"))
+    for name, coalesce in (("every event", False), ("coalesced", True)):
+        storm = Storm(args.draw_us, coalesce)
+        events, elapsed = asyncio.run(run(storm, args.rate, args.seconds))
+        print(
+            "%-12s %5d events (%4.0f/s), %5d redraws, %5d dropped, %4.1f%% of time drawing, worst latency %5.1f ms" % (
+                name + ":",
+                events,
+                events / elapsed,
+                storm.draws,
+                storm.updates.dropped if coalesce else 0,
+                100 * storm.drawing / elapsed,
+                storm.worst * 1000,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
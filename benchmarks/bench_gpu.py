@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Event loop lag with a slow `nvidia-smi`, polling it the way
+`widget.NvidiaSensors` does versus reading a long-lived process with
+`custom.gpu.NvidiaSmiReader`.
+
+Uses `benchmarks/fake-nvidia-smi`, so no GPU is needed. A 10ms heartbeat runs
+on the loop and the worst delay it sees is reported as the lag.
+
+    python benchmarks/bench_gpu.py [--delay SECONDS] [--seconds N]
+"""
+
+# IMPORTS
+import argparse
+import asyncio
+import os
+import subprocess
+import time
+
+import fakeproc  # noqa: F401 (puts the Qtile config on sys.path)
+
+from custom.gpu import NvidiaSmiReader
+
+FAKE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake-nvidia-smi")
+
+
+async def heartbeat(seconds: float):
+    """
+    Tick every 10ms for `seconds` and return the worst lateness in ms.
+    """
+    worst = 0.0
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        start = time.monotonic()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.monotonic() - start - 0.01)
+    return worst * 1000
+
+
+async def blocking(seconds: float, interval: float):
+    """
+    Start a new nvidia-smi on every poll, in the loop, like the stock widget.
+    """
+    async def poll():
+        while True:
+            subprocess.run([FAKE, "--query-gpu=temperature.gpu"], capture_output=True)
+            await asyncio.sleep(interval)
+
+    task = asyncio.ensure_future(poll())
+    lag = await heartbeat(seconds)
+    task.cancel()
+    return lag, None
+
+
+async def streaming(seconds: float, interval: float):
+    """
+    Read a single looping nvidia-smi through asyncio.
+    """
+    reader = NvidiaSmiReader(FAKE, interval)
+    reader.start()
+    lag = await heartbeat(seconds)
+    reader.stop()
+    return lag, reader
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--delay", type=float, default=0.2, help="Seconds the fake nvidia-smi stalls for.")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--interval", type=float, default=0.5)
+    args = parser.parse_args()
+    os.environ["FAKE_NVIDIA_SMI_DELAY"] = str(args.delay)
+
+    lag, _ = asyncio.run(blocking(args.seconds, args.interval))
+    print("process per poll:  worst loop lag %7.1f ms" % lag)
+    lag, reader = asyncio.run(streaming(args.seconds, args.interval))
+    print("long-lived reader: worst loop lag %7.1f ms, last reading %s" % (lag, reader.latest))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Switching to a group of 5, 25 and 100 windows and back, with Qtile's
+MonadTall layout versus `CachedMonadTall`, and Qtile's Max for reference.
+
+Uses the dummy windows from `bench_relayout.py`, which count the X requests
+a real window would send. A switch goes the way `Screen.set_group()` does
+it: the group being shown is laid out and its layout's `show()` called, then
+every window of the group being left is hidden and its layout's `hide()`
+called. Reported are the time and X requests per switch.
+
+Needs Qtile installed, but no X server. For key press to frame latency on
+a real session, switch groups with `custom.groups.switch_group()` and read
+`custom.groups.stats()`.
+
+    python benchmarks/bench_groupswitch.py [--switches N]
+"""
+
+# IMPORTS
+import argparse
+import time
+
+from libqtile import layout
+
+from bench_relayout import SCREEN, DummyGroup, DummyWindow
+from custom.layouts import CachedMonadTall
+
+
+def show(group):
+    # Group.set_screen(): the window that gets focus is the current one of
+    # the group being shown.
+    current = group.layout.clients.current_client
+    for w in group.windows:
+        w.has_focus = w is current
+    group.layout_all()
+    group.layout.show(SCREEN)
+
+
+def hide(group):
+    # Group.hide()
+    for w in group.windows:
+        w.hide()
+    group.layout.hide()
+
+
+def run(cls, count: int, switches: int):
+    groups = []
+    for g in range(2):
+        windows = [DummyWindow("%d-%d" % (g, i)) for i in range(count)]
+        group = DummyGroup(windows)
+        group.layout = cls().clone(group)
+        for w in windows:
+            group.layout.add(w)
+        groups.append(group)
+    show(groups[0])
+    show(groups[1])
+    hide(groups[0])
+
+    requests = sum(w.requests for g in groups for w in g.windows)
+    start = time.perf_counter()
+    for i in range(switches):
+        show(groups[i % 2])
+        hide(groups[(i + 1) % 2])
+    elapsed = time.perf_counter() - start
+    requests = sum(w.requests for g in groups for w in g.windows) - requests
+    return elapsed / switches, requests / switches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--switches", type=int, default=200)
+    args = parser.parse_args()
+
+    for count in (5, 25, 100):
+        for name, cls in (
+            ("Max", layout.Max),
+            ("MonadTall", layout.MonadTall),
+            ("CachedMonadTall", CachedMonadTall),
+        ):
+            seconds, requests = run(cls, count, args.switches)
+            print("%3d windows, %-16s %8.1f us/switch, %6.1f X requests/switch" % (
+                count, name + ":", seconds * 1e6, requests,
+            ))
+
+
+if __name__ == "__main__":
+    main()
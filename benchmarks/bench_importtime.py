@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Cold-start import cost of loading a Qtile config, measured with
+`python -X importtime`.
+
+Each config is loaded in a fresh interpreter with the Qtile config directory
+on `sys.path`, like Qtile does. Reported are the total import time, the number
+of modules imported, whether psutil was pulled in, and the slowest imports.
+
+To compare against an older version of a config, check it out next to the
+current one and pass both:
+
+    git show HEAD~1:.config/qtile/inactive.py > .config/qtile/inactive_old.py
+    python benchmarks/bench_importtime.py .config/qtile/inactive_old.py .config/qtile/inactive.py
+
+Set QTILE_DISABLED_WIDGETS to see the effect of leaving widgets out. Needs
+Qtile installed, but not running.
+"""
+
+# IMPORTS
+import argparse
+import os
+import subprocess
+import sys
+
+from fakeproc import QTILE_CONFIG
+
+LOADER = "import runpy, sys; sys.path.insert(0, {dir!r}); runpy.run_path({path!r})"
+
+
+def importtime(path: str):
+    """
+    Run the config under -X importtime and return {module: (self us, cumulative us)}.
+    """
+    code = LOADER.format(dir=os.path.dirname(os.path.abspath(path)), path=os.path.abspath(path))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(own), int(cumulative))
+    if result.returncode:
+        print(result.stderr.splitlines()[-1])
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "configs",
+        nargs="*",
+        default=[os.path.join(QTILE_CONFIG, "inactive.py"), os.path.join(QTILE_CONFIG, "config.py")],
+    )
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to show.")
+    args = parser.parse_args()
+
+    for path in args.configs:
+        modules = importtime(path)
+        total = sum(own for own, _ in modules.values())
+        print("%s: %.1f ms in %d imports, psutil %s" % (
+            os.path.relpath(path),
+            total / 1000,
+            len(modules),
+            "imported" if "psutil" in modules else "not imported",
+        ))
+        slowest = sorted(modules.items(), key=lambda item: -item[1][1])[:args.top]
+        for name, (own, cumulative) in slowest:
+            print("    %8.1f ms  %s" % (cumulative / 1000, name))
+
+
+if __name__ == "__main__":
+    main()
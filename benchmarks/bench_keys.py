@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Key dispatch latency: a linear scan over the `keys` list versus a table keyed
+by (modifier mask, keysym), the way Qtile dispatches key presses.
+
+Thousands of synthetic key events (mostly bound chords, some unbound) are
+replayed against the bindings from `config.py`. Each event resolves its
+modifier mask and keysym to a binding, resolved with the helpers of
+`custom.keys`. Latency percentiles are reported in nanoseconds per event,
+along with the conflicts `custom.keys.find_conflicts()` finds.
+
+Uses stand-in Key objects, so Qtile doesn't need to be installed.
+
+    python benchmarks/bench_keys.py [--events N]
+"""
+
+# IMPORTS
+import argparse
+import random
+import time
+from collections import namedtuple
+
+import fakeproc  # noqa: F401 (puts the Qtile config on sys.path)
+
+from custom.keys import find_conflicts, keysym, modifier_mask
+
+Key = namedtuple("Key", ["modifiers", "key", "desc"])
+
+MOD = "mod4"
+BINDINGS = (
+    [([MOD], k) for k in ("h", "l", "j", "k", "space", "n", "Return", "Tab", "w", "r")]
+    + [([MOD, "shift"], k) for k in ("h", "l", "j", "k", "Return")]
+    + [([MOD, "control"], k) for k in ("r", "q")]
+    + [([], k) for k in ("XF86AudioLowerVolume", "XF86AudioRaiseVolume", "XF86AudioMute")]
+    + [([MOD], str(n)) for n in range(1, 8)]
+    + [([MOD, "shift"], str(n)) for n in range(1, 8)]
+)
+KEYS = [Key(modifiers, key, "") for modifiers, key in BINDINGS]
+
+
+def linear(keys, mask, sym):
+    for key in keys:
+        if modifier_mask(key.modifiers) == mask and keysym(key.key) == sym:
+            return key
+    return None
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return [samples[int(len(samples) * p / 100)] for p in (50, 95, 99)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--events", type=int, default=20000)
+    args = parser.parse_args()
+
+    table = {(modifier_mask(key.modifiers), keysym(key.key)): key for key in KEYS}
+    conflicts = find_conflicts(KEYS)
+    events = []
+    for _ in range(args.events):
+        if random.random() < 0.8:
+            modifiers, key = random.choice(BINDINGS)
+        else:
+            modifiers, key = [MOD, "mod1"], random.choice("abcdefgxyz")
+        events.append((modifier_mask(modifiers), keysym(key)))
+
+    print("%d bindings, %d conflicts, %d events" % (len(KEYS), len(conflicts), len(events)))
+    for name, dispatch in (("linear scan", lambda m, s: linear(KEYS, m, s)), ("hash table", lambda m, s: table.get((m, s)))):
+        samples = []
+        for mask, sym in events:
+            start = time.perf_counter_ns()
+            dispatch(mask, sym)
+            samples.append(time.perf_counter_ns() - start)
+        p50, p95, p99 = percentiles(samples)
+        print("%-12s p50 %6d ns, p95 %6d ns, p99 %6d ns" % (name + ":", p50, p95, p99))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Per-tick cost of reading one interface's rates: parsing all of /proc/net/dev,
+as `SampledNet` and `widget.Net` do, versus `custom.netdev.NetRates`.
+
+Memory is measured with tracemalloc: the most memory allocated at once during
+a tick, which is what the tick costs the allocator, and how much is still
+held after all the ticks, which should be nothing. Time is measured without
+tracemalloc running. The fake procfs has lo, eth0, wlan0 and `--interfaces`
+veth interfaces; the reader is tried on wlan0, near the top, and on the last
+veth.
+
+    python benchmarks/bench_netdev.py [--ticks N] [--interfaces N]
+"""
+
+# IMPORTS
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from array import array
+
+from fakeproc import FakeProc
+
+from custom.netdev import NetDevReader, NetRates
+from custom.sampler import parse_net_dev
+
+
+def parse_all(root: str, interface: str):
+    with open(os.path.join(root, "net", "dev")) as f:
+        return parse_net_dev(f.read()).get(interface)
+
+
+def measure(fake: FakeProc, ticks: int, function, *args):
+    # Time, without tracemalloc.
+    elapsed = 0.0
+    for _ in range(ticks):
+        fake.tick()
+        start = time.perf_counter()
+        function(*args)
+        elapsed += time.perf_counter() - start
+
+    # Memory. The counters aren't advanced here, so that only what the
+    # function allocates is traced.
+    function(*args)  # Warm up caches, e.g. the compiled regex.
+    tracemalloc.start()
+    peaks = array("q", bytes(8 * ticks))
+    for i in range(ticks):
+        if i == 1:
+            baseline = tracemalloc.get_traced_memory()[0]
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        function(*args)
+        peaks[i] = tracemalloc.get_traced_memory()[1] - current
+    held = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return elapsed / ticks * 1e6, sorted(peaks)[ticks // 2], held
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--interfaces", type=int, default=40, help="Extra veth interfaces.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        fake = FakeProc(root, interfaces=args.interfaces)
+        last = fake.interfaces[-1]
+        print("fake /proc/net/dev with %d interfaces, %d ticks" % (len(fake.interfaces), args.ticks))
+        print("%-32s %9s %13s %11s" % ("", "us/tick", "peak B/tick", "held after"))
+
+        cases = [
+            ("parse all, wlan0", parse_all, root, "wlan0"),
+            ("parse all, %s" % last, parse_all, root, last),
+        ]
+        try:
+            import psutil
+            cases.append(("psutil pernic (real /proc)", psutil.net_io_counters, True))
+        except ImportError:
+            pass
+        for interface in ("wlan0", last):
+            cases.append(("NetRates, %s" % interface, NetRates(NetDevReader(interface, root)).update))
+
+        for name, function, *arguments in cases:
+            cost, peak, held = measure(fake, args.ticks, function, *arguments)
+            print("%-32s %9.1f %13d %11d" % (name, cost, peak, held))
+
+
+if __name__ == "__main__":
+    main()
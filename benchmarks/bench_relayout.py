@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Relayout cost of `layout.MonadTall` versus `custom.layouts.CachedMonadTall`
+with 10, 50 and 200 windows.
+
+Dummy windows stand in for X clients and count the X requests a real window
+would send: a configure request, a border change and a ConfigureNotify per
+placement, and one request per hide or unhide. Each round shuffles the
+focused window down, moves focus, and every tenth round normalizes. Reported
+are the time per relayout and the X requests per relayout.
+
+Needs Qtile installed, but no X server. For end-to-end numbers run Qtile
+under Xvfb with many terminals open and read the layout's `relayout_stats`
+command.
+
+    python benchmarks/bench_relayout.py [--rounds N]
+"""
+
+# IMPORTS
+import argparse
+import time
+from types import SimpleNamespace
+
+import fakeproc  # noqa: F401 (puts the Qtile config on sys.path)
+
+from libqtile import layout
+
+from custom.layouts import CachedMonadTall
+
+SCREEN = SimpleNamespace(x=0, y=24, width=2560, height=1416)
+
+
+class DummyWindow:
+    def __init__(self, name: str):
+        self.name = name
+        self.hidden = True
+        self.has_focus = False
+        self.requests = 0
+        self.x = self.y = self.width = self.height = 0
+        self.borderwidth = 0
+        self.bordercolor = None
+
+    def __repr__(self):
+        return "DummyWindow({!r})".format(self.name)
+
+    def place(self, x, y, width, height, borderwidth, bordercolor, above=False, margin=None, respect_hints=False):
+        if margin is not None:
+            if isinstance(margin, int):
+                margin = [margin] * 4
+            x += margin[3]
+            y += margin[0]
+            width -= margin[1] + margin[3]
+            height -= margin[0] + margin[2]
+        self.x, self.y, self.width, self.height = x, y, width, height
+        self.borderwidth, self.bordercolor = borderwidth, bordercolor
+        self.requests += 3
+
+    def hide(self):
+        self.hidden = True
+        self.requests += 1
+
+    def unhide(self):
+        self.hidden = False
+        self.requests += 1
+
+
+class DummyGroup:
+    def __init__(self, windows: list):
+        self.windows = windows
+        self.layout = None
+        self.screen = SimpleNamespace(get_rect=lambda: SCREEN)
+
+    def layout_all(self, warp=False):
+        self.layout.layout(self.windows, SCREEN)
+
+    def focus(self, window, *args, **kwargs):
+        for w in self.windows:
+            w.has_focus = w is window
+        self.layout.focus(window)
+        self.layout_all()
+
+
+def run(cls, count: int, rounds: int):
+    windows = [DummyWindow(str(i)) for i in range(count)]
+    group = DummyGroup(windows)
+    group.layout = cls(border_width=2, margin=12).clone(group)
+    for w in windows:
+        group.layout.add(w)
+    group.focus(windows[0])
+
+    requests = sum(w.requests for w in windows)
+    start = time.perf_counter()
+    for i in range(rounds):
+        group.layout.cmd_shuffle_down()
+        group.focus(group.layout.clients.current_client)
+        group.focus(windows[i % count])
+        if i % 10 == 0:
+            group.layout.cmd_normalize()
+    elapsed = time.perf_counter() - start
+    relayouts = rounds * 3 + rounds // 10
+    return elapsed / relayouts, (sum(w.requests for w in windows) - requests) / relayouts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    for count in (10, 50, 200):
+        for name, cls in (("MonadTall", layout.MonadTall), ("CachedMonadTall", CachedMonadTall)):
+            seconds, requests = run(cls, count, args.rounds)
+            print("%3d windows, %-16s %8.1f us/relayout, %6.1f X requests/relayout" % (
+                count, name + ":", seconds * 1e6, requests,
+            ))
+
+
+if __name__ == "__main__":
+    main()
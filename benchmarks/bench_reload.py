@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Reload latency of `config.py` for a theme-only change and a keybinding-only
+change, using `custom.reload`.
+
+For each change this reports the time to re-run the config, the time to diff
+it against the previous run, and how many widgets the incremental reload
+leaves alone, recolors or recreates. A full `lazy.reload_config()` re-runs the
+config too and then finalizes and rebuilds every widget, so "widgets rebuilt
+by a full reload" is the work the incremental path saves.
+
+Needs Qtile installed, but not running.
+
+    python benchmarks/bench_reload.py [--runs N]
+"""
+
+# IMPORTS
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from fakeproc import QTILE_CONFIG
+
+from custom.reload import diff_config, load_config
+
+CHANGES = {
+    "theme only": ("theme = blue_gradient", "theme = hybrid"),
+    "keybinding only": ('Key([mod], "w", lazy.window.kill()', 'Key([mod], "x", lazy.window.kill()'),
+}
+
+
+def timed(function, runs: int, *args):
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = function(*args)
+    return (time.perf_counter() - start) / runs * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        original = os.path.join(os.path.normpath(QTILE_CONFIG), "config.py")
+        changed = os.path.join(tmp, "config.py")
+        live = load_config(original)
+        widgets = sum(len(screen.top.widgets) for screen in live.screens)
+
+        for name, (old, new) in CHANGES.items():
+            shutil.copy(original, changed)
+            with open(changed) as f:
+                source = f.read()
+            with open(changed, "w") as f:
+                f.write(source.replace(old, new))
+
+            load_ms, config = timed(load_config, args.runs, changed)
+            diff_ms, plan = timed(diff_config, args.runs, live, config)
+            print("%s:" % name)
+            print("  re-run config.py:        %6.2f ms" % load_ms)
+            print("  diff against live:       %6.2f ms" % diff_ms)
+            print("  full reload needed:      %s" % plan["full"])
+            print("  widgets unchanged:       %d" % plan["unchanged"])
+            print("  widgets recolored:       %d" % len(plan["recolor"]))
+            print("  widgets recreated:       %d" % len(plan["recreate"]))
+            print("  keys re-grabbed:         %s" % plan["keys"])
+            print("  widgets rebuilt by a full reload: %d" % widgets)
+
+
+if __name__ == "__main__":
+    main()
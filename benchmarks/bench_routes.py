@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Per-tick cost of showing the rate of whichever interface the default route
+uses, on a fake procfs where the route moves between eth0, wlan0 and tun0.
+
+"Polling" is one Net widget per interface, plus reading the routing table on
+every tick to know which one to look at. "Events" is one `SmoothedNet` with
+`interface="auto"`: every interface's counters in one read of /proc/net/dev,
+and the routing table only read when netlink reports a change. Netlink
+messages are simulated: one route change every `--every` ticks, and a burst
+of wifi scan link messages, which don't change whether a link is up, on
+every tick.
+
+    python benchmarks/bench_routes.py [--ticks N] [--interfaces N] [--every N]
+"""
+
+# IMPORTS
+import argparse
+import os
+import tempfile
+import time
+
+from fakeproc import FakeProc
+
+from custom.netdev import InterfaceRates, NetDevReader, NetRates
+from custom.routes import IFF_LOWER_UP, IFF_UP, IFINFOMSG, NLMSGHDR, RTM_NEWLINK, RouteMonitor
+
+RTM_NEWROUTE = 24
+
+ROUTE_HEADER = "Iface\tDestination\tGateway\tFlags\tRefCnt\tUse\tMetric\tMask\tMTU\tWindow\tIRTT\n"
+
+
+def write_routes(root: str, interface: str):
+    with open(os.path.join(root, "net", "route"), "w") as f:
+        f.write(ROUTE_HEADER)
+        f.write("%s\t00000000\t0100A8C0\t0003\t0\t0\t100\t00000000\t0\t0\t0\n" % interface)
+        f.write("eth0\t0000A8C0\t00000000\t0001\t0\t0\t100\t00FFFFFF\t0\t0\t0\n")
+
+
+def message(kind: int, payload: bytes=b""):
+    return NLMSGHDR.pack(NLMSGHDR.size + len(payload), kind, 0, 0, 0) + payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--ticks", type=int, default=3000)
+    parser.add_argument("--interfaces", type=int, default=40, help="Extra veth interfaces.")
+    parser.add_argument("--every", type=int, default=600, help="Ticks between route changes.")
+    args = parser.parse_args()
+
+    # wlan0 reporting a scan: its flags are unchanged, so it doesn't count.
+    scan = message(RTM_NEWLINK, IFINFOMSG.pack(0, 1, 3, IFF_UP | IFF_LOWER_UP, 0)) * 4
+    route_change = message(RTM_NEWROUTE)
+
+    with tempfile.TemporaryDirectory() as root:
+        fake = FakeProc(root, interfaces=args.interfaces)
+        fake.net["tun0"] = [0, 0]
+        cycle = ["eth0", "wlan0", "tun0"]
+
+        # Polling.
+        monitor = RouteMonitor(root)
+        widgets = {name: NetRates(NetDevReader(name, root)) for name in cycle}
+        write_routes(root, cycle[0])
+        elapsed = 0.0
+        for tick in range(args.ticks):
+            if tick % args.every == 0:
+                write_routes(root, cycle[tick // args.every % 3])
+            fake.tick()
+            start = time.perf_counter()
+            for rates in widgets.values():
+                rates.update()
+            monitor.refresh()
+            elapsed += time.perf_counter() - start
+        reads = sum(rates.reader.reads for rates in widgets.values())
+        print("polling: %7.1f us/tick, %.2f net/dev reads/tick, %.3f route table reads/tick" % (
+            elapsed / args.ticks * 1e6, reads / args.ticks, monitor.lookups / args.ticks,
+        ))
+
+        # Events.
+        monitor = RouteMonitor(root)
+        rates = InterfaceRates(NetDevReader(root=root))
+        write_routes(root, cycle[0])
+        monitor.refresh()
+        monitor._socket = True  # As if `watch()` had bound one.
+        lookups = monitor.lookups
+        elapsed = 0.0
+        for tick in range(args.ticks):
+            data = scan
+            if tick % args.every == 0:
+                write_routes(root, cycle[tick // args.every % 3])
+                data += route_change
+            fake.tick()
+            start = time.perf_counter()
+            if monitor._relevant(data):
+                monitor.refresh()
+            rates.update(interface=monitor.interface)
+            elapsed += time.perf_counter() - start
+        print("events:  %7.1f us/tick, %.2f net/dev reads/tick, %.3f route table reads/tick (%d netlink messages)" % (
+            elapsed / args.ticks * 1e6, rates.reader.reads / args.ticks,
+            (monitor.lookups - lookups) / args.ticks, monitor.events,
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Per-tick cost of the CPU, Memory and Net widgets on 1, 2 and 4 screens, before
+and after sharing one `ProcSampler` between them.
+
+"Before" is every widget on every screen reading and parsing its own procfs
+file on its own timer, which is what `widget.CPU`, `widget.Memory` and
+`widget.Net` do through psutil: with 2 screens, /proc/stat, /proc/meminfo and
+/proc/net/dev are each read twice per tick. "After" is every widget reading
+from one shared snapshot, so each file is read once per tick whatever the
+number of screens. Each case is timed 5 times and the best run is reported.
+
+    python benchmarks/bench_sampler.py [--ticks N] [--interfaces N]
+"""
+
+# IMPORTS
+import argparse
+import os
+import tempfile
+import time
+
+from fakeproc import FakeProc
+
+from custom.sampler import ProcSampler, parse_meminfo, parse_net_dev, parse_stat
+
+REPEATS = 5
+
+
+def read(root: str, *path: str):
+    with open(os.path.join(root, *path)) as f:
+        return f.read()
+
+
+def before(root: str, screens: int):
+    """
+    One tick with independent widgets: each one reads the file it needs.
+    """
+    for _ in range(screens):
+        parse_stat(read(root, "stat"))          # CPU
+        parse_meminfo(read(root, "meminfo"))    # Memory
+        parse_net_dev(read(root, "net", "dev"))  # Net
+
+
+def before_psutil(screens: int):
+    """
+    One tick through psutil, as the stock widgets do it. Only used when psutil
+    is installed, and always reads the real /proc.
+    """
+    import psutil
+    for _ in range(screens):
+        psutil.cpu_percent()
+        psutil.virtual_memory()
+        psutil.net_io_counters(pernic=True)
+
+
+def after(sampler: ProcSampler, widgets: int):
+    """
+    One tick with `widgets` widgets all polling the shared sampler.
+    """
+    sampler._snapshot = None  # Start of a new tick.
+    for _ in range(widgets):
+        sampler.snapshot()
+
+
+def timeit(function, ticks: int, *args):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for _ in range(ticks):
+            function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best / ticks * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--interfaces", type=int, default=40, help="Extra veth interfaces.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        FakeProc(root, interfaces=args.interfaces)
+        sampler = ProcSampler(root)
+
+        print("fake procfs with %d interfaces, %d ticks" % (args.interfaces + 3, args.ticks))
+        for screens in (1, 2, 4):
+            widgets = 3 * screens
+            print("%d screen(s), %2d widgets:" % (screens, widgets))
+            print("  before (own reads):    %8.1f us/tick, %2d procfs reads/tick" % (
+                timeit(before, args.ticks, root, screens), widgets,
+            ))
+            try:
+                print("  before (psutil, /proc): %7.1f us/tick" % timeit(before_psutil, args.ticks, screens))
+            except ImportError:
+                pass
+            print("  after  (shared):       %8.1f us/tick,  3 procfs reads/tick" % (
+                timeit(after, args.ticks, sampler, widgets),
+            ))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Polling cost of the CPU, Memory, Net and GPU widgets for 1 to 4 screens built
+from one bar template with `custom.screens.make_screens()`.
+
+Each tick polls every data widget on every screen, the way their timers
+would, against a fake procfs. Reported per tick: the time spent polling,
+the number of reads of the shared sampler and the number of nvidia-smi
+readers. With shared sources those stay at one per tick however many screens
+there are. Each Net widget reads its own line of /proc/net/dev.
+
+Needs Qtile installed. It doesn't draw, so no X server is needed; for
+end-to-end numbers run Qtile under Xvfb with `xrandr --setmonitor` and read
+the bar's `draw_stats` command.
+
+    python benchmarks/bench_screens.py [--ticks N]
+"""
+
+# IMPORTS
+import argparse
+import tempfile
+import time
+
+from fakeproc import FakeProc
+
+from custom import gpu, sampler
+from custom.factory import Widget, build_bar
+from custom.sampler import ProcSampler
+from custom.widgets import AsyncNvidiaSensors, SampledCPU, SampledMemory, SmoothedNet
+
+
+def spec(root: str):
+    return [
+        Widget(SmoothedNet, interface="wlan0", procfs=root, format="{down}↓ {up}↑"),
+        Widget(SampledCPU, format="CPU {load_percent}%"),
+        Widget(SampledMemory, measure_mem="G", format="Mem {MemUsed: .1f}/{MemTotal: .1f}GB"),
+        Widget(AsyncNvidiaSensors, format="GPU {perf} {temp}°C"),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--ticks", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        fake = FakeProc(root, interfaces=40)
+        sampler.shared = ProcSampler(root, net=False)
+
+        for count in range(1, 5):
+            gpu._readers.clear()
+            widgets = [w for _ in range(count) for w in build_bar(spec(root))]
+            polled = [w for w in widgets if not isinstance(w, AsyncNvidiaSensors)]
+            reads = sampler.shared.reads
+
+            elapsed = 0.0
+            for _ in range(args.ticks):
+                fake.tick()
+                sampler.shared._snapshot = None  # Start of a new tick.
+                start = time.perf_counter()
+                for w in polled:
+                    w.poll()
+                elapsed += time.perf_counter() - start
+
+            print(
+                "%d screen(s): %3d widgets, %6.1f us/tick, %.2f sampler reads/tick, %d nvidia-smi reader(s)" % (
+                    count,
+                    len(widgets),
+                    elapsed / args.ticks * 1e6,
+                    (sampler.shared.reads - reads) / args.ticks,
+                    len(gpu._readers),
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
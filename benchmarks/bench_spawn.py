@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Launching a program from a process with a large heap: forking it, the way
+`lazy.spawn()` does, versus handing the command to the helper process of
+`custom.spawn.SpawnPool`.
+
+The window manager's heap is simulated by `--heap-mb` of touched memory.
+Reported per launch: how long the calling process is blocked (what makes a
+held-down volume key stutter) and the time until the program is exec'd.
+
+    python benchmarks/bench_spawn.py [--launches N] [--heap-mb N]
+"""
+
+# IMPORTS
+import argparse
+import asyncio
+import os
+import time
+
+import fakeproc  # noqa: F401 (puts the Qtile config on sys.path)
+
+from custom.spawn import SpawnPool, argv
+
+COMMAND = "true"
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return [samples[int(len(samples) * p / 100)] * 1000 for p in (50, 95)] + [samples[-1] * 1000]
+
+
+def fork_exec(command: str):
+    # What Qtile does: fork, and exec in the child.
+    args = argv(command)
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.execvp(args[0], args)
+        finally:
+            os._exit(127)
+    return pid
+
+
+def run_fork(launches: int):
+    blocked = []
+    for _ in range(launches):
+        start = time.perf_counter()
+        pid = fork_exec(COMMAND)
+        blocked.append(time.perf_counter() - start)
+        os.waitpid(pid, 0)
+    return blocked, None
+
+
+async def run_pool(launches: int):
+    pool = SpawnPool(max_samples=launches)
+    pool.start()
+    pool.spawn(None, COMMAND)  # Warm up the helper.
+    while not pool.latencies:
+        await asyncio.sleep(0.01)
+    pool.latencies.clear()
+
+    blocked = []
+    for _ in range(launches):
+        start = time.perf_counter()
+        pool.spawn(None, COMMAND)
+        blocked.append(time.perf_counter() - start)
+        await asyncio.sleep(0.001)
+    while len(pool.latencies) < launches:
+        await asyncio.sleep(0.01)
+    pool.stop()
+    return blocked, pool.latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--launches", type=int, default=200)
+    parser.add_argument("--heap-mb", type=int, default=300)
+    args = parser.parse_args()
+
+    heap = bytearray(args.heap_mb * 1024 * 1024)
+    for i in range(0, len(heap), 4096):
+        heap[i] = 1
+
+    for name, (blocked, latencies) in (
+        ("fork", run_fork(args.launches)),
+        ("spawn pool", asyncio.run(run_pool(args.launches))),
+    ):
+        print("%-11s blocked p50 %6.3f ms, p95 %6.3f ms, max %6.3f ms" % (name + ":", *percentiles(blocked)))
+        if latencies:
+            print("%-11s to exec  p50 %6.3f ms, p95 %6.3f ms, max %6.3f ms" % ("", *percentiles(latencies)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Wakeups per minute for the bar's polling widgets: one independent timer per
+widget, started at scattered moments as Qtile's are, versus the aligned,
+batched timers of `custom.timers.TimerWheel`.
+
+The widgets of `config.py` are simulated per screen: CPU, Memory and Net
+every second, the GPU every 2 seconds and the clock every second (stock) or
+every minute (`AlignedClock`). Time is simulated, so this runs instantly.
+Reported are wakeups per minute and how late after the minute the clock
+changes.
+
+    python benchmarks/bench_timers.py [--screens N] [--minutes N]
+"""
+
+# IMPORTS
+import argparse
+import heapq
+import random
+
+import fakeproc  # noqa: F401 (puts the Qtile config on sys.path)
+
+from custom.timers import TimerWheel
+
+
+class SimulatedLoop:
+    def __init__(self, now: float):
+        self.now = now
+        self.wakeups = 0
+        self._queue = []
+        self._count = 0
+
+    def time(self):
+        return self.now
+
+    def call_later(self, delay: float, callback):
+        self._count += 1
+        entry = [self.now + delay, self._count, callback, False]
+        heapq.heappush(self._queue, entry)
+        return Handle(entry)
+
+    def run_until(self, end: float):
+        last = None
+        while self._queue and self._queue[0][0] <= end:
+            when, _, callback, cancelled = heapq.heappop(self._queue)
+            if cancelled:
+                continue
+            if when != last:
+                self.wakeups += 1
+                last = when
+            self.now = when
+            callback()
+        self.now = end
+
+
+class Handle:
+    def __init__(self, entry):
+        self._entry = entry
+
+    def cancel(self):
+        self._entry[3] = True
+
+
+def widgets(screens: int, clock_interval: float):
+    intervals = [1.0, 1.0, 1.0, 2.0, clock_interval]
+    return intervals * screens
+
+
+def run_independent(screens: int, minutes: int, start: float):
+    loop = SimulatedLoop(start)
+    clock_lag = {}  # Clock -> how long after the minute it ticks.
+
+    def every(interval, clock=None):
+        def tick():
+            if clock is not None:
+                clock_lag[clock] = min(clock_lag.get(clock, 60), loop.now % 60)
+            loop.call_later(interval, tick)
+        loop.call_later(random.uniform(0, interval), tick)
+
+    for i, interval in enumerate(widgets(screens, 1.0)):
+        every(interval, clock=i if i % 5 == 4 else None)
+    loop.run_until(start + minutes * 60)
+    return loop.wakeups / minutes, max(clock_lag.values())
+
+
+def run_wheel(screens: int, minutes: int, start: float):
+    loop = SimulatedLoop(start)
+    wheel = TimerWheel(loop.call_later, loop.time)
+    clock_lag = []
+    for i, interval in enumerate(widgets(screens, 60.0)):
+        if i % 5 == 4:
+            wheel.add(interval, lambda: clock_lag.append(loop.now % 60))
+        else:
+            wheel.add(interval, lambda: None)
+    loop.run_until(start + minutes * 60)
+    return wheel.wakeups / minutes, max(clock_lag)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--screens", type=int, default=2)
+    parser.add_argument("--minutes", type=int, default=10)
+    args = parser.parse_args()
+
+    start = 1_700_000_000 + random.uniform(0, 60)
+    wakeups, lag = run_independent(args.screens, args.minutes, start)
+    print("independent: %6.1f wakeups/minute, clock changes up to %.3f s after the minute" % (wakeups, lag))
+    wakeups, lag = run_wheel(args.screens, args.minutes, start)
+    print("timer wheel: %6.1f wakeups/minute, clock changes %.3f s after the minute" % (wakeups, lag))
+
+
+if __name__ == "__main__":
+    main()
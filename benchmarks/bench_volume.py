@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+A held-down volume key: auto-repeat presses sent to `custom.volume.VolumeControl`
+with a fake sound server backend, against one `pamixer --increase 5` per press.
+
+Each simulated pamixer reads the volume when it starts and writes it back
+`--spawn-ms` milliseconds later, so presses that overlap lose increments.
+`VolumeControl` talks to the fake server directly, taking `--set-ms`
+milliseconds per change, like a round trip over an open connection, and
+through `PamixerBackend` to `benchmarks/fake-pamixer`, whose changes take a
+random time of up to `--spawn-ms` milliseconds. Reported are the changes the
+server saw (or the pamixer processes started) and whether the final volume
+matches the presses.
+
+    python benchmarks/bench_volume.py [--rate N] [--presses N] [--spawn-ms N] [--set-ms N]
+"""
+
+# IMPORTS
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import fakeproc  # noqa: F401 (puts the Qtile config on sys.path)
+
+from custom.volume import PamixerBackend, VolumeControl
+
+FAKE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake-pamixer")
+
+
+class FakeServer:
+    def __init__(self, set_ms: float):
+        self.set_ms = set_ms
+        self.volume = 20
+        self.mute = False
+        self.sets = 0
+
+    def get_volume(self):
+        return self.volume
+
+    def set_volume(self, volume: int):
+        start = time.monotonic()
+        while time.monotonic() - start < self.set_ms / 1000:
+            pass
+        self.volume = volume
+        self.sets += 1
+
+    def get_mute(self):
+        return self.mute
+
+    def set_mute(self, mute: bool):
+        self.mute = mute
+
+
+async def run(press, rate: int, presses: int, settle: float=0.1):
+    for _ in range(presses):
+        press()
+        await asyncio.sleep(1 / rate)
+    await asyncio.sleep(settle)  # Let the last queued changes run.
+
+
+def pamixer(server, spawn_ms: float):
+    # The process reads the volume as it starts, and sets it a bit later.
+    volume = min(100, server.get_volume() + 5)
+    asyncio.get_event_loop().call_later(spawn_ms / 1000, server.set_volume, volume)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rate", type=int, default=40, help="Key repeats per second.")
+    parser.add_argument("--presses", type=int, default=16)
+    parser.add_argument("--spawn-ms", type=float, default=30)
+    parser.add_argument("--set-ms", type=float, default=0.5)
+    args = parser.parse_args()
+
+    expected = min(100, 20 + 5 * args.presses)
+    for name, coalesce in (("pamixer", False), ("coalesced", True)):
+        server = FakeServer(args.set_ms)
+        if coalesce:
+            control = VolumeControl(server)
+            press = lambda: control.change(5)  # noqa: E731
+        else:
+            press = lambda: pamixer(server, args.spawn_ms)  # noqa: E731
+        asyncio.run(run(press, args.rate, args.presses))
+        report(name, args.presses, server.sets, server.volume, expected)
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["FAKE_PAMIXER_STATE"] = os.path.join(directory, "state")
+        os.environ["FAKE_PAMIXER_DELAY"] = str(args.spawn_ms / 1000)
+        with open(os.environ["FAKE_PAMIXER_STATE"], "w") as f:
+            f.write("20 false\n")
+        backend = PamixerBackend(FAKE)
+        control = VolumeControl(backend)
+        asyncio.run(run(lambda: control.change(5), args.rate, args.presses, settle=1.0))
+        with open(os.environ["FAKE_PAMIXER_STATE"]) as f:
+            volume = int(f.read().split()[0])
+        report("backend", args.presses, backend.runs, volume, expected)
+
+
+def report(name: str, presses: int, changes: int, volume: int, expected: int):
+    print("%-11s %3d presses, %3d changes sent, final volume %3d%% (%s)" % (
+        name + ":",
+        presses,
+        changes,
+        volume,
+        "correct" if volume == expected else "expected %d%%" % expected,
+    ))
+
+if __name__ == "__main__":
+    main()
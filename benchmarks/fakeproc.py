@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Build a fake procfs directory for the benchmarks.
+
+Only the files the bar widgets read are created: `stat`, `meminfo` and
+`net/dev`. Call `tick()` to advance the counters between samples.
+"""
+
+# IMPORTS
+import os
+import random
+import sys
+
+# Make the `custom` package from the Qtile config importable.
+QTILE_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".config", "qtile")
+sys.path.insert(0, os.path.normpath(QTILE_CONFIG))
+
+MEMINFO = """\
+MemTotal:       32795456 kB
+MemFree:        18374212 kB
+MemAvailable:   25123908 kB
+Buffers:          412332 kB
+Cached:          6421836 kB
+SwapCached:            0 kB
+Active:          7981212 kB
+Inactive:        4811340 kB
+Shmem:            512044 kB
+SReclaimable:     388120 kB
+SwapTotal:       8388604 kB
+SwapFree:        8388604 kB
+"""
+
+
+class FakeProc:
+    """
+    A fake procfs tree in `root`.
+
+    root       (str): Directory to create the files in.
+    cores      (int): Number of "cpuN" lines in `stat`.
+    interfaces (int): Number of extra veth interfaces in `net/dev`, on top of
+                      lo, eth0 and wlan0.
+    """
+
+    def __init__(self, root: str, cores: int=8, interfaces: int=0):
+        self.root = root
+        self.cores = cores
+        self.interfaces = ["lo", "eth0", "wlan0"] + ["veth%07x" % i for i in range(interfaces)]
+        self.cpu = [[random.randint(1000, 100000) for _ in range(10)] for _ in range(cores + 1)]
+        self.net = {name: [random.randint(0, 10 ** 9), random.randint(0, 10 ** 9)] for name in self.interfaces}
+        os.makedirs(os.path.join(root, "net"), exist_ok=True)
+        with open(os.path.join(root, "meminfo"), "w") as f:
+            f.write(MEMINFO)
+        self.write()
+
+    def tick(self):
+        """
+        Advance every counter a little and rewrite the files.
+        """
+        for counters in self.cpu:
+            for i in range(len(counters)):
+                counters[i] += random.randint(0, 100)
+        for counters in self.net.values():
+            counters[0] += random.randint(0, 10 ** 6)
+            counters[1] += random.randint(0, 10 ** 5)
+        self.write()
+
+    def write(self):
+        """
+        Write `stat` and `net/dev` from the current counters.
+        """
+        lines = []
+        for i, counters in enumerate(self.cpu):
+            name = "cpu" if i == 0 else "cpu%d" % (i - 1)
+            lines.append(" ".join([name, *map(str, counters)]))
+        lines.append("intr 1234567 0 0 0")
+        lines.append("ctxt 7654321")
+        with open(os.path.join(self.root, "stat"), "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+        lines = [
+            "Inter-|   Receive                                                |  Transmit",
+            " face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed",
+        ]
+        for name, (received, sent) in self.net.items():
+            lines.append(
+                "%6s: %d 1000 0 0 0 0 0 0 %d 1000 0 0 0 0 0 0" % (name, received, sent)
+            )
+        with open(os.path.join(self.root, "net", "dev"), "w") as f:
+            f.write("\n".join(lines) + "\n")